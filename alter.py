@@ -9,6 +9,7 @@ How to run:
   3. Run: streamlit run app.py
 """
 
+import os
 import streamlit as st
 import pandas as pd
 import pyodbc
@@ -16,6 +17,23 @@ import hashlib
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 
+from catalog_browser import render_catalog_browser
+from catalog_cache import catalog
+from catalog_store import CatalogStore
+from change_feed import ChangeFeed
+from columnar import MOVIE_SCHEMA, fetch_frame
+from csv_import import ImportReport, import_movies_csv
+from db_pool import get_pool
+from heuristic_scorer import HeuristicScorer
+from history_writer import HistoryWriter
+from migrations import MOVIEDB_MIGRATIONS, run_migrations
+from movie_search import PAGE_SIZE, MovieSearch
+from movie_diff import EDITABLE_COLUMNS, MovieDiff, apply_movie_diff, diff_movie_frames
+from neighbors import NEIGHBOR_COLUMNS, NeighborRefresher
+from shared_model import SharedModel
+from title_index import TitleIndex, title_picker
+from trigram_index import SEARCH_LIMIT, TrigramIndex
+
 # ==========================
 # CONFIG - edit to suit
 # ==========================
@@ -42,8 +60,8 @@ ADMIN_PASSWORD_HASH = hashlib.sha256(ADMIN_PASSWORD_PLAIN.encode("utf-8")).hexdi
 # DB helpers
 # ==========================
 def connect() -> Tuple[pyodbc.Connection, pyodbc.Cursor]:
-    """Return an open connection and cursor. Caller must close()."""
-    cnxn = pyodbc.connect(CNXN_STR, autocommit=False)
+    """Return a pooled connection and cursor. Caller must close() (returns it to the pool)."""
+    cnxn = get_pool(CNXN_STR, autocommit=False).acquire()
     cursor = cnxn.cursor()
     return cnxn, cursor
 
@@ -63,97 +81,88 @@ def try_connect() -> Tuple[bool, Optional[str]]:
 def hash_password(plain: str) -> str:
     return hashlib.sha256(plain.encode("utf-8")).hexdigest()
 
-def row_to_dict(row) -> Dict:
-    # expects the movies table to be in the schema below
-    return {
-        "movie_id": int(row.movie_id),
-        "title": row.title,
-        "release_year": int(row.release_year) if row.release_year is not None else None,
-        "genre": row.genre or "",
-        "director": row.director or "",
-        "imdb_rating": float(row.imdb_rating) if row.imdb_rating is not None else None,
-        "language": row.language or "",
-        "duration_minutes": int(row.duration_minutes) if row.duration_minutes is not None else None,
-        "created_at": row.created_at
-    }
-
 # ==========================
-# SCHEMA CREATION (run once)
+# SCHEMA MIGRATIONS (run once)
 # ==========================
-def ensure_tables():
-    """Create minimal tables if they don't exist."""
+def ensure_tables() -> int:
+    """Bring the schema up to date (see migrations.py); returns the schema version."""
     cnxn, cursor = connect()
     try:
-        # users
-        cursor.execute("""
-        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[users]') AND type in (N'U'))
-        BEGIN
-            CREATE TABLE dbo.users (
-                user_id INT IDENTITY(1,1) PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                created_at DATETIME DEFAULT GETDATE()
-            );
-        END
-        """)
-        # search_history
-        cursor.execute("""
-        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[search_history]') AND type in (N'U'))
-        BEGIN
-            CREATE TABLE dbo.search_history (
-                id INT IDENTITY(1,1) PRIMARY KEY,
-                user_id INT NOT NULL,
-                movie_title VARCHAR(500) NOT NULL,
-                search_time DATETIME DEFAULT GETDATE(),
-                CONSTRAINT FK_search_history_user FOREIGN KEY (user_id) REFERENCES dbo.users(user_id)
-            );
-        END
-        """)
-        # movies
-        cursor.execute("""
-        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[movies]') AND type in (N'U'))
-        BEGIN
-            CREATE TABLE dbo.movies (
-                movie_id INT IDENTITY(1,1) PRIMARY KEY,
-                title VARCHAR(500) NOT NULL,
-                release_year INT NULL,
-                genre VARCHAR(255) NULL,
-                director VARCHAR(255) NULL,
-                imdb_rating DECIMAL(3,1) NULL,
-                language VARCHAR(100) NULL,
-                duration_minutes INT NULL,
-                created_at DATETIME DEFAULT GETDATE()
-            );
-        END
-        """)
-        cnxn.commit()
+        return run_migrations(cnxn, "moviedb", MOVIEDB_MIGRATIONS)
     finally:
         cnxn.close()
 
 # ==========================
 # Basic DB fetch helpers
 # ==========================
-def load_all_movies() -> List[Dict]:
+MOVIE_SELECT = "SELECT movie_id, title, release_year, genre, director, imdb_rating, language, duration_minutes, created_at FROM dbo.movies"
+
+def load_all_movies() -> pd.DataFrame:
+    """Whole catalog fetched column-wise into typed columns (see columnar.MOVIE_SCHEMA)."""
     cnxn, cursor = connect()
     try:
-        rows = cursor.execute("SELECT movie_id, title, release_year, genre, director, imdb_rating, language, duration_minutes, created_at FROM dbo.movies").fetchall()
-        return [row_to_dict(r) for r in rows]
+        return fetch_frame(cursor, MOVIE_SELECT, schema=MOVIE_SCHEMA)
     finally:
         cnxn.close()
 
+def catalog_store() -> CatalogStore:
+    """The catalog as dictionary-encoded / fixed-width arrays, served from the shared catalog cache."""
+    return catalog.get("alter.movies", lambda: CatalogStore.from_frame(load_all_movies()))
+
+def title_index() -> TitleIndex:
+    """Prefix index over the cached catalog's titles (rebuilt with it)."""
+    return catalog.get("alter.titles", lambda: TitleIndex(catalog_store()))
+
 def df_all_movies() -> pd.DataFrame:
-    rows = load_all_movies()
-    if not rows:
-        return pd.DataFrame(columns=["movie_id","title","release_year","genre","director","imdb_rating","language","duration_minutes","created_at"])
-    return pd.DataFrame(rows)
+    """All movies as a DataFrame of views over the cached CatalogStore."""
+    # shallow copy so callers can add columns without touching the cached frame
+    return catalog_store().frame().copy(deep=False)
+
+def movie_scorer() -> HeuristicScorer:
+    """Recommendation arrays built from the catalog store, cached alongside it."""
+    return catalog.get("alter.scorer", lambda: HeuristicScorer(catalog_store()))
+
+def movie_records(df: pd.DataFrame) -> List[Dict]:
+    df = df.astype({"imdb_rating": float}).round({"imdb_rating": 1})  # float32 -> the stored DECIMAL(3,1)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def search_movies(query: str, page: int = 0, page_size: int = PAGE_SIZE) -> Tuple[List[Dict], bool]:
+    """One page of ranked matches over title / genre / director / language, plus whether more pages exist."""
+    engine = search_engine().get()
+    if engine is None:
+        return [], False
+    hits = engine.search(query, page=page, page_size=page_size)
+    return movie_records(engine.df.iloc[hits.rows]), hits.has_more
+
+def find_movies_by_fuzzy_title(title_partial: str, limit: int = SEARCH_LIMIT) -> List[Dict]:
+    """Closest titles by trigram similarity, best first (catches typos no search word matches)."""
+    hits = [movie_id for movie_id, _ in fuzzy_titles().search(title_partial, limit=limit)]
+    if not hits:
+        return []
+    cnxn, cursor = connect()
+    try:
+        df = fetch_frame(cursor, MOVIE_SELECT + f" WHERE movie_id IN ({', '.join('?' * len(hits))})",
+                         tuple(hits), schema=MOVIE_SCHEMA)
+    finally:
+        cnxn.close()
+    rank = {movie_id: i for i, movie_id in enumerate(hits)}
+    return movie_records(df.sort_values("movie_id", key=lambda ids: ids.map(rank)).reset_index(drop=True))
 
-def find_movie_by_title(title_partial: str) -> List[Dict]:
+def fetch_titles(movie_ids) -> Dict[int, Optional[str]]:
+    """movie_id -> current title; None for ids no longer in dbo.movies."""
+    ids = list(movie_ids)
+    titles = dict.fromkeys(ids)
     cnxn, cursor = connect()
     try:
-        rows = cursor.execute("SELECT movie_id, title, release_year, genre, director, imdb_rating, language, duration_minutes, created_at FROM dbo.movies WHERE title LIKE ?", ('%' + title_partial + '%',)).fetchall()
-        return [row_to_dict(r) for r in rows]
+        for start in range(0, len(ids), 1000):
+            batch = ids[start:start + 1000]
+            cursor.execute(f"SELECT movie_id, title FROM dbo.movies WHERE movie_id IN ({', '.join('?' * len(batch))})",
+                           batch)
+            for movie_id, title in cursor.fetchall():
+                titles[movie_id] = title
     finally:
         cnxn.close()
+    return titles
 
 # ==========================
 # ADMIN CRUD
@@ -168,16 +177,29 @@ def admin_insert_movie(title, release_year, genre, director, rating, language, d
         cnxn.commit()
     finally:
         cnxn.close()
+    catalog_changed()
 
-def admin_update_movie_field(movie_id:int, field:str, value):
-    # field should be validated by caller
+def admin_apply_diff(diff: MovieDiff) -> Dict[str, int]:
+    """Apply a batch of inserts / cell updates / deletes in a single transaction."""
     cnxn, cursor = connect()
     try:
-        query = f"UPDATE dbo.movies SET {field} = ? WHERE movie_id = ?"
-        cursor.execute(query, (value, movie_id))
-        cnxn.commit()
+        counts = apply_movie_diff(cnxn, diff)
     finally:
         cnxn.close()
+    catalog_changed()
+    # new rows get their lists from the nightly rebuild (their ids are not known here)
+    changed = [key for key, changes in diff.updates if NEIGHBOR_COLUMNS.intersection(changes)]
+    refresh_neighbors(changed + list(diff.deletes))
+    return counts
+
+@st.cache_resource
+def neighbor_refresher() -> NeighborRefresher:
+    """One background patcher per server process (see neighbors.NeighborRefresher)."""
+    return NeighborRefresher(lambda: connect()[0])
+
+def refresh_neighbors(movie_ids: List[int]):
+    """Queue a patch of the precomputed neighbor lists an edit affects; the save does not wait for it."""
+    neighbor_refresher().submit(movie_ids)
 
 def admin_delete_movie(movie_id:int):
     cnxn, cursor = connect()
@@ -186,6 +208,8 @@ def admin_delete_movie(movie_id:int):
         cnxn.commit()
     finally:
         cnxn.close()
+    catalog_changed()
+    refresh_neighbors([movie_id])
 
 def admin_bulk_insert(movies_list: List[tuple]):
     cnxn, cursor = connect()
@@ -199,6 +223,14 @@ def admin_bulk_insert(movies_list: List[tuple]):
         cnxn.commit()
     finally:
         cnxn.close()
+    catalog_changed()
+
+def admin_import_csv(source, progress=None) -> ImportReport:
+    """Stream a movies CSV into dbo.movies chunk by chunk (each chunk commits on its own)."""
+    try:
+        return import_movies_csv(source, lambda: connect()[0], progress=progress)
+    finally:
+        catalog_changed()  # earlier chunks are committed even if a later one fails
 
 # ==========================
 # USER management & history
@@ -229,18 +261,20 @@ def user_login(username: str, password: str) -> Tuple[bool, Optional[int]]:
     finally:
         cnxn.close()
 
+@st.cache_resource
+def history_writer() -> HistoryWriter:
+    """Process-wide write-behind queue for search history (see history_writer.py)."""
+    return HistoryWriter(lambda: connect()[0])
+
 def save_search_history(user_id: int, movie_title: str):
-    cnxn, cursor = connect()
-    try:
-        cursor.execute("INSERT INTO dbo.search_history (user_id, movie_title) VALUES (?, ?)", (user_id, movie_title))
-        cnxn.commit()
-    finally:
-        cnxn.close()
+    # queued and inserted in batches by a background thread; never waits on the INSERT
+    history_writer().submit(user_id, movie_title)
 
 def get_user_history(user_id:int, limit:int=50):
+    history_writer().flush()  # include searches that are still queued
     cnxn, cursor = connect()
     try:
-        rows = cursor.execute("SELECT movie_title, search_time FROM dbo.search_history WHERE user_id = ? ORDER BY search_time DESC", (user_id,)).fetchmany(limit)
+        rows = cursor.execute("SELECT movie_title, search_time FROM dbo.search_history WHERE user_id = ? ORDER BY search_time DESC, id DESC", (user_id,)).fetchmany(limit)
         return [(r.movie_title, r.search_time) for r in rows]
     finally:
         cnxn.close()
@@ -275,21 +309,21 @@ def compute_score(base_movie:dict, candidate:dict):
             score += 0.05
     return score
 
-def recommend_similar_from_df(df: pd.DataFrame, base_title: str, limit=8):
-    matches = df[df['title'].str.contains(base_title, case=False, na=False)]
-    if matches.empty:
+def recommend_similar_from_df(df: pd.DataFrame, base_title: str, limit=8, scorer: HeuristicScorer = None,
+                              titles: TrigramIndex = None):
+    """`df` must be `scorer.df` when a scorer is given (positions are shared).
+
+    The base movie is the closest title in `titles` (typos tolerated); an exact title ranks first.
+    """
+    titles = titles or TrigramIndex(zip(df['movie_id'].tolist(), df['title']))
+    # same scores as compute_score, evaluated column-wise over the whole catalog
+    scorer = scorer or HeuristicScorer(df)
+    base_pos = titles.best_row(base_title, scorer.row_of)
+    if base_pos is None:
         return None, []
-    exact = matches[matches['title'].str.lower() == base_title.strip().lower()]
-    base_row = exact.iloc[0] if not exact.empty else matches.iloc[0]
-    base_movie = base_row.to_dict()
-    candidates = df[df['movie_id'] != base_movie['movie_id']].to_dict('records')
-    scored = []
-    for c in candidates:
-        s = compute_score(base_movie, c)
-        scored.append((s, c))
-    # sort by score then rating
-    scored.sort(key=lambda x: (x[0], x[1].get('imdb_rating') or 0), reverse=True)
-    recs = [c for s,c in scored[:limit]]
+    base_movie = df.iloc[base_pos].to_dict()
+    top = scorer.recommend(base_pos, limit=limit)
+    recs = scorer.df.iloc[top].astype({'imdb_rating': float}).round({'imdb_rating': 1}).to_dict('records')
     return base_movie, recs
 
 # ==========================
@@ -298,21 +332,77 @@ def recommend_similar_from_df(df: pd.DataFrame, base_title: str, limit=8):
 st.set_page_config(page_title="Movie Recommender (Admin + Users)", layout="wide")
 st.title("🎬 Movie Recommendation — Owner (Admin) & Users (Clients)")
 
-# test DB connection early
-ok, err = try_connect()
-if not ok:
+@st.cache_resource
+def change_feed():
+    """Polls dbo.movies_changes once per server process; any catalog change drops the cached
+    catalog here (and, through catalog.subscribe, marks the shared model stale)."""
+    feed = ChangeFeed(lambda: connect()[0])
+    feed.subscribe(lambda changes: catalog.invalidate())
+    return feed
+
+def catalog_changed():
+    """After a local catalog write: publish it through the change feed (one reload, not one now and
+    another when the feed sees it), or drop the cache directly if the feed could not."""
+    if not change_feed().catch_up():
+        catalog.invalidate()
+
+@st.cache_resource
+def search_engine() -> SharedModel:
+    """One BM25 index per server process, rebuilt in the background after catalog changes."""
+    engine = SharedModel(lambda: MovieSearch(catalog_store()), name="alter.search")
+    catalog.subscribe(engine.mark_stale)
+    return engine
+
+@st.cache_resource
+def fuzzy_titles() -> TrigramIndex:
+    """Trigram title index for the whole process, patched from the change feed instead of rebuilt."""
+    index = TrigramIndex()
+    loading, seen = [True], {}
+
+    def on_change(changes):
+        titles = fetch_titles(changes)
+        if loading[0]:
+            seen.update(titles)  # recorded before applying, so the replay below cannot miss it
+        index.apply(titles)
+
+    # subscribe before loading: a change committed during the load is replayed, not lost
+    change_feed().subscribe(on_change)
+    cnxn, cursor = connect()
+    try:
+        index.rebuild((movie_id, title) for movie_id, title in
+                      cursor.execute("SELECT movie_id, title FROM dbo.movies").fetchall())
+    finally:
+        cnxn.close()
+    loading[0] = False
+    index.apply(dict(seen))
+    return index
+
+@st.cache_resource
+def bootstrap() -> Dict:
+    """Connection test + schema migrations, once per server process.
+
+    Failures raise instead of returning, so they are not cached and the next rerun retries.
+    """
+    ok, err = try_connect()
+    if not ok:
+        raise ConnectionError(err)
+    version = ensure_tables()
+    change_feed()
+    return {"schema_version": version, "started_at": datetime.now()}
+
+try:
+    boot = bootstrap()
+except Exception as e:
     st.error("Cannot connect to database. Check SERVER/DATABASE/DRIVER and that SQL Server is running.")
-    st.code(f"Connection error: {err}")
+    st.code(f"Connection error: {e}")
     st.stop()
 
-# ensure tables exist
-ensure_tables()
-
 # sidebar environment info
 st.sidebar.markdown("### Configuration")
 st.sidebar.write("DB:", f"`{DATABASE}`")
 st.sidebar.write("Server:", SERVER)
 st.sidebar.write("Driver:", DRIVER)
+st.sidebar.write("Bootstrap:", f"✅ schema v{boot['schema_version']} since {boot['started_at']:%Y-%m-%d %H:%M:%S}")
 st.sidebar.markdown("---")
 
 role = st.sidebar.selectbox("I am a", ["Visitor / User", "Owner (Admin)"])
@@ -339,8 +429,12 @@ if role == "Owner (Admin)":
         if admin_menu == "View Movies":
             st.subheader("All Movies (admin view)")
             try:
-                df = df_all_movies()
-                st.dataframe(df, use_container_width=True)
+                render_catalog_browser(
+                    lambda: connect()[0], "dbo.movies", "movie_id",
+                    columns=["movie_id", "title", "release_year", "genre", "director", "imdb_rating", "language", "duration_minutes", "created_at"],
+                    sort_columns=["movie_id", "title", "release_year", "imdb_rating", "created_at"],
+                    state_key="admin_browser",
+                )
             except Exception as e:
                 st.error(f"Failed to fetch movies: {e}")
 
@@ -381,26 +475,84 @@ if role == "Owner (Admin)":
                 except Exception as e:
                     st.error(f"Bulk insert error: {e}")
 
+            st.markdown("---")
+            st.subheader("Import movies from CSV")
+            st.caption("Header row with movie column names, or no header in the movies.csv export layout. "
+                       "Rows are validated and inserted in chunks; invalid rows are skipped and listed below.")
+            uploaded = st.file_uploader("CSV file", type=["csv"])
+            server_path = st.text_input("...or path to a CSV file on the server", "")
+            if st.button("Import CSV", disabled=not (uploaded or server_path.strip())):
+                bar = st.progress(0.0)
+                status = st.empty()
+                source = uploaded
+
+                def show_progress(rows_read, inserted, rejected, elapsed):
+                    if total_bytes:
+                        bar.progress(min(source.tell() / total_bytes, 1.0))
+                    rate = rows_read / elapsed if elapsed else 0
+                    status.write(f"{rows_read} rows read · {inserted} inserted · {rejected} rejected · {rate:,.0f} rows/s")
+
+                try:
+                    # a server path is opened here (not by the importer) so both sources report progress
+                    # through tell(), and a bad path ends up in the error below
+                    if uploaded is None:
+                        source = open(server_path.strip(), "rb")
+                    total_bytes = uploaded.size if uploaded else os.fstat(source.fileno()).st_size
+                    report = admin_import_csv(source, progress=show_progress)
+                    bar.progress(1.0)
+                    st.success(f"Imported {report.inserted} of {report.rows_read} rows in {report.seconds:.1f}s "
+                               f"({report.rows_per_second:,.0f} rows/s); {report.rejected} rejected.")
+                    if report.rejected_samples:
+                        shown = len(report.rejected_samples)
+                        st.write(f"Rejected rows (first {shown}):" if shown < report.rejected else "Rejected rows:")
+                        st.dataframe(pd.DataFrame(report.rejected_samples), use_container_width=True)
+                except Exception as e:
+                    st.error(f"CSV import error: {e}")
+                finally:
+                    if source is not None and source is not uploaded:
+                        source.close()
+
         # Update Movie
         elif admin_menu == "Update Movie":
             st.subheader("Update movie details")
+            mode = st.radio("Mode", ["Single movie", "Batch edit grid"], horizontal=True)
             df = df_all_movies()
-            if df.empty:
+            if mode == "Batch edit grid":
+                st.write("Edit cells, add rows at the bottom or delete rows, then apply everything at once.")
+                # plain object columns: a categorical column would limit the grid to existing values
+                grid = df[["movie_id"] + EDITABLE_COLUMNS].astype({"genre": object, "director": object, "language": object}).reset_index(drop=True)
+                edited = st.data_editor(grid, num_rows="dynamic", disabled=["movie_id"],
+                                        use_container_width=True, key="movie_grid")
+                diff = diff_movie_frames(grid, edited)
+                st.caption(f"Pending: {diff.summary()}")
+                if st.button("Apply changes", disabled=diff.is_empty()):
+                    try:
+                        counts = admin_apply_diff(diff)
+                        st.success(f"Applied in one transaction: {counts}")
+                    except Exception as e:
+                        st.error(f"Apply failed, nothing was changed: {e}")
+            elif df.empty:
                 st.info("No movies to update.")
             else:
-                options = df.apply(lambda r: f"{r['movie_id']} - {r['title']}", axis=1).tolist()
-                sel = st.selectbox("Select movie", options)
-                movie_id = int(sel.split(" - ")[0])
-                row = df[df['movie_id'] == movie_id].iloc[0]
+                movie_id = title_picker(title_index(), "Select movie", key="admin_update")
+                rows = df[df['movie_id'] == movie_id]
+                if rows.empty:
+                    st.stop()
+                row = rows.iloc[0]
                 new_title = st.text_input("Title", value=row['title'])
                 new_genre = st.text_input("Genre", value=row['genre'])
                 new_rating = st.number_input("IMDb rating", value=float(row['imdb_rating']) if row['imdb_rating'] else 0.0, step=0.1)
                 if st.button("Update"):
+                    # only the fields that differ, so an untouched genre does not patch the neighbor lists
+                    old = {"title": row['title'], "genre": row['genre'],
+                           "imdb_rating": None if pd.isna(row['imdb_rating']) else round(float(row['imdb_rating']), 1)}
+                    new = {"title": new_title, "genre": new_genre, "imdb_rating": round(float(new_rating), 1)}
+                    changes = {c: v for c, v in new.items() if v != old[c]}
                     try:
-                        admin_update_movie_field(movie_id=movie_id, field="title", value=new_title)
-                        admin_update_movie_field(movie_id=movie_id, field="genre", value=new_genre)
-                        admin_update_movie_field(movie_id=movie_id, field="imdb_rating", value=float(new_rating))
-                        st.success("Updated")
+                        if changes:
+                            # one statement, one commit for the changed fields
+                            admin_apply_diff(MovieDiff([], [(movie_id, changes)], []))
+                        st.success("Updated" if changes else "Nothing to update")
                     except Exception as e:
                         st.error(f"Update failed: {e}")
 
@@ -411,10 +563,8 @@ if role == "Owner (Admin)":
             if df.empty:
                 st.info("No movies to delete.")
             else:
-                options = df.apply(lambda r: f"{r['movie_id']} - {r['title']}", axis=1).tolist()
-                sel = st.selectbox("Select movie to delete", options)
-                movie_id = int(sel.split(" - ")[0])
-                if st.button("Delete"):
+                movie_id = title_picker(title_index(), "Select movie to delete", key="admin_delete")
+                if movie_id is not None and st.button("Delete"):
                     try:
                         admin_delete_movie(movie_id=movie_id)
                         st.success("Deleted")
@@ -425,8 +575,9 @@ if role == "Owner (Admin)":
         elif admin_menu == "View Search Logs":
             st.subheader("Search history (all users)")
             try:
+                history_writer().flush()  # include searches that are still queued
                 cnxn, cursor = connect()
-                df_logs = pd.read_sql("SELECT sh.id, sh.user_id, u.username, sh.movie_title, sh.search_time FROM dbo.search_history sh LEFT JOIN dbo.users u ON sh.user_id = u.user_id ORDER BY sh.search_time DESC", cnxn)
+                df_logs = pd.read_sql("SELECT sh.id, sh.user_id, u.username, sh.movie_title, sh.search_time FROM dbo.search_history sh LEFT JOIN dbo.users u ON sh.user_id = u.user_id ORDER BY sh.search_time DESC, sh.id DESC", cnxn)
                 st.dataframe(df_logs, use_container_width=True)
             except Exception as e:
                 st.error(f"Failed to fetch logs: {e}")
@@ -448,6 +599,16 @@ if role == "Owner (Admin)":
                 st.write("Total users:", users_count)
             except Exception as e:
                 st.write("Could not count users:", e)
+            st.write("Connection pool:")
+            st.json(get_pool(CNXN_STR, autocommit=False).stats())
+            st.write("Search history writer:")
+            st.json(history_writer().stats())
+            st.write("Catalog change feed:")
+            st.json(change_feed().stats())
+            st.write("Neighbor refresher:")
+            st.json(neighbor_refresher().stats())
+            st.write("Search index:")
+            st.json(search_engine().stats())
 
     else:
         st.info("Please login as admin using the sidebar (default admin credentials are set in the app).")
@@ -492,15 +653,33 @@ else:
 
         # Search movies
         if user_menu == "Search Movies":
-            q = st.text_input("Search title (partial / full)")
+            q = st.text_input("Search title, director, genre or language (e.g. \"nolan sci-fi\")")
             if st.button("Search"):
+                st.session_state['search_query'] = q
+                st.session_state['search_page'] = 0
+                # saved once the first page shows results, like before paging existed
+                st.session_state['search_unsaved'] = bool(q.strip())
+            query = st.session_state.get('search_query', '')
+            page = st.session_state.get('search_page', 0)
+            if query.strip():
                 try:
-                    results = find_movie_by_title(q)
+                    results, has_more = search_movies(query, page=page)
+                    if not results and page == 0:
+                        results = find_movies_by_fuzzy_title(query)  # no word matched: closest titles (typos)
+                    if st.session_state.pop('search_unsaved', False) and results:
+                        save_search_history(st.session_state['user_id'], query)
+                        st.success("Search saved to history")
                     if results:
                         df_res = pd.DataFrame(results)
+                        st.caption(f"Results {page * PAGE_SIZE + 1}–{page * PAGE_SIZE + len(df_res)} for \"{query}\"")
                         st.dataframe(df_res, use_container_width=True)
-                        save_search_history(st.session_state['user_id'], q)
-                        st.success("Search saved to history")
+                        nav1, nav2, _ = st.columns([1, 1, 6])
+                        if nav1.button("◀ Previous", disabled=page == 0):
+                            st.session_state['search_page'] = page - 1
+                            st.rerun()
+                        if nav2.button("Next ▶", disabled=not has_more):
+                            st.session_state['search_page'] = page + 1
+                            st.rerun()
                         top = df_res.iloc[0]
                         st.markdown("**Top match quick facts:**")
                         st.write(f"**{top['title']}** — {top['release_year']} — {top['genre']} — Director: {top['director']} — ⭐ {top['imdb_rating']}")
@@ -517,8 +696,9 @@ else:
             topn = st.number_input("How many recommendations?", min_value=1, max_value=20, value=5)
             if st.button("Get Recommendations"):
                 try:
-                    df = df_all_movies()
-                    base_mov, recs = recommend_similar_from_df(df, base, limit=int(topn))
+                    scorer = movie_scorer()
+                    base_mov, recs = recommend_similar_from_df(scorer.df, base, limit=int(topn), scorer=scorer,
+                                                               titles=fuzzy_titles())
                     if base_mov is None:
                         st.warning("No base movie found")
                     else:
@@ -1,11 +1,18 @@
 # app.py
 import streamlit as st
 import pandas as pd
-import pyodbc
+from db_pool import get_pool
+from catalog_cache import catalog
+from catalog_store import CatalogStore
+from change_feed import ChangeFeed
+from migrations import MOVIEDB_MIGRATIONS, run_migrations
 from werkzeug.security import generate_password_hash, check_password_hash
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from similarity import most_similar
+from shared_model import SharedModel, fit_tfidf
+from neighbors import NeighborRefresher, fetch_neighbors, find_movie_id_by_title
+from title_index import TitleIndex, title_picker
 import re
+from datetime import datetime
 
 # -----------------------------
 # DB CONNECTION (edit if needed)
@@ -21,27 +28,52 @@ def get_connection():
         f"DATABASE={DATABASE};"
         "Trusted_Connection=yes;"
     )
-    return pyodbc.connect(conn_str)
+    # pooled: conn.close() hands the connection back instead of disconnecting
+    return get_pool(conn_str).acquire()
 
 # -----------------------------
 # Ensure admin exists (auto-create default admin/admin123)
 # -----------------------------
 def ensure_admin_exists():
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT user_id FROM dbo.users WHERE username = ?", ("admin",))
+    row = cur.fetchone()
+    if not row:
+        hashed = generate_password_hash("admin123")
+        cur.execute("INSERT INTO dbo.users (username, password_hash) VALUES (?, ?)", ("admin", hashed))
+        conn.commit()
+    conn.close()
+
+@st.cache_resource
+def change_feed():
+    """Polls dbo.movies_changes once per server process; any catalog change drops the cached
+    catalog here (and, through catalog.subscribe, marks the shared model stale)."""
+    feed = ChangeFeed(get_connection)
+    feed.subscribe(lambda changes: catalog.invalidate())
+    return feed
+
+def catalog_changed():
+    """After a local catalog write: publish it through the change feed (one reload, not one now and
+    another when the feed sees it), or drop the cache directly if the feed could not."""
+    if not change_feed().catch_up():
+        catalog.invalidate()
+
+def ensure_tables():
+    """Bring the schema up to date (see migrations.py), including the change log the feed reads."""
+    conn = get_connection()
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT user_id FROM dbo.users WHERE username = ?", ("admin",))
-        row = cur.fetchone()
-        if not row:
-            hashed = generate_password_hash("admin123")
-            cur.execute("INSERT INTO dbo.users (username, password_hash) VALUES (?, ?)", ("admin", hashed))
-            conn.commit()
+        return run_migrations(conn, "moviedb", MOVIEDB_MIGRATIONS)
+    finally:
         conn.close()
-    except Exception as e:
-        # if table missing or DB not reachable, log to console (UI will show DB errors later)
-        print("ensure_admin_exists error:", e)
 
-ensure_admin_exists()
+@st.cache_resource
+def bootstrap():
+    """Runs once per server process; a failure raises (and is retried on the next rerun) instead of being cached."""
+    version = ensure_tables()
+    ensure_admin_exists()
+    change_feed()
+    return {"schema_version": version, "started_at": datetime.now()}
 
 # -----------------------------
 # Auth / User functions
@@ -67,13 +99,24 @@ def authenticate_user(username: str, password: str) -> bool:
 # -----------------------------
 # Movies helpers
 # -----------------------------
+def movies_store():
+    """Full movies table as a CatalogStore, served from the shared catalog cache."""
+    def load():
+        conn = get_connection()
+        try:
+            return CatalogStore.from_frame(pd.read_sql("SELECT * FROM dbo.movies", conn))
+        finally:
+            conn.close()
+    return catalog.get("bro.movies", load)
+
+def title_index():
+    """Prefix index over the cached catalog's titles (rebuilt with it)."""
+    return catalog.get("bro.titles", lambda: TitleIndex(movies_store()))
+
 def fetch_movies_df():
-    conn = get_connection()
-    try:
-        df = pd.read_sql("SELECT * FROM dbo.movies", conn)
-    finally:
-        conn.close()
-    return df
+    """Full movies table as views over the cached CatalogStore."""
+    # shallow copy so callers can add columns without touching the cached frame
+    return movies_store().frame().copy(deep=False)
 
 def add_movie_sql(title, year, genre, director, rating, language, duration):
     conn = get_connection()
@@ -84,14 +127,11 @@ def add_movie_sql(title, year, genre, director, rating, language, duration):
     """, (title, year or None, genre or None, director or None, rating or None, language or None, duration or None))
     conn.commit()
     conn.close()
+    catalog_changed()
 
 def update_movie_sql(movie_id, title=None, genre=None, rating=None):
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute("SELECT movie_id FROM dbo.movies WHERE movie_id = ?", (movie_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise ValueError("Movie not found")
     parts = []
     params = []
     if title is not None:
@@ -100,12 +140,36 @@ def update_movie_sql(movie_id, title=None, genre=None, rating=None):
         parts.append("genre = ?"); params.append(genre)
     if rating is not None:
         parts.append("imdb_rating = ?"); params.append(rating)
+    genre_changed = False
     if parts:
+        if genre is not None:
+            # the form always sends the genre: only a different one needs the neighbor lists patched
+            old = cur.execute("SELECT genre FROM dbo.movies WITH (UPDLOCK) WHERE movie_id = ?", (movie_id,)).fetchone()
+            genre_changed = old is not None and (old[0] or "") != genre
+        # rowcount tells us whether the movie exists
         q = "UPDATE dbo.movies SET " + ", ".join(parts) + " WHERE movie_id = ?"
         params.append(movie_id)
         cur.execute(q, tuple(params))
+        found = cur.rowcount > 0
         conn.commit()
+    else:
+        cur.execute("SELECT movie_id FROM dbo.movies WHERE movie_id = ?", (movie_id,))
+        found = cur.fetchone() is not None
     conn.close()
+    if not found:
+        raise ValueError("Movie not found")
+    catalog_changed()
+    if genre_changed:
+        refresh_neighbors([movie_id])
+
+@st.cache_resource
+def neighbor_refresher():
+    """One background patcher per server process (see neighbors.NeighborRefresher)."""
+    return NeighborRefresher(get_connection)
+
+def refresh_neighbors(movie_ids):
+    """Queue a patch of the precomputed neighbor lists an edit affects; the save does not wait for it."""
+    neighbor_refresher().submit(movie_ids)
 
 def delete_movie_sql(movie_id):
     conn = get_connection()
@@ -113,6 +177,8 @@ def delete_movie_sql(movie_id):
     cur.execute("DELETE FROM dbo.movies WHERE movie_id = ?", (movie_id,))
     conn.commit()
     conn.close()
+    catalog_changed()
+    refresh_neighbors([movie_id])
 
 # -----------------------------
 # ALTER TABLE - Add Column (safe)
@@ -138,27 +204,57 @@ def add_column_to_movies(col_name: str, col_type: str, allow_nulls: bool = True)
     cur.execute(q)
     conn.commit()
     conn.close()
+    catalog.invalidate()
 
 # -----------------------------
 # Recommendation helper
 # -----------------------------
-def get_recommendations(df: pd.DataFrame, base_title: str, topn: int = 5):
-    if df.empty or base_title is None or base_title.strip() == "":
+def build_recommender():
+    generation = catalog.generation  # read first: a write during the load only costs a rebuild
+    store = movies_store()
+    df = store.frame()
+    # categorical columns (see catalog_store) have no string "+"; missing values are already ""
+    return fit_tfidf(df, df['genre'].astype(str) + " " + df['director'].astype(str), version=generation)
+
+@st.cache_resource
+def recommender():
+    """One TF-IDF model per server process, rebuilt in the background when the catalog changes."""
+    model = SharedModel(build_recommender, name="bro.tfidf",
+                        is_current=lambda m: m.version == catalog.generation)
+    catalog.subscribe(model.mark_stale)
+    return model
+
+def get_recommendations_live(movie_id: int, topn: int = 5):
+    """Score against the shared in-process TF-IDF model (no per-request fit)."""
+    model = recommender().get()
+    if model is None:
         return pd.DataFrame()
-    df = df.copy()
-    df['combined'] = df['genre'].fillna('') + " " + df['director'].fillna('')
-    vec = TfidfVectorizer(stop_words='english')
-    tfidf = vec.fit_transform(df['combined'])
-    matches = df[df['title'].str.contains(base_title, case=False, na=False)]
-    if matches.empty:
+    df = model.df
+    # the movie the title lookup resolved, not whichever title happens to contain the text
+    matches = df.index[df['movie_id'] == movie_id]
+    if len(matches) == 0:
         return pd.DataFrame()
-    base_idx = matches.index[0]
-    cos_sim = linear_kernel(tfidf, tfidf)
-    sim_scores = list(enumerate(cos_sim[base_idx]))
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1: topn+1]
-    indices = [i[0] for i in sim_scores]
+    base_idx = matches[0]
+    indices, _ = most_similar(model.matrix, base_idx, top_n=int(topn))
     return df.iloc[indices][['movie_id','title','genre','imdb_rating']]
 
+def get_recommendations(base_title: str, topn: int = 5):
+    """Read precomputed neighbors (see neighbors.py) with a single index seek."""
+    if base_title is None or base_title.strip() == "":
+        return pd.DataFrame()
+    conn = get_connection()
+    try:
+        movie_id = find_movie_id_by_title(conn, base_title)
+        if movie_id is None:
+            return pd.DataFrame()
+        recs = fetch_neighbors(conn, movie_id, topn)
+    finally:
+        conn.close()
+    if recs.empty:
+        # neighbors not precomputed yet for this title (new movie / job not run) - score it live
+        return get_recommendations_live(movie_id, topn)
+    return recs[['movie_id','title','genre','imdb_rating']]
+
 # -----------------------------
 # Logout helper (safe across streamlit versions)
 # -----------------------------
@@ -180,6 +276,14 @@ def safe_logout_message_and_refresh():
 st.set_page_config(page_title="MovieApp (Admin + Users)", layout="wide")
 st.title("🎬 MovieDb — Admin & User Panel")
 
+try:
+    boot = bootstrap()
+    boot_error = None
+except Exception as e:
+    # if table missing or DB not reachable, log to console (UI will show DB errors later)
+    print("ensure_admin_exists error:", e)
+    boot, boot_error = None, e
+
 # initialize session state
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -239,8 +343,8 @@ elif menu == "User Login":
         elif user_menu == "Filter Movies":
             try:
                 df = fetch_movies_df()
-                genre = st.selectbox("Genre", ["All"] + sorted(df['genre'].dropna().unique().tolist()))
-                language = st.selectbox("Language", ["All"] + sorted(df['language'].dropna().unique().tolist()))
+                genre = st.selectbox("Genre", ["All"] + sorted(g for g in df['genre'].unique().tolist() if g))
+                language = st.selectbox("Language", ["All"] + sorted(l for l in df['language'].unique().tolist() if l))
                 rating = st.slider("Minimum rating", 1.0, 10.0, 5.0)
                 filtered = df[
                     ((df['genre'] == genre) | (genre == "All")) &
@@ -253,11 +357,10 @@ elif menu == "User Login":
 
         elif user_menu == "Recommendations":
             try:
-                df = fetch_movies_df()
                 base = st.text_input("Type movie title (partial or full) for recommendations")
                 topn = st.number_input("How many recommendations?", min_value=1, max_value=20, value=5)
                 if st.button("Get recommendations"):
-                    recs = get_recommendations(df, base, topn)
+                    recs = get_recommendations(base, topn)
                     if recs.empty:
                         st.warning("No recommendations found (check title).")
                     else:
@@ -334,12 +437,14 @@ elif menu == "Admin Login":
                 if df.empty:
                     st.info("No movies available to update.")
                 else:
-                    sel = st.selectbox("Select movie", df.apply(lambda r: f"{r['movie_id']} - {r['title']}", axis=1).tolist())
-                    movie_id = int(sel.split(" - ")[0])
-                    row = df[df['movie_id'] == movie_id].iloc[0]
+                    movie_id = title_picker(title_index(), "Select movie", key="admin_update")
+                    rows = df[df['movie_id'] == movie_id]
+                    if rows.empty:
+                        st.stop()
+                    row = rows.iloc[0]
                     new_title = st.text_input("Title", value=row['title'])
                     new_genre = st.text_input("Genre", value=row['genre'] or "")
-                    new_rating = st.number_input("IMDb rating", value=float(row['imdb_rating'] or 0.0), step=0.1)
+                    new_rating = st.number_input("IMDb rating", value=0.0 if pd.isna(row['imdb_rating']) else round(float(row['imdb_rating']), 1), step=0.1)
                     if st.button("Update"):
                         try:
                             update_movie_sql(movie_id, title=new_title.strip(), genre=new_genre.strip(), rating=float(new_rating))
@@ -356,9 +461,8 @@ elif menu == "Admin Login":
                 if df.empty:
                     st.info("No movies to delete.")
                 else:
-                    sel = st.selectbox("Select movie to delete", df.apply(lambda r: f"{r['movie_id']} - {r['title']}", axis=1).tolist())
-                    movie_id = int(sel.split(" - ")[0])
-                    if st.button("Delete Movie"):
+                    movie_id = title_picker(title_index(), "Select movie to delete", key="admin_delete")
+                    if movie_id is not None and st.button("Delete Movie"):
                         try:
                             delete_movie_sql(movie_id)
                             st.success("Movie deleted.")
@@ -383,8 +487,8 @@ elif menu == "Admin Login":
         elif admin_menu == "Filter Movies":
             try:
                 df = fetch_movies_df()
-                genre = st.selectbox("Genre", ["All"] + sorted(df['genre'].dropna().unique().tolist()))
-                language = st.selectbox("Language", ["All"] + sorted(df['language'].dropna().unique().tolist()))
+                genre = st.selectbox("Genre", ["All"] + sorted(g for g in df['genre'].unique().tolist() if g))
+                language = st.selectbox("Language", ["All"] + sorted(l for l in df['language'].unique().tolist() if l))
                 rating = st.slider("Minimum rating", 1.0, 10.0, 5.0)
                 filtered = df[
                     ((df['genre'] == genre) | (genre == "All")) &
@@ -397,11 +501,10 @@ elif menu == "Admin Login":
 
         elif admin_menu == "Recommendations":
             try:
-                df = fetch_movies_df()
                 base = st.text_input("Type movie title for recommendations")
                 topn = st.number_input("Top N", min_value=1, max_value=20, value=5)
                 if st.button("Get"):
-                    recs = get_recommendations(df, base, topn)
+                    recs = get_recommendations(base, topn)
                     if recs.empty:
                         st.warning("No recommendations found.")
                     else:
@@ -418,3 +521,7 @@ elif menu == "Admin Login":
 st.sidebar.markdown("---")
 st.sidebar.write("Database:", f"`{DATABASE}`")
 st.sidebar.write("Server:", SERVER)
+if boot:
+    st.sidebar.write("Bootstrap:", f"✅ admin ready since {boot['started_at']:%Y-%m-%d %H:%M:%S}")
+else:
+    st.sidebar.write("Bootstrap:", f"⚠️ failed, retrying on next action ({boot_error})")
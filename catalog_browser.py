@@ -0,0 +1,147 @@
+"""
+Keyset-paginated catalog browser.
+
+Pages are fetched with `WHERE (sort, key) > (last sort, last key)` instead of
+loading the whole table, so every page costs one index range read no matter
+how deep the user pages or how large the catalog is. The total shown is the
+row count from sys.partitions (approximate, but free).
+
+DATETIME values are stored in 1/300 s ticks that a Python datetime cannot
+hold, and pyodbc sends a datetime parameter as DATETIME2, so a cursor taken
+from a DATETIME column would not compare equal to its own row. Such cursors
+remember the column type and the predicate casts the parameter back to it.
+"""
+
+import datetime as dt
+import re
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+Cursor = Tuple[object, object, Optional[str]]  # (sort value, key, SQL type to cast the value to) of a page's last row
+
+# column types whose values do not survive the round trip through a Python datetime parameter
+_ROUNDED_TYPES = {"datetime": "DATETIME", "smalldatetime": "SMALLDATETIME"}
+
+
+def _check_ident(name: str) -> str:
+    if not _IDENT_RE.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+def keyset_predicate(sort_column: str, key_column: str, descending: bool, after: Cursor) -> Tuple[str, list]:
+    """WHERE clause selecting rows strictly after `after` in (sort, key) order.
+
+    SQL Server sorts NULL first ascending / last descending, and NULL never
+    compares equal, so NULL sort values get their own branches.
+    """
+    value, key, value_type = (tuple(after) + (None,))[:3]
+    placeholder = f"CAST(? AS {value_type})" if value_type else "?"
+    op = "<" if descending else ">"
+    if sort_column == key_column:
+        return f"{key_column} {op} ?", [key]
+    if value is None:
+        if descending:
+            return f"({sort_column} IS NULL AND {key_column} < ?)", [key]
+        return f"(({sort_column} IS NULL AND {key_column} > ?) OR {sort_column} IS NOT NULL)", [key]
+    sql = f"({sort_column} {op} {placeholder} OR ({sort_column} = {placeholder} AND {key_column} {op} ?)"
+    sql += f" OR {sort_column} IS NULL)" if descending else ")"
+    return sql, [value, value, key]
+
+
+def column_cast(conn, table: str, column: str) -> Optional[str]:
+    """SQL type a cursor value of `column` must be cast back to (None when the parameter compares exactly)."""
+    row = conn.cursor().execute(
+        "SELECT TYPE_NAME(system_type_id) FROM sys.columns WHERE object_id = OBJECT_ID(?) AND name = ?",
+        (_check_ident(table), _check_ident(column)),
+    ).fetchone()
+    return _ROUNDED_TYPES.get(row[0]) if row else None
+
+
+def fetch_keyset_page(conn, table: str, key_column: str, columns: Sequence[str], sort_column: str = None,
+                      descending: bool = False, page_size: int = 50,
+                      after: Optional[Cursor] = None) -> Tuple[pd.DataFrame, Optional[Cursor]]:
+    """One page of rows plus the cursor for the next page (None on the last page)."""
+    table, key_column = _check_ident(table), _check_ident(key_column)
+    sort_column = _check_ident(sort_column or key_column)
+    select_cols = list(dict.fromkeys([_check_ident(c) for c in columns] + [sort_column, key_column]))
+    direction = "DESC" if descending else "ASC"
+    order_sql = f"{sort_column} {direction}" + (f", {key_column} {direction}" if sort_column != key_column else "")
+    where_sql, params = "", []
+    if after is not None:
+        predicate, params = keyset_predicate(sort_column, key_column, descending, after)
+        where_sql = f" WHERE {predicate}"
+    # one extra row tells us whether another page exists
+    sql = f"SELECT TOP (?) {', '.join(select_cols)} FROM {table}{where_sql} ORDER BY {order_sql}"
+    cur = conn.cursor()
+    rows = [tuple(r) for r in cur.execute(sql, [int(page_size) + 1] + params).fetchall()]
+    has_more = len(rows) > page_size
+    page = pd.DataFrame.from_records(rows[:page_size], columns=select_cols)
+    next_cursor = None
+    if has_more:
+        last = page.iloc[-1]
+        value = None if pd.isna(last[sort_column]) else last[sort_column]
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        # numpy scalars are not valid pyodbc parameters
+        value, key = (v.item() if hasattr(v, "item") else v for v in (value, last[key_column]))
+        value_type = column_cast(conn, table, sort_column) if isinstance(value, dt.datetime) else None
+        next_cursor = (value, key, value_type)
+    return page[list(columns)], next_cursor
+
+
+def approximate_row_count(conn, table: str) -> int:
+    """Row count from partition metadata: no table scan, may lag concurrent writes slightly."""
+    cur = conn.cursor()
+    row = cur.execute(
+        "SELECT SUM(rows) FROM sys.partitions WHERE object_id = OBJECT_ID(?) AND index_id IN (0, 1)",
+        (_check_ident(table),),
+    ).fetchone()
+    return int(row[0] or 0)
+
+
+def render_catalog_browser(get_connection: Callable, table: str, key_column: str, columns: List[str],
+                           sort_columns: List[str] = None, default_descending: bool = False,
+                           state_key: str = "catalog_browser"):
+    """Streamlit widget: sort / direction / page size controls, Previous / Next buttons and one page of rows.
+
+    Returns the page that was rendered.
+    """
+    sort_columns = sort_columns or [key_column]
+    col1, col2, col3 = st.columns(3)
+    sort_column = col1.selectbox("Sort by", sort_columns, key=f"{state_key}_sort")
+    descending = col2.selectbox("Order", ["Descending", "Ascending"], index=0 if default_descending else 1,
+                                key=f"{state_key}_order") == "Descending"
+    page_size = col3.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{state_key}_size")
+
+    # cursors[i] is where page i starts; reset when the ordering or page size changes
+    signature = (sort_column, descending, page_size)
+    if st.session_state.get(f"{state_key}_signature") != signature:
+        st.session_state[f"{state_key}_signature"] = signature
+        st.session_state[f"{state_key}_cursors"] = [None]
+    cursors = st.session_state[f"{state_key}_cursors"]
+
+    nav1, nav2, _ = st.columns([1, 1, 6])
+    conn = get_connection()
+    try:
+        page, next_cursor = fetch_keyset_page(conn, table, key_column, columns, sort_column, descending,
+                                              page_size, after=cursors[-1])
+        total = approximate_row_count(conn, table)
+    finally:
+        conn.close()
+    # the buttons move the cursor stack in on_click, i.e. before the next run fetches, so a
+    # click costs one page query and Next reuses the cursor of the page on screen
+    nav1.button("◀ Previous", key=f"{state_key}_prev", disabled=len(cursors) <= 1, on_click=cursors.pop)
+    nav2.button("Next ▶", key=f"{state_key}_next", disabled=next_cursor is None,
+                on_click=cursors.append, args=(next_cursor,))
+
+    first = (len(cursors) - 1) * page_size
+    st.caption(f"Rows {first + 1 if len(page) else first}–{first + len(page)} of ~{total}")
+    st.dataframe(page, use_container_width=True)
+    return page
@@ -0,0 +1,79 @@
+"""
+In-process read-through cache for the movie catalog, shared by every
+Streamlit session of the server process.
+
+Entries expire after CATALOG_TTL seconds; every write invalidates the cache
+(the apps publish their own writes through the change feed, which also
+reports other processes' edits), so the TTL is only a backstop.
+Objects derived from the catalog (e.g. a shared recommendation model) can
+subscribe() to be told about every invalidation.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+CATALOG_TTL = 300.0  # seconds
+
+
+class CatalogCache:
+    def __init__(self, ttl: float = CATALOG_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._listeners: List[Callable[[], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry
+        return None
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Cached value for `key`, calling `loader()` on a miss (one loader per key at a time)."""
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                # another session may have loaded it while we waited
+                entry = self._fresh(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[0]
+                generation = self._generation
+                self.misses += 1
+            value = loader()
+            with self._lock:
+                # drop the result if a write invalidated the cache while we were loading
+                if generation == self._generation:
+                    self._entries[key] = (value, time.monotonic())
+            return value
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidate(): a cheap version token for objects derived from the catalog."""
+        return self._generation
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def subscribe(self, listener: Callable[[], None]):
+        """Call `listener()` after every invalidate() (it should only flag work, not do it)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+
+catalog = CatalogCache()
@@ -0,0 +1,143 @@
+"""
+Memory-compact in-process catalog.
+
+CatalogStore keeps the movies table as plain fixed-width arrays instead of an
+object-dtype DataFrame:
+
+  * genre / director / language (and any other low-cardinality text column)
+    are dictionary-encoded: one small array of distinct strings plus an int8 /
+    int16 / int32 code per row, so a genre repeated 10,000 times is stored once
+  * ids, years, durations and ratings are int32 / int16 / float32 arrays with a
+    separate validity mask where the column is nullable
+  * free text (titles) stays an object array
+
+frame() wraps those arrays in a DataFrame without copying them (categoricals
+over the codes, masked Int16 arrays over the integers), so pages keep using
+pandas for display while recommenders and filters read codes() / categories()
+directly. Missing text is stored as "".
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ("genre", "director", "language")
+
+# column -> compact dtype, applied to whichever of these columns a frame has
+# (the two schemas in this repo name them differently)
+COMPACT_TYPES = {
+    "movie_id": "int32", "id": "int32",
+    "release_year": "Int16", "year": "Int16",
+    "duration_minutes": "Int16", "duration": "Int16",
+    "imdb_rating": "float32", "rating": "float32",
+}
+
+
+def _code_dtype(n_categories: int):
+    # same widths pandas itself picks for categorical codes, so frame() does not re-cast them
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def encode(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """(codes, categories) for a text column; missing values become the "" category."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # already dictionary-encoded (e.g. columnar.fetch_frame): reuse the codes
+        codes = values.cat.codes.to_numpy()
+        categories = values.cat.categories.astype(str).to_numpy(dtype=object)
+        if (codes < 0).any():
+            if "" not in categories:
+                categories = np.append(categories, "")
+            codes = np.where(codes < 0, categories.tolist().index(""), codes)
+    else:
+        codes, categories = pd.factorize(values.astype(object).where(values.notna(), "").astype(str))
+        categories = np.asarray(categories, dtype=object)
+    return codes.astype(_code_dtype(len(categories))), categories
+
+
+class CatalogStore:
+    def __init__(self, columns: Dict[str, np.ndarray], masks: Dict[str, np.ndarray] = None,
+                 categories: Dict[str, np.ndarray] = None, order: Iterable[str] = None):
+        self._columns = columns          # name -> values (codes for categorical columns)
+        self._masks = masks or {}        # name -> True where the value is missing (nullable ints)
+        self._categories = categories or {}
+        self.order = list(columns if order is None else order)
+        self._frame: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, category_columns: Iterable[str] = CATEGORY_COLUMNS,
+                   compact_types: Dict[str, str] = None) -> "CatalogStore":
+        compact_types = COMPACT_TYPES if compact_types is None else compact_types
+        category_columns = set(category_columns)
+        df = df.reset_index(drop=True)
+        columns, masks, categories = {}, {}, {}
+        for name in df.columns:
+            series = df[name]
+            kind = compact_types.get(name)
+            if name in category_columns:
+                columns[name], categories[name] = encode(series)
+            elif kind == "Int16" or kind == "int32":
+                numbers = pd.to_numeric(series, errors="coerce")
+                missing = numbers.isna().to_numpy()
+                values = numbers.fillna(0).to_numpy().astype(np.int16 if kind == "Int16" else np.int32)
+                columns[name] = values
+                if missing.any() or kind == "Int16":
+                    masks[name] = missing
+            elif kind == "float32":
+                columns[name] = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float32)
+            else:
+                columns[name] = series.to_numpy()
+        return cls(columns, masks, categories, order=df.columns)
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def codes(self, name: str) -> np.ndarray:
+        """Per-row category codes of a dictionary-encoded column (index into categories(name))."""
+        return self._columns[name]
+
+    def categories(self, name: str) -> np.ndarray:
+        return self._categories[name]
+
+    def values(self, name: str) -> np.ndarray:
+        """Raw fixed-width array of a non-categorical column (0 where a nullable int is missing)."""
+        return self._columns[name]
+
+    def missing(self, name: str) -> np.ndarray:
+        mask = self._masks.get(name)
+        if mask is not None:
+            return mask
+        values = self._columns[name]
+        return np.isnan(values) if values.dtype.kind == "f" else np.zeros(len(values), dtype=bool)
+
+    def column(self, name: str):
+        """Zero-copy pandas array for one column."""
+        values = self._columns[name]
+        if name in self._categories:
+            dtype = pd.CategoricalDtype(self._categories[name])
+            return pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        if name in self._masks:
+            return pd.arrays.IntegerArray(values, self._masks[name], copy=False)
+        # explicit dtype, otherwise pandas re-infers object text as a (copied) string column
+        return pd.Series(values, dtype=values.dtype, copy=False)
+
+    def frame(self) -> pd.DataFrame:
+        """The whole catalog as a DataFrame of views over the store's arrays (built once)."""
+        if self._frame is None:
+            self._frame = pd.DataFrame({name: self.column(name) for name in self.order}, copy=False)
+        return self._frame
+
+    def memory_bytes(self) -> int:
+        total = sum(a.nbytes for a in self._columns.values()) + sum(m.nbytes for m in self._masks.values())
+        for name, values in self._columns.items():
+            if values.dtype == object:
+                total += sum(len(v) for v in values if isinstance(v, str))
+        for cats in self._categories.values():
+            total += cats.nbytes + sum(len(c) for c in cats)
+        return total
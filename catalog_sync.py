@@ -0,0 +1,227 @@
+"""
+Incremental catalog sync: make dbo.movies match an upstream CSV dump.
+
+Both sides are reduced to a small fingerprint per movie_id (8-byte blake2b of
+the normalized column values), the fingerprints are compared in memory, and
+only the difference is written: changed and new rows are staged into a temp
+table in batches and applied with one MERGE per batch, removed ids with one
+set-based DELETE per batch. A nightly refresh that changes ten rows writes
+ten rows, whatever the size of the catalog.
+
+The dump must carry movie_id (the headerless movies.csv export layout, or a
+header row that includes movie_id); upstream ids are kept, so new movies are
+inserted with IDENTITY_INSERT on. Everything is applied in one transaction.
+
+Running apps pick the new catalog up when their cache expires (CATALOG_TTL).
+
+How to run:
+  python catalog_sync.py movies.csv              # apply
+  python catalog_sync.py movies.csv --dry-run    # only report the delta
+  python catalog_sync.py movies.csv --keep-missing   # never delete
+"""
+
+import argparse
+import hashlib
+import time
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Tuple
+
+import pandas as pd
+import pyodbc
+
+from csv_import import CHUNK_SIZE, MAX_REJECT_SAMPLES, MOVIE_COLUMNS, movie_rows, read_chunks, \
+    rejected_sample, validate_chunk
+
+SERVER = "localhost"
+DATABASE = "MovieDb"
+DRIVER = "{ODBC Driver 17 for SQL Server}"
+
+MERGE_BATCH = 5000
+FETCH_BATCH = 10000
+
+MovieRow = Tuple  # (title, release_year, genre, director, imdb_rating, language, duration_minutes)
+
+STAGE_DDL = """
+CREATE TABLE #movies_sync (
+    movie_id INT NOT NULL PRIMARY KEY,
+    title VARCHAR(500) NOT NULL,
+    release_year INT NULL,
+    genre VARCHAR(255) NULL,
+    director VARCHAR(255) NULL,
+    imdb_rating DECIMAL(3,1) NULL,
+    language VARCHAR(100) NULL,
+    duration_minutes INT NULL
+);
+CREATE TABLE #movies_sync_delete (movie_id INT NOT NULL PRIMARY KEY);
+"""
+
+MERGE_SQL = f"""
+MERGE dbo.movies WITH (HOLDLOCK) AS t
+USING #movies_sync AS s ON t.movie_id = s.movie_id
+WHEN MATCHED THEN UPDATE SET {", ".join(f"t.{c} = s.{c}" for c in MOVIE_COLUMNS)}
+WHEN NOT MATCHED BY TARGET THEN
+    INSERT (movie_id, {", ".join(MOVIE_COLUMNS)})
+    VALUES (s.movie_id, {", ".join(f"s.{c}" for c in MOVIE_COLUMNS)});
+"""
+
+DELETE_SQL = "DELETE t FROM dbo.movies AS t JOIN #movies_sync_delete AS d ON d.movie_id = t.movie_id"
+
+
+class SyncPlan(NamedTuple):
+    upserts: Dict[int, MovieRow]   # new or changed rows, by movie_id
+    inserted: int                  # how many of the upserts are new ids
+    updated: int
+    deletes: List[int]
+    unchanged: int
+    rows_read: int
+    rejected: int
+    rejected_samples: List[Dict]
+
+    def summary(self) -> str:
+        return (f"{self.rows_read} rows read, {self.rejected} rejected; {self.inserted} to insert, "
+                f"{self.updated} to update, {len(self.deletes)} to delete, {self.unchanged} unchanged")
+
+
+def fingerprint(row: MovieRow) -> bytes:
+    return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=8).digest()
+
+
+def _normalize_row(row) -> MovieRow:
+    """DB or file values -> one canonical form for fingerprints.
+
+    DECIMAL ratings become the one-decimal floats movie_rows() produces, and blank text is None on
+    both sides (the file importer stores an empty cell as NULL, older rows may hold '').
+    """
+    title, year, genre, director, rating, language, duration = row
+    if isinstance(rating, Decimal):
+        rating = round(float(rating), 1)
+    title, genre, director, language = (None if isinstance(v, str) and not v.strip() else v
+                                        for v in (title, genre, director, language))
+    return (title, year, genre, director, rating, language, duration)
+
+
+def fetch_fingerprints(cnxn) -> Dict[int, bytes]:
+    """movie_id -> fingerprint for the current table, streamed with fetchmany."""
+    cur = cnxn.cursor()
+    cur.execute(f"SELECT movie_id, {', '.join(MOVIE_COLUMNS)} FROM dbo.movies")
+    current = {}
+    while True:
+        rows = cur.fetchmany(FETCH_BATCH)
+        if not rows:
+            return current
+        for r in rows:
+            current[r[0]] = fingerprint(_normalize_row(tuple(r)[1:]))
+
+
+def plan_sync(source, current: Dict[int, bytes], keep_missing: bool = False,
+              chunk_size: int = CHUNK_SIZE) -> SyncPlan:
+    """Compare the file with `current` fingerprints; only differing rows are kept in memory."""
+    upserts: Dict[int, MovieRow] = {}
+    seen = set()
+    inserted = unchanged = rows_read = rejected = 0
+    samples: List[Dict] = []
+
+    def reject(chunk, line, reason):
+        nonlocal rejected
+        rejected += 1
+        if len(samples) < MAX_REJECT_SAMPLES:
+            samples.append(rejected_sample(chunk, line, reason))
+
+    for chunk in read_chunks(source, chunk_size):
+        if "movie_id" not in chunk:
+            raise ValueError("Sync needs a movie_id column to match rows against dbo.movies.")
+        rows_read += len(chunk)
+        clean, reasons = validate_chunk(chunk)
+        for line, reason in reasons.items():
+            reject(chunk, line, reason)
+        ids = pd.to_numeric(chunk.loc[clean.index, "movie_id"].str.strip(), errors="coerce")
+        for line, movie_id, row in zip(clean.index, ids, movie_rows(clean)):
+            if pd.isna(movie_id) or movie_id != int(movie_id) or movie_id < 1:
+                reject(chunk, line, "movie_id is not a positive whole number")
+                continue
+            movie_id = int(movie_id)
+            if movie_id in seen:
+                reject(chunk, line, "duplicate movie_id")
+                continue
+            seen.add(movie_id)
+            old = current.get(movie_id)
+            if old is None:
+                inserted += 1
+                upserts[movie_id] = row
+            elif old != fingerprint(_normalize_row(row)):
+                upserts[movie_id] = row
+            else:
+                unchanged += 1
+
+    deletes = [] if keep_missing else sorted(set(current) - seen)
+    return SyncPlan(upserts, inserted, len(upserts) - inserted, deletes, unchanged,
+                    rows_read, rejected, samples)
+
+
+def apply_sync(cnxn, plan: SyncPlan, batch_size: int = MERGE_BATCH):
+    """Apply the plan in one transaction: staged MERGE batches, then staged DELETE batches."""
+    cur = cnxn.cursor()
+    cur.fast_executemany = True
+    try:
+        cur.execute(STAGE_DDL)
+        upserts = [(movie_id,) + row for movie_id, row in plan.upserts.items()]
+        if plan.inserted:
+            cur.execute("SET IDENTITY_INSERT dbo.movies ON")
+        for start in range(0, len(upserts), batch_size):
+            cur.execute("TRUNCATE TABLE #movies_sync")
+            cur.executemany(
+                f"INSERT INTO #movies_sync (movie_id, {', '.join(MOVIE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                upserts[start:start + batch_size],
+            )
+            cur.execute(MERGE_SQL)
+        if plan.inserted:
+            cur.execute("SET IDENTITY_INSERT dbo.movies OFF")
+        for start in range(0, len(plan.deletes), batch_size):
+            cur.execute("TRUNCATE TABLE #movies_sync_delete")
+            cur.executemany("INSERT INTO #movies_sync_delete (movie_id) VALUES (?)",
+                            [(movie_id,) for movie_id in plan.deletes[start:start + batch_size]])
+            cur.execute(DELETE_SQL)
+        cnxn.commit()
+    except Exception:
+        cnxn.rollback()
+        raise
+    finally:
+        cur.execute("DROP TABLE IF EXISTS #movies_sync; DROP TABLE IF EXISTS #movies_sync_delete;")
+
+
+def sync_catalog(cnxn, source, keep_missing: bool = False, dry_run: bool = False) -> SyncPlan:
+    started = time.time()
+    current = fetch_fingerprints(cnxn)
+    plan = plan_sync(source, current, keep_missing=keep_missing)
+    print(f"Planned in {time.time() - started:.1f}s: {plan.summary()}")
+    if not dry_run and (plan.upserts or plan.deletes):
+        started = time.time()
+        apply_sync(cnxn, plan)
+        print(f"Applied in {time.time() - started:.1f}s")
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync dbo.movies with an upstream CSV dump (delta only).")
+    parser.add_argument("csv", help="path to the upstream CSV dump")
+    parser.add_argument("--dry-run", action="store_true", help="report the delta without writing")
+    parser.add_argument("--keep-missing", action="store_true", help="do not delete movies missing from the dump")
+    parser.add_argument("--server", default=SERVER)
+    parser.add_argument("--database", default=DATABASE)
+    parser.add_argument("--driver", default=DRIVER)
+    args = parser.parse_args()
+
+    cnxn = pyodbc.connect(
+        f"DRIVER={args.driver};SERVER={args.server};DATABASE={args.database};Trusted_Connection=yes;",
+        autocommit=False,
+    )
+    try:
+        plan = sync_catalog(cnxn, args.csv, keep_missing=args.keep_missing, dry_run=args.dry_run)
+        for sample in plan.rejected_samples[:20]:
+            print(f"  line {sample['line']}: {sample['reason']}: {sample['row']}")
+    finally:
+        cnxn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+In-process consumer of dbo.movies_changes (see migrations.change_log).
+
+A daemon thread polls the log every `poll_interval` seconds and publishes the
+movie ids that changed since the previous poll to every subscriber, so caches
+and models are refreshed when - and only as far as - the catalog actually
+changed, instead of on a timer.
+
+The read position is a rowversion. Each poll reads the rows in
+[position, MIN_ACTIVE_ROWVERSION()) and moves the position to that upper
+bound: rows written by transactions that are still open have a version at or
+above MIN_ACTIVE_ROWVERSION(), so they are picked up by a later poll instead
+of being skipped the way an identity-based "id > last id" cursor would.
+A new consumer starts at the current end of the log (history is not replayed).
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List
+
+Changes = Dict[int, str]  # movie_id -> last operation in the batch ("I", "U" or "D")
+
+FETCH_BATCH = 5000
+RETENTION_DAYS = 7
+PRUNE_EVERY = 3600.0  # seconds
+
+
+class ChangeFeed:
+    def __init__(self, connect: Callable, poll_interval: float = 5.0, table: str = "dbo.movies_changes"):
+        self._connect = connect
+        self.poll_interval = poll_interval
+        self.table = table
+        self._position = None  # BINARY(8) rowversion, exclusive upper bound of what was published
+        self._listeners: List[Callable[[Changes], None]] = []
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._stats = {"polls": 0, "published": 0, "errors": 0, "last_error": None}
+        self._thread = threading.Thread(target=self._run, name="movies-change-feed", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, listener: Callable[[Changes], None]):
+        """`listener(changes)` is called from the feed thread; it should only flag or patch, not block."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def poll(self) -> Changes:
+        """One round: read the committed changes since the last poll and publish them."""
+        with self._poll_lock:
+            return self._poll()
+
+    def catch_up(self) -> bool:
+        """Publish committed changes now instead of on the next background poll.
+
+        Called right after a local write, so listeners hear of it at once and the feed thread does
+        not report the same rows again a few seconds later. False when nothing was published (log
+        missing, or the write is not below MIN_ACTIVE_ROWVERSION yet): the caller must invalidate itself.
+        """
+        try:
+            return bool(self.poll())
+        except Exception as e:
+            self._stats["errors"] += 1
+            self._stats["last_error"] = str(e)
+            return False
+
+    def _poll(self) -> Changes:
+        cnxn = self._connect()
+        try:
+            cursor = cnxn.cursor()
+            upper = cursor.execute("SELECT MIN_ACTIVE_ROWVERSION()").fetchone()[0]
+            if self._position is None:
+                self._position = upper
+                return {}
+            cursor.execute(
+                f"SELECT movie_id, operation FROM {self.table} "
+                "WHERE row_version >= ? AND row_version < ? ORDER BY row_version",
+                (self._position, upper),
+            )
+            changes: Changes = {}
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH)
+                if not rows:
+                    break
+                for movie_id, operation in rows:
+                    changes[movie_id] = operation
+            if time.monotonic() - self._last_prune > PRUNE_EVERY:
+                self._prune(cnxn)
+        finally:
+            cnxn.close()
+        self._position = upper
+        self._stats["polls"] += 1
+        if changes:
+            self._stats["published"] += len(changes)
+            with self._lock:
+                listeners = list(self._listeners)
+            for listener in listeners:
+                try:
+                    listener(changes)
+                except Exception as e:
+                    print(f"change feed: listener failed: {e}")
+        return changes
+
+    def _prune(self, cnxn):
+        """Drop log rows older than RETENTION_DAYS (every consumer is far past them).
+
+        The newest row always stays: its row_version is the catalog version readers compare.
+        """
+        self._last_prune = time.monotonic()
+        cursor = cnxn.cursor()
+        cursor.execute(f"DELETE FROM {self.table} WHERE changed_at < DATEADD(DAY, ?, SYSUTCDATETIME()) "
+                       f"AND change_id < (SELECT MAX(change_id) FROM {self.table})",
+                       (-RETENTION_DAYS,))
+        if not cnxn.autocommit:
+            cnxn.commit()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                # e.g. migration 3 not applied yet: keep polling, publish nothing
+                self._stats["errors"] += 1
+                self._stats["last_error"] = str(e)
+            time.sleep(self.poll_interval)
+
+    def stats(self) -> Dict:
+        return dict(self._stats, position=self._position.hex() if self._position else None)
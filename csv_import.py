@@ -0,0 +1,164 @@
+"""
+Streaming CSV import into dbo.movies.
+
+The file is read with pandas in fixed-size chunks, so memory stays bounded
+by one chunk however large the file is. Each chunk is validated and coerced
+column-wise, the good rows are inserted with fast_executemany in their own
+transaction, and the bad ones are reported with their line number and reason.
+
+Accepted layouts:
+  * a header row naming (a superset of) the movie columns, in any order
+  * no header, 7 columns:  title, release_year, genre, director, imdb_rating, language, duration_minutes
+  * no header, 9 columns:  movie_id, <the 7 above>, created_at   (the movies.csv export format;
+                           movie_id and created_at are ignored, the database assigns them)
+"""
+
+import io
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+MOVIE_COLUMNS = ["title", "release_year", "genre", "director", "imdb_rating", "language", "duration_minutes"]
+EXPORT_COLUMNS = ["movie_id"] + MOVIE_COLUMNS + ["created_at"]
+MAX_LENGTHS = {"title": 500, "genre": 255, "director": 255, "language": 100}
+CHUNK_SIZE = 5000
+MAX_REJECT_SAMPLES = 1000
+
+INSERT_SQL = """
+    INSERT INTO dbo.movies (title, release_year, genre, director, imdb_rating, language, duration_minutes)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class ImportReport(NamedTuple):
+    rows_read: int
+    inserted: int
+    rejected: int
+    rejected_samples: List[Dict]   # first MAX_REJECT_SAMPLES: {"line", "reason", "row"}
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+
+def _sniff_layout(first_line: str):
+    """Return (header row index or None, column names) for the file."""
+    cells = [c.strip().lower() for c in first_line.lstrip("﻿").rstrip("\r\n").split(",")]
+    if "title" in cells:
+        return 0, None
+    if len(cells) == len(EXPORT_COLUMNS):
+        return None, EXPORT_COLUMNS
+    if len(cells) == len(MOVIE_COLUMNS):
+        return None, MOVIE_COLUMNS
+    raise ValueError(f"Unrecognised CSV layout ({len(cells)} columns and no header row).")
+
+
+def validate_chunk(chunk: pd.DataFrame):
+    """Coerce one chunk column-wise; returns (clean frame, reasons Series for rejected rows)."""
+    out = pd.DataFrame(index=chunk.index)
+    reasons = pd.Series("", index=chunk.index)
+
+    def reject(mask, reason):
+        reasons[mask & (reasons == "")] = reason
+
+    for col in ("title", "genre", "director", "language"):
+        values = chunk[col].fillna("").astype(str).str.strip() if col in chunk else pd.Series("", index=chunk.index)
+        reject(values.str.len() > MAX_LENGTHS[col], f"{col} longer than {MAX_LENGTHS[col]} characters")
+        out[col] = values.where(values != "", None)
+    reject(out["title"].isna(), "title is required")
+
+    for col, low, high, integer in (("release_year", 1800, 2100, True), ("imdb_rating", 0.0, 10.0, False),
+                                    ("duration_minutes", 1, 1000, True)):
+        raw = chunk[col].fillna("").astype(str).str.strip() if col in chunk else pd.Series("", index=chunk.index)
+        numbers = pd.to_numeric(raw, errors="coerce")
+        reject((raw != "") & numbers.isna(), f"{col} is not a number")
+        reject(numbers.notna() & ((numbers < low) | (numbers > high)), f"{col} outside {low}..{high}")
+        if integer:
+            reject(numbers.notna() & (numbers != np.floor(numbers)), f"{col} is not a whole number")
+        out[col] = numbers
+
+    return out[reasons == ""], reasons[reasons != ""]
+
+
+def movie_rows(clean: pd.DataFrame) -> List[tuple]:
+    """Plain Python tuples in MOVIE_COLUMNS order for pyodbc (NaN -> None, whole numbers -> int)."""
+    rows = []
+    for title, year, genre, director, rating, language, duration in clean[MOVIE_COLUMNS].itertuples(index=False):
+        rows.append((
+            title,
+            None if pd.isna(year) else int(year),
+            None if pd.isna(genre) else genre,
+            None if pd.isna(director) else director,
+            None if pd.isna(rating) else round(float(rating), 1),
+            None if pd.isna(language) else language,
+            None if pd.isna(duration) else int(duration),
+        ))
+    return rows
+
+
+def read_chunks(source, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the file as raw string chunks with lower-case column names, indexed by file line number.
+
+    `source` is a path or a binary / text file object; file objects are left open.
+    """
+    if isinstance(source, str):
+        stream = open(source, "r", encoding="utf-8-sig", newline="")
+    else:
+        stream = source if isinstance(source, io.TextIOBase) else io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        header, names = _sniff_layout(stream.readline())
+        stream.seek(0)
+        reader = pd.read_csv(stream, header=header, names=names, dtype=str, keep_default_na=False,
+                             chunksize=chunk_size, skipinitialspace=True)
+        first_line = 2 if header == 0 else 1
+        for chunk in reader:
+            chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+            chunk.index = chunk.index + first_line
+            yield chunk
+    finally:
+        if isinstance(source, str):
+            stream.close()
+        elif stream is not source:
+            stream.detach()  # leave the caller's file object open
+
+
+def rejected_sample(chunk: pd.DataFrame, line: int, reason: str) -> Dict:
+    return {"line": int(line), "reason": reason, "row": ",".join(chunk.loc[line].astype(str))}
+
+
+def import_movies_csv(source, connect: Callable, chunk_size: int = CHUNK_SIZE,
+                      progress: Optional[Callable[[int, int, int, float], None]] = None) -> ImportReport:
+    """Stream `source` (path or binary/text file object) into dbo.movies.
+
+    `connect()` must return a connection (autocommit off); `progress(rows_read,
+    inserted, rejected, elapsed_seconds)` is called after every chunk.
+    """
+    started = time.time()
+    rows_read = inserted = rejected = 0
+    samples: List[Dict] = []
+    for chunk in read_chunks(source, chunk_size):
+        clean, reasons = validate_chunk(chunk)
+        for line, reason in reasons.items():
+            if len(samples) < MAX_REJECT_SAMPLES:
+                samples.append(rejected_sample(chunk, line, reason))
+        if len(clean):
+            cnxn = connect()
+            try:
+                cursor = cnxn.cursor()
+                cursor.fast_executemany = True
+                cursor.executemany(INSERT_SQL, movie_rows(clean))
+                cnxn.commit()
+            except Exception:
+                cnxn.rollback()
+                raise
+            finally:
+                cnxn.close()
+        rows_read += len(chunk)
+        inserted += len(clean)
+        rejected += len(reasons)
+        if progress:
+            progress(rows_read, inserted, rejected, time.time() - started)
+    return ImportReport(rows_read, inserted, rejected, samples, time.time() - started)
@@ -0,0 +1,180 @@
+"""
+Process-wide pyodbc connection pool shared by all Streamlit sessions.
+
+Streamlit re-executes the app script on every interaction, but imported
+modules stay loaded, so pools kept here live for the whole server process.
+
+    cnxn = get_pool(CNXN_STR).acquire()   # pooled connection, same API as pyodbc's
+    ...
+    cnxn.close()                          # returns it to the pool instead of disconnecting
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Tuple
+
+import pyodbc
+
+POOL_SIZE = 10             # max open connections per connection string
+CHECKOUT_TIMEOUT = 10.0    # seconds to wait for a free connection before giving up
+PING_AFTER_IDLE = 30.0     # connections idle longer than this are checked with SELECT 1 on checkout
+
+
+class PoolTimeoutError(RuntimeError):
+    """No connection became free within the checkout timeout."""
+
+
+class PooledConnection:
+    """Thin proxy around a pyodbc connection; close() hands it back to the pool."""
+
+    def __init__(self, pool: "ConnectionPool", cnxn: pyodbc.Connection):
+        self._pool = pool
+        self._cnxn = cnxn
+
+    def __getattr__(self, name):
+        if self._cnxn is None:
+            raise pyodbc.ProgrammingError("Attempt to use a closed connection.")
+        return getattr(self._cnxn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cnxn, name, value)
+
+    def close(self):
+        if self._cnxn is not None:
+            cnxn, self._cnxn = self._cnxn, None
+            self._pool.release(cnxn)
+
+    def __del__(self):
+        # helpers that raise before close() would otherwise leak their pool slot
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, conn_str: str, autocommit: bool = False, max_size: int = POOL_SIZE,
+                 timeout: float = CHECKOUT_TIMEOUT, ping_after_idle: float = PING_AFTER_IDLE):
+        self.conn_str = conn_str
+        self.autocommit = autocommit
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after_idle = ping_after_idle
+        self._idle = deque()   # (connection, returned_at)
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "checkouts": 0, "waits": 0, "timeouts": 0,
+                       "discarded": 0, "wait_seconds": 0.0}
+
+    def _connect(self) -> pyodbc.Connection:
+        return pyodbc.connect(self.conn_str, autocommit=self.autocommit)
+
+    def _healthy(self, cnxn: pyodbc.Connection) -> bool:
+        try:
+            cnxn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _discard(self, cnxn: pyodbc.Connection):
+        try:
+            cnxn.close()
+        except pyodbc.Error:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def acquire(self, timeout: float = None) -> PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        while True:
+            with self._cond:
+                waited = False
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(f"No database connection free after {timeout:.1f}s "
+                                               f"(pool size {self.max_size})")
+                    waited = True
+                    self._cond.wait(remaining)
+                if waited:
+                    self._stats["waits"] += 1
+                    self._stats["wait_seconds"] += time.monotonic() - started
+                if self._idle:
+                    cnxn, returned_at = self._idle.pop()
+                else:
+                    cnxn, returned_at = None, None
+                    self._open += 1  # reserve the slot before connecting outside the lock
+
+            if cnxn is None:
+                try:
+                    cnxn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif time.monotonic() - returned_at > self.ping_after_idle and not self._healthy(cnxn):
+                self._discard(cnxn)
+                continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+            return PooledConnection(self, cnxn)
+
+    def release(self, cnxn: pyodbc.Connection):
+        """Return a connection; it is rolled back and dropped if that fails."""
+        try:
+            if not self.autocommit:
+                cnxn.rollback()  # never hand out a connection with someone else's open transaction
+        except pyodbc.Error:
+            self._discard(cnxn)
+            return
+        with self._cond:
+            self._idle.append((cnxn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for cnxn, _ in idle:
+            try:
+                cnxn.close()
+            except pyodbc.Error:
+                pass
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return dict(self._stats, size=self.max_size, open=self._open, idle=len(self._idle),
+                        in_use=self._open - len(self._idle))
+
+
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_str: str, autocommit: bool = False, **kwargs) -> ConnectionPool:
+    """Process-wide pool for this connection string (created on first use)."""
+    key = (conn_str, autocommit)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(conn_str, autocommit=autocommit, **kwargs)
+        return pool
@@ -0,0 +1,240 @@
+"""
+Bitmap facet index for the "Filter Movies" pages.
+
+Every facet value owns one bitmap with a bit per catalog row (np.packbits,
+so a million rows take 125 KB per value):
+
+  * genre: one bitmap per genre token ("Comedy, Drama" sets the Comedy and
+    the Drama bitmaps), built from the distinct genre strings and expanded
+    to rows through the CatalogStore's dictionary codes
+  * language: one bitmap per language
+  * rating: one bitmap per whole-point bucket [b, b + 1), plus the ratings
+    sorted once, so a minimum-rating cut is the OR of the buckets above it
+    and a binary search inside the boundary bucket
+
+A filter is an OR of the selected values within a facet and an AND across
+facets, i.e. a handful of vectorized byte operations, and a count is a
+popcount of the result: facet counts for every value under the current
+selection cost one AND + popcount each.
+
+set_rows() re-indexes single rows in place: a changed or deleted row has
+its bit cleared in the bitmaps it was in (and in the live-row bitmap
+`everything` when deleted), a new row takes the next slot, and the sorted
+ratings are patched with one searchsorted + insert per batch. A value
+whose bitmap empties is dropped, so values() only lists values some live
+row still has.
+"""
+
+import re
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from catalog_store import CatalogStore
+
+RATING_BUCKETS = 11  # [0, 1), [1, 2), ... [9, 10), and 10.0 itself
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_GENRE_SPLIT = re.compile(r"[,/]")
+
+
+def genre_tokens(value) -> List[str]:
+    return [g.strip() for g in _GENRE_SPLIT.split(str(value)) if g.strip()]
+
+
+def single_value(value) -> List[str]:
+    return [str(value).strip()] if str(value).strip() else []
+
+
+def _text(value) -> str:
+    return "" if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
+
+
+def _rating(value) -> np.float32:
+    return np.float32(np.nan if value is None or pd.isna(value) else float(value))
+
+
+def _bucket(ratings: np.ndarray) -> np.ndarray:
+    return np.clip(np.floor(np.nan_to_num(ratings, nan=-1)), -1, RATING_BUCKETS - 1).astype(np.int8)
+
+
+class FacetIndex:
+    def __init__(self, catalog, genre_column: str = "genre", language_column: str = "language",
+                 rating_column: str = "imdb_rating"):
+        """`catalog` is a CatalogStore or a movies DataFrame (encoded into one)."""
+        store = catalog if isinstance(catalog, CatalogStore) else CatalogStore.from_frame(catalog)
+        self.n = len(store)  # slots in use, deleted rows included (their bits are clear everywhere)
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self._names: Dict[str, Dict[str, str]] = {}  # facet -> case-folded value -> shown value
+        self._columns = {"genre": (genre_column, genre_tokens), "language": (language_column, single_value)}
+        self.rating_column = rating_column
+        for facet, (column, split) in self._columns.items():
+            self._add_facet(facet, store, column, split)
+
+        ratings = store.values(rating_column).astype(np.float32)
+        self.rating_order = np.argsort(ratings, kind="stable")
+        self.sorted_ratings = ratings[self.rating_order]  # NaN sorts last
+        self._rated = int(np.count_nonzero(~np.isnan(ratings)))
+        buckets = _bucket(ratings)
+        self.rating_buckets = [np.packbits(buckets == b) for b in range(RATING_BUCKETS)]
+        self.everything = np.packbits(np.ones(self.n, dtype=bool))
+        # per slot (as many as the bitmaps have bits), to find a row's entry in the sorted ratings again
+        self._ratings = np.full(len(self.everything) * 8, np.nan, dtype=np.float32)
+        self._ratings[:self.n] = ratings
+
+    def _add_facet(self, facet: str, store: CatalogStore, column: str, split):
+        """One bitmap per value `split` yields for the distinct strings, expanded to rows through the codes.
+
+        Values are matched case-insensitively; the first spelling seen is the one shown.
+        """
+        categories, codes = store.categories(column), store.codes(column)
+        by_value: Dict[str, List[int]] = {}
+        names = self._names[facet] = {}
+        for code, text in enumerate(categories):
+            for value in split(text):
+                key = value.casefold()
+                names.setdefault(key, value)
+                by_value.setdefault(key, []).append(code)
+        self.bitmaps[facet] = {}
+        for key, value_codes in by_value.items():
+            hit = np.zeros(len(categories), dtype=bool)
+            hit[value_codes] = True
+            self.bitmaps[facet][names[key]] = np.packbits(hit[codes])
+
+    # ---- changes ----
+    def _grow(self, n: int):
+        """Room for `n` slots in every bitmap (capacity doubles, like the other in-place indexes)."""
+        have = len(self.everything)
+        if n <= have * 8:
+            return
+        pad = max(have, (n + 7) // 8 - have)
+        grow = lambda bitmap: np.concatenate([bitmap, np.zeros(pad, dtype=np.uint8)])
+        for bitmaps in self.bitmaps.values():
+            for name in bitmaps:
+                bitmaps[name] = grow(bitmaps[name])
+        self.rating_buckets = [grow(bitmap) for bitmap in self.rating_buckets]
+        self.everything = grow(self.everything)
+        self._ratings = np.concatenate([self._ratings, np.full(pad * 8, np.nan, dtype=np.float32)])
+
+    def set_rows(self, rows: Mapping[int, Optional[Mapping[str, object]]]):
+        """Re-index rows in place: slot -> its new row (column -> value), or None when it was deleted.
+
+        A slot at or past `n` is a new row. Rows keep their slot, so callers can address them by it.
+        """
+        if not rows:
+            return
+        self._grow(max(rows) + 1)
+        self.n = max(self.n, max(rows) + 1)
+        cleared = set()
+        for slot, row in rows.items():
+            byte, bit = slot >> 3, np.uint8(0x80 >> (slot & 7))
+            for facet, bitmaps in self.bitmaps.items():
+                for name, bitmap in bitmaps.items():
+                    if bitmap[byte] & bit:
+                        bitmap[byte] &= ~bit
+                        cleared.add((facet, name))
+            for bitmap in self.rating_buckets:
+                bitmap[byte] &= ~bit
+            self.everything[byte] &= ~bit
+            self._ratings[slot] = np.nan
+            if row is None:
+                continue
+            for facet, (column, split) in self._columns.items():
+                names, bitmaps = self._names[facet], self.bitmaps[facet]
+                for value in split(_text(row.get(column))):
+                    name = names.setdefault(value.casefold(), value)
+                    if name not in bitmaps:
+                        bitmaps[name] = np.zeros_like(self.everything)
+                    bitmaps[name][byte] |= bit
+            self._ratings[slot] = _rating(row.get(self.rating_column))
+            bucket = _bucket(self._ratings[slot:slot + 1])[0]
+            if bucket >= 0:  # missing / negative ratings have no bucket
+                self.rating_buckets[bucket][byte] |= bit
+            self.everything[byte] |= bit
+        # a value no live row has any more is no longer an option
+        for facet, name in cleared:
+            if not self.bitmaps[facet][name].any():
+                del self.bitmaps[facet][name]
+                del self._names[facet][name.casefold()]
+
+        slots = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        keep = ~np.isin(self.rating_order, slots)
+        order, ratings = self.rating_order[keep], self.sorted_ratings[keep]
+        added = slots[[rows[slot] is not None for slot in slots.tolist()]]
+        added = added[np.argsort(self._ratings[added], kind="stable")]
+        at = np.searchsorted(ratings, self._ratings[added], side="right")
+        self.rating_order = np.insert(order, at, added)
+        self.sorted_ratings = np.insert(ratings, at, self._ratings[added])
+        self._rated = int(np.count_nonzero(~np.isnan(self.sorted_ratings)))
+
+    # ---- bitmaps ----
+    def values(self, facet: str) -> List[str]:
+        return sorted(self.bitmaps[facet], key=str.casefold)
+
+    def any_of(self, facet: str, values: Iterable[str]) -> Optional[np.ndarray]:
+        """OR of the selected values' bitmaps; None when nothing is selected (no restriction)."""
+        names = self._names[facet]
+        selected = [names.get(str(v).strip().casefold()) for v in values]
+        if not selected:
+            return None
+        result = np.zeros_like(self.everything)
+        for name in selected:
+            if name is not None:
+                result |= self.bitmaps[facet][name]
+        return result
+
+    def rating_at_least(self, min_rating: Optional[float]) -> Optional[np.ndarray]:
+        if min_rating is None:
+            return None
+        threshold = np.float32(min_rating)  # ratings are float32: compare in float32 too
+        bucket = min(int(np.floor(threshold)), RATING_BUCKETS - 1)
+        result = np.zeros_like(self.everything)
+        for bitmap in self.rating_buckets[max(bucket + 1, 0):]:
+            result |= bitmap
+        # boundary: the rows in [threshold, bucket + 1) come from the sorted ratings (the top bucket
+        # is open-ended and negative ratings have no bucket, so those ranges are searched the same way)
+        start = np.searchsorted(self.sorted_ratings, threshold, side="left")
+        if bucket == RATING_BUCKETS - 1:
+            stop = self._rated
+        else:
+            stop = np.searchsorted(self.sorted_ratings, np.float32(max(bucket + 1, 0)), side="left")
+        rows = self.rating_order[start:stop]
+        np.bitwise_or.at(result, rows >> 3, (0x80 >> (rows & 7)).astype(np.uint8))
+        return result
+
+    def all_of(self, facet: str, values: Iterable[str]) -> Optional[np.ndarray]:
+        """AND of the values' bitmaps (e.g. every token of "Action, Drama"); None when `values` is empty."""
+        result = None
+        for value in values:
+            bitmap = self.any_of(facet, [value])
+            result = bitmap if result is None else result & bitmap
+        return result
+
+    def match(self, genres: Iterable[str] = (), languages: Iterable[str] = (),
+              min_rating: Optional[float] = None) -> np.ndarray:
+        """Rows that have any of `genres`, any of `languages` and a rating >= min_rating, as a bitmap."""
+        return self.intersect(self.any_of("genre", genres), self.any_of("language", languages),
+                              self.rating_at_least(min_rating))
+
+    def intersect(self, *bitmaps: Optional[np.ndarray]) -> np.ndarray:
+        """AND of the given bitmaps, None meaning "no restriction"."""
+        result = self.everything.copy()
+        for bitmap in bitmaps:
+            if bitmap is not None:
+                result &= bitmap
+        return result
+
+    # ---- results ----
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+
+    @staticmethod
+    def count(bitmap: np.ndarray) -> int:
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    def counts(self, facet: str, within: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Rows per value of `facet`, among the rows set in `within` (all rows when None)."""
+        base = self.everything if within is None else within
+        return {value: self.count(base & bitmap) for value, bitmap in self.bitmaps[facet].items()}
+
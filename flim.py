@@ -2,8 +2,10 @@
 import streamlit as st
 import pandas as pd
 from werkzeug.security import generate_password_hash, check_password_hash
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from similarity import most_similar
+from shared_model import SharedModel, fit_tfidf
+from movie_filters import MovieFilterStore
+from title_index import TitleIndex, title_picker
 import os
 
 # -----------------------------
@@ -98,8 +100,16 @@ def load_movies():
     
     return df
 
-def save_movies(df):
+def save_movies(df, changed_movies=None):
+    """`changed_movies` ({movie_id: new row dict, or None if deleted}) patches the filter store in place."""
+    before = movies_mtime_ns() if os.path.exists(MOVIES_FILE) else None
     df.to_csv(MOVIES_FILE, index=False)
+    recommender().mark_stale()
+    if changed_movies is None:
+        return
+    store = movie_filter_store()
+    if store.version == before:
+        store.apply(changed_movies, version=movies_mtime_ns())
 
 def add_movie(title, year, genre, director, rating, language, duration):
     df = load_movies()
@@ -109,7 +119,7 @@ def add_movie(title, year, genre, director, rating, language, duration):
         max_id = df['movie_id'].max() if 'movie_id' in df.columns and not df['movie_id'].isna().all() else 0
         new_id = int(max_id) + 1
     
-    new_row = pd.DataFrame([{
+    row = {
         "movie_id": new_id,
         "title": str(title),
         "release_year": int(year),
@@ -118,10 +128,10 @@ def add_movie(title, year, genre, director, rating, language, duration):
         "imdb_rating": float(rating),
         "language": str(language),
         "duration_minutes": int(duration)
-    }])
+    }
     
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_movies(df)
+    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    save_movies(df, {new_id: row})
 
 def update_movie(movie_id, title=None, genre=None, rating=None, director=None, language=None, year=None, duration=None):
     df = load_movies()
@@ -147,7 +157,7 @@ def update_movie(movie_id, title=None, genre=None, rating=None, director=None, l
     if year is not None: df.at[idx, 'release_year'] = int(year)
     if duration is not None: df.at[idx, 'duration_minutes'] = int(duration)
     
-    save_movies(df)
+    save_movies(df, {int(movie_id): df.loc[idx].to_dict()})
 
 def delete_movie(movie_id):
     df = load_movies()
@@ -156,44 +166,49 @@ def delete_movie(movie_id):
     
     df['movie_id'] = pd.to_numeric(df['movie_id'], errors='coerce').astype(int)
     df = df[df['movie_id'] != int(movie_id)]
-    save_movies(df)
+    save_movies(df, {int(movie_id): None})
 
 # -----------------------------
 # Recommendation function
 # -----------------------------
-def get_recommendations(df, base_title, topn=5):
-    if df.empty or not base_title or pd.isna(base_title) or base_title.strip() == "":
+def movies_mtime_ns():
+    return os.stat(MOVIES_FILE).st_mtime_ns
+
+def build_recommender():
+    version = movies_mtime_ns()  # read first: a write during the load just triggers one more rebuild
+    df = load_movies()
+    text = df['genre'].fillna('').astype(str) + " " + df['director'].fillna('').astype(str)
+    return fit_tfidf(df, text, version=version)
+
+@st.cache_resource
+def recommender():
+    """One TF-IDF model per server process, rebuilt in the background when movies.csv changes."""
+    return SharedModel(build_recommender, name="flim.tfidf", is_current=lambda m: m.version == movies_mtime_ns())
+
+@st.cache_resource(max_entries=1)
+def title_index(movies_mtime_ns):
+    """Prefix index over the movies CSV's titles; rebuilt whenever the file changes."""
+    return TitleIndex(load_movies())
+
+def get_recommendations(movie_id, topn=5):
+    """Movies most similar to `movie_id` (the title picker's choice); empty when it is not in the model."""
+    if movie_id is None:
         return pd.DataFrame()
     
-    df = df.copy()
-    # Fill NaN values with empty strings
-    df['genre'] = df['genre'].fillna('')
-    df['director'] = df['director'].fillna('')
-    
-    # Create combined text for similarity
-    df['combined'] = df['genre'] + " " + df['director']
+    model = recommender().get()
+    if model is None or len(model.df) <= 1:
+        return pd.DataFrame()
+    df = model.df
     
     # Find the base movie
     try:
-        matches = df[df['title'].astype(str).str.contains(str(base_title), case=False, na=False)]
-        if matches.empty:
+        rows = df.index[df['movie_id'] == movie_id]
+        if len(rows) == 0:
             return pd.DataFrame()
+        base_idx = rows[0]
         
-        base_idx = matches.index[0]
-        
-        # Calculate similarity
-        if len(df) > 1:
-            vec = TfidfVectorizer(stop_words='english')
-            tfidf = vec.fit_transform(df['combined'])
-            cos_sim = linear_kernel(tfidf, tfidf)
-            
-            sim_scores = list(enumerate(cos_sim[base_idx]))
-            sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1:topn+1]
-            
-            indices = [i[0] for i in sim_scores]
-            return df.iloc[indices][['movie_id','title','genre','imdb_rating','director']].reset_index(drop=True)
-        else:
-            return pd.DataFrame()
+        indices, _ = most_similar(model.matrix, base_idx, top_n=int(topn))
+        return df.iloc[indices][['movie_id','title','genre','imdb_rating','director']].reset_index(drop=True)
     except Exception as e:
         print(f"Recommendation error: {e}")
         return pd.DataFrame()
@@ -201,22 +216,29 @@ def get_recommendations(df, base_title, topn=5):
 # -----------------------------
 # Filter function
 # -----------------------------
-def filter_movies(df, genre="All", language="All", min_rating=0.0):
-    filtered = df.copy()
-    
-    # Apply rating filter first
-    filtered['imdb_rating'] = pd.to_numeric(filtered['imdb_rating'], errors='coerce')
-    filtered = filtered[filtered['imdb_rating'] >= min_rating]
-    
-    # Apply genre filter
-    if genre != "All":
-        filtered = filtered[filtered['genre'].astype(str).str.contains(str(genre), case=False, na=False)]
-    
-    # Apply language filter
-    if language != "All":
-        filtered = filtered[filtered['language'].astype(str).str.contains(str(language), case=False, na=False)]
-    
-    return filtered.reset_index(drop=True)
+@st.cache_resource
+def movie_filter_store():
+    """One indexed in-memory copy of the movies CSV per server process; this app's writes patch it (see save_movies)."""
+    version = movies_mtime_ns()
+    return MovieFilterStore(load_movies(), version=version)
+
+def filter_store():
+    """The filter store, reloaded only when movies.csv was changed by something other than save_movies."""
+    store = movie_filter_store()
+    version = movies_mtime_ns()
+    if store.version != version:
+        store.rebuild(load_movies(), version=version)
+    return store
+
+def filter_movies(genre="All", language="All", min_rating=0.0, order_by=None, descending=False, limit=None, offset=0):
+    """Same API as movie_filters.MovieFilterStore.filter: returns (matching page, total matches)."""
+    return filter_store().filter(genre=genre, language=language, min_rating=min_rating,
+                                 order_by=order_by, descending=descending, limit=limit, offset=offset)
+
+def facet_counts(facet, genre="All", language="All", min_rating=0.0):
+    """Every genre / language value with its matching movies under the other widgets' values; the
+    widget options and their counts come from the same bitmaps."""
+    return filter_store().facet_counts(facet, genre=genre, language=language, min_rating=min_rating)
 
 # -----------------------------
 # Streamlit UI
@@ -338,22 +360,28 @@ elif menu == "User Login":
             st.subheader("Filter Movies")
             
             if not df.empty:
-                # Get unique values
-                genres = ["All"] + sorted([str(g) for g in df['genre'].dropna().unique() if str(g).strip() != ''])
-                languages = ["All"] + sorted([str(l) for l in df['language'].dropna().unique() if str(l).strip() != ''])
+                # Genre tokens / languages with their counts under the other widgets' values
+                genre_counts = facet_counts("genre", language=st.session_state.get("filter_language", "All"),
+                                            min_rating=st.session_state.get("filter_rating", 5.0))
+                language_counts = facet_counts("language", genre=st.session_state.get("filter_genre", "All"),
+                                               min_rating=st.session_state.get("filter_rating", 5.0))
+                genres = ["All"] + list(genre_counts)
+                languages = ["All"] + list(language_counts)
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    genre = st.selectbox("Genre", genres)
+                    genre = st.selectbox("Genre", genres, key="filter_genre",
+                                         format_func=lambda g: g if g == "All" else f"{g} ({genre_counts[g]})")
                 with col2:
-                    language = st.selectbox("Language", languages)
+                    language = st.selectbox("Language", languages, key="filter_language",
+                                            format_func=lambda l: l if l == "All" else f"{l} ({language_counts[l]})")
                 with col3:
-                    rating = st.slider("Minimum rating", 1.0, 10.0, 5.0, 0.1)
+                    rating = st.slider("Minimum rating", 1.0, 10.0, 5.0, 0.1, key="filter_rating")
                 
-                filtered = filter_movies(df, genre, language, rating)
+                filtered, total = filter_movies(genre, language, rating)
                 
                 if not filtered.empty:
-                    st.write(f"**Found {len(filtered)} movie(s):**")
+                    st.write(f"**Found {total} movie(s):**")
                     st.dataframe(filtered, use_container_width=True, hide_index=True)
                 else:
                     st.warning("No movies match your filters.")
@@ -364,16 +392,17 @@ elif menu == "User Login":
             st.subheader("Get Movie Recommendations")
             
             if not df.empty:
-                movie_titles = sorted([str(t) for t in df['title'].dropna().unique() if str(t).strip() != ''])
+                index = title_index(movies_mtime_ns())
                 
-                if movie_titles:
-                    selected_movie = st.selectbox("Select a movie", movie_titles)
+                if len(index):
+                    movie_id = title_picker(index, "Search for a movie", key="user_rec")
+                    selected_movie = index.title_of(movie_id)
                     topn = st.slider("Number of recommendations", 1, 10, 5)
                     
                     if st.button("Get Recommendations"):
-                        if selected_movie:
+                        if movie_id is not None:
                             with st.spinner("Finding similar movies..."):
-                                recs = get_recommendations(df, selected_movie, topn)
+                                recs = get_recommendations(movie_id, topn)
                                 
                             if not recs.empty:
                                 st.success(f"Movies similar to '{selected_movie}':")
@@ -472,16 +501,9 @@ elif menu == "Admin Login":
             st.subheader("Update Movie Information")
             
             if not df.empty:
-                movie_options = ["Select a movie"] + sorted(
-                    [f"{int(row['movie_id'])} - {row['title']}" 
-                     for _, row in df.iterrows() 
-                     if pd.notna(row['movie_id']) and pd.notna(row['title'])]
-                )
+                movie_id = title_picker(title_index(movies_mtime_ns()), "Choose movie to update", key="admin_update")
                 
-                selected = st.selectbox("Choose movie to update", movie_options)
-                
-                if selected != "Select a movie":
-                    movie_id = int(selected.split(" - ")[0])
+                if movie_id is not None:
                     movie_data = df[df['movie_id'] == movie_id].iloc[0]
                     
                     with st.form("update_movie_form"):
@@ -516,17 +538,11 @@ elif menu == "Admin Login":
             st.subheader("Delete Movie")
             
             if not df.empty:
-                movie_options = ["Select a movie"] + sorted(
-                    [f"{int(row['movie_id'])} - {row['title']}" 
-                     for _, row in df.iterrows() 
-                     if pd.notna(row['movie_id']) and pd.notna(row['title'])]
-                )
-                
-                selected = st.selectbox("Choose movie to delete", movie_options)
+                index = title_index(movies_mtime_ns())
+                movie_id = title_picker(index, "Choose movie to delete", key="admin_delete")
                 
-                if selected != "Select a movie":
-                    movie_id = int(selected.split(" - ")[0])
-                    movie_title = selected.split(" - ")[1]
+                if movie_id is not None:
+                    movie_title = index.title_of(movie_id)
                     
                     st.warning(f"⚠️ You are about to delete: **{movie_title}** (ID: {movie_id})")
                     st.warning("This action cannot be undone!")
@@ -545,21 +561,27 @@ elif menu == "Admin Login":
             st.subheader("Filter Movies")
             
             if not df.empty:
-                genres = ["All"] + sorted([str(g) for g in df['genre'].dropna().unique() if str(g).strip() != ''])
-                languages = ["All"] + sorted([str(l) for l in df['language'].dropna().unique() if str(l).strip() != ''])
+                genre_counts = facet_counts("genre", language=st.session_state.get("admin_filter_language", "All"),
+                                            min_rating=st.session_state.get("admin_filter_rating", 5.0))
+                language_counts = facet_counts("language", genre=st.session_state.get("admin_filter_genre", "All"),
+                                               min_rating=st.session_state.get("admin_filter_rating", 5.0))
+                genres = ["All"] + list(genre_counts)
+                languages = ["All"] + list(language_counts)
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    genre = st.selectbox("Genre", genres, key="admin_filter_genre")
+                    genre = st.selectbox("Genre", genres, key="admin_filter_genre",
+                                         format_func=lambda g: g if g == "All" else f"{g} ({genre_counts[g]})")
                 with col2:
-                    language = st.selectbox("Language", languages, key="admin_filter_language")
+                    language = st.selectbox("Language", languages, key="admin_filter_language",
+                                            format_func=lambda l: l if l == "All" else f"{l} ({language_counts[l]})")
                 with col3:
                     rating = st.slider("Minimum rating", 1.0, 10.0, 5.0, 0.1, key="admin_filter_rating")
                 
-                filtered = filter_movies(df, genre, language, rating)
+                filtered, total = filter_movies(genre, language, rating)
                 
                 if not filtered.empty:
-                    st.write(f"**Found {len(filtered)} movie(s):**")
+                    st.write(f"**Found {total} movie(s):**")
                     st.dataframe(filtered, use_container_width=True, hide_index=True)
                 else:
                     st.warning("No movies match your filters.")
@@ -570,16 +592,17 @@ elif menu == "Admin Login":
             st.subheader("Get Movie Recommendations")
             
             if not df.empty:
-                movie_titles = sorted([str(t) for t in df['title'].dropna().unique() if str(t).strip() != ''])
+                index = title_index(movies_mtime_ns())
                 
-                if movie_titles:
-                    selected_movie = st.selectbox("Select a movie", movie_titles, key="admin_rec_movie")
+                if len(index):
+                    movie_id = title_picker(index, "Search for a movie", key="admin_rec_movie")
+                    selected_movie = index.title_of(movie_id)
                     topn = st.slider("Number of recommendations", 1, 10, 5, key="admin_rec_topn")
                     
                     if st.button("Get Recommendations", key="admin_rec_button"):
-                        if selected_movie:
+                        if movie_id is not None:
                             with st.spinner("Finding similar movies..."):
-                                recs = get_recommendations(df, selected_movie, topn)
+                                recs = get_recommendations(movie_id, topn)
                                 
                             if not recs.empty:
                                 st.success(f"Movies similar to '{selected_movie}':")
@@ -0,0 +1,179 @@
+"""
+Write-behind queue for search history.
+
+submit() only puts the event on an in-memory queue; a background thread
+inserts queued events in batches (fast_executemany, one transaction per
+batch) once `batch_size` events are waiting or `flush_interval` seconds
+after the first one arrived. Remaining events are flushed at shutdown.
+
+When the queue is full the caller waits at most `put_timeout` seconds
+(counted as "delayed"); if it is still full the event is dropped (counted
+as "dropped") so a user click never blocks on the database.
+
+search_time keeps its SQL Server default, so a row is stamped when its
+batch is inserted (at most `flush_interval` seconds after the click, in the
+server's clock like every other timestamp in the database).
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+Event = Tuple[int, str]
+
+INSERT_SQL = "INSERT INTO dbo.search_history (user_id, movie_title) VALUES (?, ?)"
+
+
+class HistoryWriter:
+    def __init__(self, connect: Callable, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 2.0, put_timeout: float = 0.05, max_attempts: int = 3):
+        self._connect = connect
+        self._queue: "queue.Queue[Optional[Event]]" = queue.Queue(maxsize=max_queue)  # None wakes the writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # events accepted / events written or given up on: the queue is FIFO, so once `_done`
+        # reaches the `_accepted` count seen by flush(), every event queued before it is settled
+        self._progress = threading.Condition()
+        self._accepted = 0
+        self._done = 0
+        self._stop = threading.Event()
+        self._stats = {"submitted": 0, "written": 0, "batches": 0, "delayed": 0, "dropped": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def submit(self, user_id: int, movie_title: str) -> bool:
+        """Queue one history event; returns False if it had to be dropped."""
+        event = (int(user_id), movie_title)
+        with self._progress:  # held across the put so the accepted count follows queue order
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count("delayed")
+                try:
+                    self._queue.put(event, timeout=self.put_timeout)
+                except queue.Full:
+                    self._count("dropped")
+                    return False
+            self._accepted += 1
+        self._count("submitted")
+        return True
+
+    def _collect(self) -> List[Event]:
+        """Wait for the first event, then gather until the batch is full, the interval has passed
+        or flush() asks for what is queued now."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is None:
+                break
+            batch.append(event)
+        return batch
+
+    def _write(self, batch: List[Event]):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                cnxn = self._connect()
+                try:
+                    cursor = cnxn.cursor()
+                    cursor.fast_executemany = True
+                    cursor.executemany(INSERT_SQL, batch)
+                    cnxn.commit()
+                finally:
+                    cnxn.close()
+                self._count("written", len(batch))
+                self._count("batches")
+                self._settle(len(batch))
+                return
+            except Exception as e:
+                print(f"history writer: batch of {len(batch)} failed (attempt {attempt}): {e}")
+                if attempt < self.max_attempts:
+                    time.sleep(0.5 * attempt)
+        self._count("failed", len(batch))
+        self._settle(len(batch))
+
+    def _settle(self, n: int):
+        with self._progress:
+            self._done += n
+            self._progress.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                with self._write_lock:
+                    self._write(batch)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every event submitted so far is written, including a batch the background
+        thread is already holding (used before reading history back). False on timeout."""
+        if not self._thread.is_alive():
+            self._drain()
+            return True
+        with self._progress:
+            target = self._accepted
+            if self._done >= target:
+                return True
+        try:
+            self._queue.put_nowait(None)  # the writer stops gathering and writes what it has
+        except queue.Full:
+            pass  # a full queue fills the batch right away anyway
+        with self._progress:
+            return self._progress.wait_for(lambda: self._done >= target, timeout=timeout)
+
+    def _drain(self):
+        """Write what is left in the queue from the calling thread (once the writer thread is gone)."""
+        with self._write_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        event = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if event is not None:
+                        batch.append(event)
+                if not batch:
+                    return
+                self._write(batch)
+
+    def close(self):
+        """Stop the background thread and flush what is left (registered with atexit)."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)  # wake the writer instead of waiting out its interval
+        except queue.Full:
+            pass
+        self._thread.join(timeout=self.flush_interval + 1)
+        self._drain()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._progress:
+            return dict(stats, queued=self._accepted - self._done)
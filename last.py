@@ -10,11 +10,21 @@ Full Streamlit movie app:
 
 import streamlit as st
 import pandas as pd
-import pyodbc
+from db_pool import get_pool
+from catalog_cache import catalog
+from catalog_store import CatalogStore
+from change_feed import ChangeFeed
+from catalog_browser import render_catalog_browser
 from werkzeug.security import generate_password_hash, check_password_hash
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from similarity import most_similar
+from shared_model import SharedModel
+from neighbors import fetch_neighbors
+from title_index import TitleIndex, title_picker
+from migrations import LAST_MIGRATIONS, run_migrations
 import numpy as np
+import os
+import pickle
 from datetime import datetime
 
 # ---------------------------
@@ -29,6 +39,8 @@ DB_PASSWORD = ""
 
 DEFAULT_ADMIN_USERNAME = "admin"
 DEFAULT_ADMIN_PASSWORD = "admin@123"  # will be hashed and created on first run
+
+MODEL_DIR = "model_cache"  # fitted recommendation model is persisted here per catalog version
 # ---------------------------
 
 st.set_page_config(page_title="MovieApp", layout="wide")
@@ -41,39 +53,16 @@ def get_connection():
         conn_str = f"DRIVER={DB_DRIVER};SERVER={DB_SERVER};DATABASE={DB_NAME};Trusted_Connection=yes;"
     else:
         conn_str = f"DRIVER={DB_DRIVER};SERVER={DB_SERVER};DATABASE={DB_NAME};UID={DB_USER};PWD={DB_PASSWORD};"
-    return pyodbc.connect(conn_str, autocommit=True)
+    # pooled: conn.close() hands the connection back instead of disconnecting
+    return get_pool(conn_str, autocommit=True).acquire()
 
 def init_db():
-    """Create tables if they don't exist."""
+    """Bring the schema up to date (see migrations.py); returns the schema version."""
     conn = get_connection()
-    cursor = conn.cursor()
-    # users table for user accounts
-    cursor.execute("""
-    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='users' AND xtype='U')
-    CREATE TABLE users (
-        id INT IDENTITY(1,1) PRIMARY KEY,
-        username NVARCHAR(100) UNIQUE,
-        password_hash NVARCHAR(300),
-        is_admin BIT DEFAULT 0,
-        created_at DATETIME DEFAULT GETDATE()
-    );
-    """)
-    # movies table
-    cursor.execute("""
-    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='movies' AND xtype='U')
-    CREATE TABLE movies (
-        id INT IDENTITY(1,1) PRIMARY KEY,
-        title NVARCHAR(300),
-        year INT,
-        genre NVARCHAR(200),
-        director NVARCHAR(200),
-        rating FLOAT,
-        language NVARCHAR(100),
-        duration INT,
-        created_at DATETIME DEFAULT GETDATE()
-    );
-    """)
-    conn.close()
+    try:
+        return run_migrations(conn, "last", LAST_MIGRATIONS)
+    finally:
+        conn.close()
 
 def ensure_default_admin():
     """Create default admin if not exists."""
@@ -87,6 +76,31 @@ def ensure_default_admin():
                        (DEFAULT_ADMIN_USERNAME, pw_hash))
     conn.close()
 
+@st.cache_resource
+def change_feed():
+    """Polls movies_changes once per server process; any catalog change drops the cached
+    catalog here (and, through catalog.subscribe, marks the shared model stale)."""
+    feed = ChangeFeed(get_connection)
+    feed.subscribe(lambda changes: catalog.invalidate())
+    return feed
+
+def catalog_changed():
+    """After a local catalog write: publish it through the change feed (one reload, not one now and
+    another when the feed sees it), or drop the cache directly if the feed could not."""
+    if not change_feed().catch_up():
+        catalog.invalidate()
+
+@st.cache_resource
+def bootstrap():
+    """init_db + ensure_default_admin, once per server process.
+
+    A failure raises instead of returning, so it is not cached and the next rerun retries.
+    """
+    version = init_db()
+    ensure_default_admin()
+    change_feed()
+    return {"schema_version": version, "started_at": datetime.now()}
+
 # ---------------------------
 # User & Auth functions
 # ---------------------------
@@ -129,6 +143,7 @@ def add_movie_db(movie):
     """, (movie['title'], movie['year'], movie['genre'], movie['director'],
           movie['rating'], movie['language'], movie['duration']))
     conn.close()
+    catalog_changed()
 
 def update_movie_db(movie_id, movie):
     conn = get_connection()
@@ -139,19 +154,35 @@ def update_movie_db(movie_id, movie):
     """, (movie['title'], movie['year'], movie['genre'], movie['director'],
           movie['rating'], movie['language'], movie['duration'], movie_id))
     conn.close()
+    catalog_changed()
 
 def delete_movie_db(movie_id):
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("DELETE FROM movies WHERE id = ?", (movie_id,))
     conn.close()
+    catalog_changed()
 
-def fetch_all_movies_df():
+def load_movies_df():
+    """All movies, newest first, read straight from the database (no cache)."""
     conn = get_connection()
     df = pd.read_sql_query("SELECT * FROM movies ORDER BY id DESC", conn)
     conn.close()
     return df
 
+def movies_store():
+    """All movies, newest first, as a CatalogStore served from the shared catalog cache."""
+    return catalog.get("last.movies", lambda: CatalogStore.from_frame(load_movies_df()))
+
+def fetch_all_movies_df():
+    """All movies, newest first, as views over the cached CatalogStore."""
+    # shallow copy so callers can add columns without touching the cached frame
+    return movies_store().frame().copy(deep=False)
+
+def title_index():
+    """Prefix index over the cached catalog's titles (rebuilt with it)."""
+    return catalog.get("last.titles", lambda: TitleIndex(movies_store(), key_column="id"))
+
 def fetch_movie_by_id(movie_id):
     conn = get_connection()
     cursor = conn.cursor()
@@ -165,37 +196,127 @@ def fetch_movie_by_id(movie_id):
 # ---------------------------
 # Recommendation engine
 # ---------------------------
-def build_recommendation_model(movies_df):
+def fetch_catalog_version():
+    """Newest committed entry of dbo.movies_changes; changes whenever a row is added, edited or deleted.
+
+    One backwards seek on IX_movies_changes_row_version (the change feed's prune keeps the newest
+    entry, so the version never moves back). Until migration 3 has created the log, falls back to a
+    COUNT / MAX / CHECKSUM_AGG fingerprint of the movies table (a full scan).
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if cursor.execute("SELECT OBJECT_ID(N'dbo.movies_changes', N'U')").fetchone()[0] is not None:
+            cursor.execute("""
+                SELECT TOP (1) row_version FROM dbo.movies_changes
+                WHERE row_version < MIN_ACTIVE_ROWVERSION()
+                ORDER BY row_version DESC
+            """)
+            row = cursor.fetchone()
+            return row[0].hex() if row else "0"
+        cursor.execute("""
+            SELECT COUNT_BIG(*), ISNULL(MAX(id), 0), ISNULL(CHECKSUM_AGG(BINARY_CHECKSUM(*)), 0)
+            FROM movies
+        """)
+        row = cursor.fetchone()
+        return f"{row[0]}-{row[1]}-{row[2]}"
+    finally:
+        conn.close()
+
+def build_recommendation_model(movies_df, version=None):
     # Create a 'soup' combining title, genre, director
     if movies_df.empty:
         return None
     df = movies_df.copy()
-    df['soup'] = (df['title'].fillna('') + ' ' + df['genre'].fillna('') + ' ' + df['director'].fillna('')).str.lower()
+    df['soup'] = (df['title'].fillna('') + ' ' + df['genre'].astype(str) + ' ' + df['director'].astype(str)).str.lower()
     vectorizer = TfidfVectorizer(stop_words='english')
     tfidf_matrix = vectorizer.fit_transform(df['soup'])
-    # compute cosine similarities
-    cosine_sim = linear_kernel(tfidf_matrix, tfidf_matrix)
-    indices = pd.Series(df.index, index=df['id']).drop_duplicates()
+    df = df.reset_index(drop=True)
+    indices = pd.Series(range(len(df)), index=df['id']).drop_duplicates()
+    # similarity rows are computed on demand from the sparse matrix in recommend_movies;
+    # the model keeps its own copy of the rows so positions always match the matrix
     return {
+        "version": version,
         "df": df,
-        "cosine_sim": cosine_sim,
+        "vectorizer": vectorizer,
+        "tfidf_matrix": tfidf_matrix,
         "indices": indices
     }
 
+def model_artifact_path():
+    return os.path.join(MODEL_DIR, f"recommender_{DB_NAME}.pkl")
+
+def save_model_artifact(model):
+    """Write the fitted model to disk; the temp file + rename keeps readers from seeing a partial file."""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = model_artifact_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_model_artifact():
+    path = model_artifact_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+        # artifacts written before the model carried its rows are rebuilt
+        return model if model and "df" in model else None
+    except Exception as e:
+        print("load_model_artifact error:", e)
+        return None
+
+def build_current_model():
+    """Fit on the current catalog and persist it, so a restarted server starts warm."""
+    # version first, then the rows uncached: a write in between only makes the model look stale
+    # (one extra rebuild), never stamps old rows with the new version
+    version = fetch_catalog_version()
+    model = build_recommendation_model(CatalogStore.from_frame(load_movies_df()).frame(), version=version)
+    if model is not None:
+        try:
+            save_model_artifact(model)
+        except Exception as e:
+            print("save_model_artifact error:", e)
+    return model
+
+@st.cache_resource
+def model_store():
+    """Process-wide shared model: loaded from disk once per server start, then rebuilt in the
+    background after catalog writes or when fetch_catalog_version() shows another process changed it."""
+    initial = load_model_artifact()
+    store = SharedModel(build_current_model, name="last.tfidf", initial=initial,
+                        is_current=lambda m: m["version"] == fetch_catalog_version())
+    catalog.subscribe(store.mark_stale)
+    if initial is not None and initial["version"] != fetch_catalog_version():
+        store.mark_stale()  # serve the artifact from disk while the fresh model is fitted
+    return store
+
+def get_recommendation_model():
+    """Current shared model snapshot (never fitted inside the request once the process is warm)."""
+    return model_store().get()
+
 def recommend_movies(movie_id, model, top_n=5):
     if not model:
         return []
-    df = model["df"]
-    cosine_sim = model["cosine_sim"]
+    tfidf_matrix = model["tfidf_matrix"]
     indices = model["indices"]
     if movie_id not in indices.index:
         return []
     idx = indices[movie_id]
-    sim_scores = list(enumerate(cosine_sim[idx]))
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    sim_scores = sim_scores[1: top_n+1]  # exclude itself
-    movie_indices = [i[0] for i in sim_scores]
-    return df.iloc[movie_indices].to_dict(orient='records')
+    movie_indices, _ = most_similar(tfidf_matrix, idx, top_n=top_n)  # excludes itself
+    # ratings are float32 in the catalog store; show the stored one-decimal value
+    return model["df"].iloc[movie_indices].astype({'rating': float}).round({'rating': 1}).to_dict(orient='records')
+
+def fetch_neighbor_movies(movie_id, top_n=5):
+    """Precomputed neighbors from dbo.movie_neighbors, read with a single index seek."""
+    conn = get_connection()
+    try:
+        recs = fetch_neighbors(conn, movie_id, top_n, table="movies", id_column="id")
+    finally:
+        conn.close()
+    return recs.to_dict(orient='records')
 
 # ---------------------------
 # Session State helpers
@@ -214,12 +335,12 @@ init_session()
 def home_page():
     st.title("🎬 MovieApp - Home")
     st.write("Welcome! Use the sidebar to navigate the app.")
-    df = fetch_all_movies_df()
-    if df.empty:
-        st.info("No movies in DB. Admin can add movies.")
-        return
     st.subheader("Latest movies")
-    st.dataframe(df[['id','title','year','genre','director','rating','language','duration']])
+    page = render_catalog_browser(get_connection, "movies", "id", ['id','title','year','genre','director','rating','language','duration'],
+                                  sort_columns=['id', 'title', 'year', 'rating'], default_descending=True,
+                                  state_key="home_browser")
+    if page.empty:
+        st.info("No movies in DB. Admin can add movies.")
 
 def signup_page():
     st.title("Create an account")
@@ -257,9 +378,10 @@ def logout():
 def admin_dashboard():
     st.title("Admin Dashboard")
     st.write("Manage movies and users.")
-    df = fetch_all_movies_df()
     st.subheader("All movies")
-    st.dataframe(df[['id','title','year','genre','director','rating','language','duration']])
+    render_catalog_browser(get_connection, "movies", "id", ['id','title','year','genre','director','rating','language','duration'],
+                           sort_columns=['id', 'title', 'year', 'rating'], default_descending=True,
+                           state_key="admin_browser")
 
 def add_movie_page():
     st.title("Add Movie")
@@ -293,12 +415,14 @@ def add_movie_page():
 
 def update_delete_page():
     st.title("Update / Delete Movie")
-    df = fetch_all_movies_df()
-    if df.empty:
+    index = title_index()
+    if not len(index):
         st.info("No movies found.")
         return
     st.subheader("Select movie to edit")
-    sel = st.selectbox("Choose movie id", options=df['id'].tolist(), format_func=lambda x: f"{x} - {df[df['id']==x]['title'].values[0]}")
+    sel = title_picker(index, "Search for a movie", key="edit_movie")
+    if sel is None:
+        return
     movie = fetch_movie_by_id(sel)
     if not movie:
         st.error("Movie not found.")
@@ -337,15 +461,17 @@ def update_delete_page():
 
 def recommendation_page():
     st.title("Recommendations")
-    df = fetch_all_movies_df()
-    if df.empty:
+    index = title_index()
+    if not len(index):
         st.info("No movies to recommend from.")
         return
     st.subheader("Pick a movie to get recommendations")
-    sel = st.selectbox("Choose movie", options=df['id'].tolist(), format_func=lambda x: f"{x} - {df[df['id']==x]['title'].values[0]}")
-    model = build_recommendation_model(df)
-    if st.button("Recommend"):
-        recs = recommend_movies(sel, model, top_n=6)
+    sel = title_picker(index, "Search for a movie", key="recommend_movie")
+    if sel is not None and st.button("Recommend"):
+        recs = fetch_neighbor_movies(sel, top_n=6)
+        if not recs:
+            # no precomputed neighbors for this movie yet (see neighbors.py) - use the local model
+            recs = recommend_movies(sel, get_recommendation_model(), top_n=6)
         if not recs:
             st.info("No recommendations found.")
             return
@@ -357,10 +483,9 @@ def recommendation_page():
 # Main
 # ---------------------------
 def main():
-    # initialize DB & admin (safe-guard)
+    # initialize DB & admin once per server process (safe-guard)
     try:
-        init_db()
-        ensure_default_admin()
+        boot = bootstrap()
     except Exception as e:
         st.error("Database initialization error. Check DB connection/config at top of app.py.")
         st.exception(e)
@@ -416,7 +541,8 @@ def main():
         st.info("Select a page from the sidebar.")
 
     st.sidebar.markdown("---")
-    st.sidebar.write("App last started at: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    st.sidebar.write("App last started at: " + boot["started_at"].strftime("%Y-%m-%d %H:%M:%S"))
+    st.sidebar.write(f"Schema version: {boot['schema_version']}")
     st.sidebar.markdown("**DB:** " + DB_NAME)
 
 if __name__ == "__main__":
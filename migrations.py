@@ -0,0 +1,234 @@
+"""
+Versioned schema migrations.
+
+Each app's schema is a list of (version, description, [statements]). The
+applied versions are recorded in dbo.schema_version, so a migration runs
+exactly once per database and a started server only needs one small query
+to see that it is up to date (and none at all after the first call in the
+process).
+
+Two schemas exist in this repo:
+  MOVIEDB_MIGRATIONS - dbo.movies keyed by movie_id (alter.py, bro.py, one.py, worked.py)
+  LAST_MIGRATIONS    - movies keyed by id (last.py)
+"""
+
+import threading
+from typing import Dict, List, Tuple
+
+Migration = Tuple[int, str, List[str]]
+
+SCHEMA_VERSION_DDL = """
+IF OBJECT_ID(N'dbo.schema_version', N'U') IS NULL
+CREATE TABLE dbo.schema_version (
+    app VARCHAR(50) NOT NULL,
+    version INT NOT NULL,
+    description VARCHAR(255) NOT NULL,
+    applied_at DATETIME NOT NULL DEFAULT GETDATE(),
+    CONSTRAINT PK_schema_version PRIMARY KEY (app, version)
+);
+"""
+
+
+def create_index(name: str, table: str, columns: str, include: str = None) -> str:
+    """CREATE INDEX guarded so databases that already have the index can adopt the migration."""
+    include_sql = f" INCLUDE ({include})" if include else ""
+    return f"""
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = N'{name}' AND object_id = OBJECT_ID(N'{table}'))
+    CREATE NONCLUSTERED INDEX {name} ON {table} ({columns}){include_sql};
+    """
+
+
+def change_log(key_column: str) -> List[str]:
+    """dbo.movies_changes plus the trigger that logs every insert / update / delete on dbo.movies.
+
+    Consumers read it in row_version order up to MIN_ACTIVE_ROWVERSION() (see
+    change_feed.py), so rows of transactions still in flight are never skipped.
+    """
+    return [
+        """
+        IF OBJECT_ID(N'dbo.movies_changes', N'U') IS NULL
+        CREATE TABLE dbo.movies_changes (
+            change_id BIGINT IDENTITY(1,1) NOT NULL CONSTRAINT PK_movies_changes PRIMARY KEY,
+            movie_id INT NOT NULL,
+            operation CHAR(1) NOT NULL,  -- I / U / D
+            changed_at DATETIME2 NOT NULL CONSTRAINT DF_movies_changes_changed_at DEFAULT SYSUTCDATETIME(),
+            row_version ROWVERSION NOT NULL
+        );
+        """,
+        create_index("IX_movies_changes_row_version", "dbo.movies_changes", "row_version", "movie_id, operation"),
+        f"""
+        CREATE OR ALTER TRIGGER dbo.TR_movies_changes ON dbo.movies
+        AFTER INSERT, UPDATE, DELETE
+        AS
+        BEGIN
+            SET NOCOUNT ON;  -- keep the caller's rowcount intact
+            INSERT INTO dbo.movies_changes (movie_id, operation)
+            SELECT i.{key_column}, CASE WHEN d.{key_column} IS NULL THEN 'I' ELSE 'U' END
+            FROM inserted AS i LEFT JOIN deleted AS d ON d.{key_column} = i.{key_column}
+            UNION ALL
+            SELECT d.{key_column}, 'D'
+            FROM deleted AS d
+            WHERE NOT EXISTS (SELECT 1 FROM inserted AS i WHERE i.{key_column} = d.{key_column});
+        END
+        """,
+    ]
+
+
+# ==========================
+# dbo.movies / dbo.users / dbo.search_history (alter.py schema)
+# ==========================
+MOVIEDB_MIGRATIONS: List[Migration] = [
+    (1, "base tables", [
+        """
+        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[users]') AND type in (N'U'))
+        BEGIN
+            CREATE TABLE dbo.users (
+                user_id INT IDENTITY(1,1) PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                created_at DATETIME DEFAULT GETDATE()
+            );
+        END
+        """,
+        """
+        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[search_history]') AND type in (N'U'))
+        BEGIN
+            CREATE TABLE dbo.search_history (
+                id INT IDENTITY(1,1) PRIMARY KEY,
+                user_id INT NOT NULL,
+                movie_title VARCHAR(500) NOT NULL,
+                search_time DATETIME DEFAULT GETDATE(),
+                CONSTRAINT FK_search_history_user FOREIGN KEY (user_id) REFERENCES dbo.users(user_id)
+            );
+        END
+        """,
+        """
+        IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[movies]') AND type in (N'U'))
+        BEGIN
+            CREATE TABLE dbo.movies (
+                movie_id INT IDENTITY(1,1) PRIMARY KEY,
+                title VARCHAR(500) NOT NULL,
+                release_year INT NULL,
+                genre VARCHAR(255) NULL,
+                director VARCHAR(255) NULL,
+                imdb_rating DECIMAL(3,1) NULL,
+                language VARCHAR(100) NULL,
+                duration_minutes INT NULL,
+                created_at DATETIME DEFAULT GETDATE()
+            );
+        END
+        """,
+    ]),
+    (2, "covering indexes for filter, title search and history access paths", [
+        # Filter Movies: genre = ? [AND language = ?] AND imdb_rating >= ?
+        create_index("IX_movies_genre_language_rating", "dbo.movies", "genre, language, imdb_rating",
+                     "title, release_year, director, duration_minutes, created_at"),
+        # Filter Movies with only a language picked
+        create_index("IX_movies_language_rating", "dbo.movies", "language, imdb_rating",
+                     "title, release_year, genre, director, duration_minutes, created_at"),
+        # rating-only filters and "best rated first" ordering
+        create_index("IX_movies_rating", "dbo.movies", "imdb_rating",
+                     "title, release_year, genre, director, language, duration_minutes, created_at"),
+        # exact / prefix title lookups
+        create_index("IX_movies_title", "dbo.movies", "title"),
+        # My Search History: WHERE user_id = ? ORDER BY search_time DESC
+        create_index("IX_search_history_user_time", "dbo.search_history", "user_id, search_time DESC",
+                     "movie_title"),
+        # admin log view: ORDER BY search_time DESC
+        create_index("IX_search_history_time", "dbo.search_history", "search_time DESC", "user_id, movie_title"),
+    ]),
+    (3, "movies change log", change_log("movie_id")),
+]
+
+
+# ==========================
+# movies / users (last.py schema)
+# ==========================
+LAST_MIGRATIONS: List[Migration] = [
+    (1, "base tables", [
+        """
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='users' AND xtype='U')
+        CREATE TABLE users (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            username NVARCHAR(100) UNIQUE,
+            password_hash NVARCHAR(300),
+            is_admin BIT DEFAULT 0,
+            created_at DATETIME DEFAULT GETDATE()
+        );
+        """,
+        """
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='movies' AND xtype='U')
+        CREATE TABLE movies (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            title NVARCHAR(300),
+            year INT,
+            genre NVARCHAR(200),
+            director NVARCHAR(200),
+            rating FLOAT,
+            language NVARCHAR(100),
+            duration INT,
+            created_at DATETIME DEFAULT GETDATE()
+        );
+        """,
+    ]),
+    (2, "covering indexes for filter and title access paths", [
+        create_index("IX_movies_genre_language_rating", "dbo.movies", "genre, language, rating",
+                     "title, year, director, duration, created_at"),
+        create_index("IX_movies_language_rating", "dbo.movies", "language, rating",
+                     "title, year, genre, director, duration, created_at"),
+        create_index("IX_movies_rating", "dbo.movies", "rating",
+                     "title, year, genre, director, language, duration, created_at"),
+        create_index("IX_movies_title", "dbo.movies", "title"),
+    ]),
+    (3, "movies change log", change_log("id")),
+]
+
+
+# ==========================
+# Runner
+# ==========================
+_migrated: Dict[str, int] = {}
+_migrate_lock = threading.Lock()
+
+
+def run_migrations(cnxn, app: str, migrations: List[Migration]) -> int:
+    """Apply every migration of `app` newer than the recorded version; returns the schema version.
+
+    Each migration runs in its own transaction together with its schema_version
+    row. After the first successful call the result is remembered for the rest
+    of the process.
+    """
+    target = max(version for version, _, _ in migrations)
+    with _migrate_lock:
+        if _migrated.get(app) == target:
+            return target
+        was_autocommit = cnxn.autocommit
+        cnxn.autocommit = False
+        try:
+            cursor = cnxn.cursor()
+            cursor.execute(SCHEMA_VERSION_DDL)
+            cnxn.commit()
+            for version, description, statements in sorted(migrations, key=lambda m: m[0]):
+                # UPDLOCK/HOLDLOCK: a second server starting at the same time waits here instead of re-applying
+                current = cursor.execute(
+                    "SELECT ISNULL(MAX(version), 0) FROM dbo.schema_version WITH (UPDLOCK, HOLDLOCK) WHERE app = ?",
+                    (app,),
+                ).fetchone()[0]
+                if current >= version:
+                    cnxn.commit()
+                    continue
+                try:
+                    for statement in statements:
+                        cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO dbo.schema_version (app, version, description) VALUES (?, ?, ?)",
+                        (app, version, description),
+                    )
+                    cnxn.commit()
+                except Exception:
+                    cnxn.rollback()
+                    raise
+        finally:
+            cnxn.autocommit = was_autocommit
+        _migrated[app] = target
+        return target
@@ -0,0 +1,100 @@
+"""
+Diff / apply for the admin batch-edit grid.
+
+diff_movie_frames() compares the frame shown in the grid with the edited one
+and returns the inserted rows, the changed cells of existing rows and the
+deleted ids. apply_movie_diff() writes all of it in ONE transaction with
+batched parameterized statements (updates are grouped by the set of changed
+columns so each group is a single executemany).
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import pandas as pd
+
+EDITABLE_COLUMNS = ["title", "release_year", "genre", "director", "imdb_rating", "language", "duration_minutes"]
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+
+class MovieDiff(NamedTuple):
+    inserts: List[Dict]                 # new rows (column -> value)
+    updates: List[Tuple[int, Dict]]     # (key, {column: new value}) for changed cells only
+    deletes: List[int]                  # keys of removed rows
+
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deletes)
+
+    def summary(self) -> str:
+        cells = sum(len(changes) for _, changes in self.updates)
+        return (f"{len(self.inserts)} insert(s), {len(self.updates)} updated row(s) "
+                f"({cells} cell(s)), {len(self.deletes)} delete(s)")
+
+
+def _py(value):
+    """numpy / pandas scalars -> plain Python values pyodbc accepts (NaN / NA -> None)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def diff_movie_frames(original: pd.DataFrame, edited: pd.DataFrame, key: str = "movie_id",
+                      columns: Sequence[str] = EDITABLE_COLUMNS) -> MovieDiff:
+    columns = list(columns)
+    before = original.set_index(key)[columns]
+    new_rows = edited[edited[key].isna()]
+    after = edited[edited[key].notna()].astype({key: "int64"}).set_index(key)[columns]
+
+    deletes = [int(k) for k in before.index.difference(after.index)]
+    inserts = [{c: _py(row[c]) for c in columns} for _, row in new_rows.iterrows()]
+
+    common = before.index.intersection(after.index)
+    old, new = before.loc[common], after.loc[common]
+    # a cell changed unless both sides are equal or both are missing; comparing a nullable
+    # column (Int16, string) against <NA> yields <NA>, which counts as a change here
+    changed = old.ne(new).fillna(True).astype(bool) & ~(old.isna() & new.isna())
+    updates = []
+    for movie_id in common[changed.any(axis=1).to_numpy()]:
+        row_changed = changed.loc[movie_id]
+        updates.append((int(movie_id), {c: _py(new.at[movie_id, c]) for c in columns if row_changed[c]}))
+    return MovieDiff(inserts, updates, deletes)
+
+
+def apply_movie_diff(cnxn, diff: MovieDiff, table: str = "dbo.movies", key: str = "movie_id") -> Dict[str, int]:
+    """Apply `diff` atomically: everything is committed together or rolled back together."""
+    if not _IDENT_RE.match(table) or not _IDENT_RE.match(key):
+        raise ValueError("Invalid table or key column name.")
+    cursor = cnxn.cursor()
+    cursor.fast_executemany = True
+    try:
+        if diff.deletes:
+            cursor.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(k,) for k in diff.deletes])
+
+        by_columns = defaultdict(list)
+        for movie_id, changes in diff.updates:
+            cols = tuple(sorted(changes))
+            by_columns[cols].append(tuple(changes[c] for c in cols) + (movie_id,))
+        for cols, params in by_columns.items():
+            for col in cols:
+                if col not in EDITABLE_COLUMNS:
+                    raise ValueError(f"Column {col!r} is not editable.")
+            assignments = ", ".join(f"{c} = ?" for c in cols)
+            cursor.executemany(f"UPDATE {table} SET {assignments} WHERE {key} = ?", params)
+
+        if diff.inserts:
+            cols = list(diff.inserts[0])
+            for col in cols:
+                if col not in EDITABLE_COLUMNS:
+                    raise ValueError(f"Column {col!r} is not editable.")
+            placeholders = ", ".join("?" for _ in cols)
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})",
+                [tuple(row[c] for c in cols) for row in diff.inserts],
+            )
+        cnxn.commit()
+    except Exception:
+        cnxn.rollback()
+        raise
+    return {"inserted": len(diff.inserts), "updated": len(diff.updates), "deleted": len(diff.deletes)}
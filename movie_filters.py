@@ -0,0 +1,258 @@
+"""
+Filter API for the "Filter Movies" pages.
+
+The same call - genre, language, minimum rating, sort column / direction and
+a page (limit + offset) - is served two ways:
+
+  * fetch_filtered_movies(): builds a parameterized WHERE / ORDER BY /
+    OFFSET-FETCH so only the matching page leaves SQL Server. worked.py uses
+    it while the change feed is down, as nothing would patch its store then.
+  * MovieFilterStore.filter(): the catalog is kept in memory as a CatalogStore
+    with a FacetIndex (facet_index.py) next to it, so genre / language / rating
+    are combined as bitmaps and only the matching rows are sorted and paged.
+    Inserts / updates / deletes are applied to it movie by movie (apply()).
+
+Both return (page DataFrame, total number of matching rows).
+"""
+
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from catalog_store import CatalogStore
+from facet_index import FacetIndex, genre_tokens
+
+ALL = "All"
+SORT_COLUMNS = ("imdb_rating", "release_year", "title", "duration_minutes", "movie_id")
+COMPACT_AFTER = 1000  # patched + deleted rows kept beside the frame before it is reloaded
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+
+class FilterQuery(NamedTuple):
+    sql: str
+    params: List
+    count_sql: str
+    count_params: List
+
+
+def _like_pattern(text: str) -> str:
+    # escape LIKE wildcards so the widget value is matched literally
+    return "%" + re.sub(r"([\[%_])", r"[\1]", text) + "%"
+
+
+# ==========================
+# SQL Server
+# ==========================
+def build_filter_query(genre: str = ALL, language: str = ALL, min_rating: float = None,
+                       order_by: str = None, descending: bool = False, limit: int = None, offset: int = 0,
+                       table: str = "dbo.movies", key_column: str = "movie_id",
+                       contains: bool = False) -> FilterQuery:
+    """Parameterized page + count queries for the given widget values.
+
+    `contains=True` matches genre / language as case-insensitive substrings
+    (flim.py semantics) instead of exact values (worked.py / bro.py).
+    """
+    if not _IDENT_RE.match(table) or not _IDENT_RE.match(key_column):
+        raise ValueError("Invalid table or key column name.")
+    order_by = order_by or key_column
+    if order_by not in SORT_COLUMNS and order_by != key_column:
+        raise ValueError(f"Cannot sort by {order_by!r}.")
+
+    where, params = [], []
+    for column, value in (("genre", genre), ("language", language)):
+        if value and value != ALL:
+            if contains:
+                where.append(f"{column} LIKE ?")
+                params.append(_like_pattern(value))
+            else:
+                where.append(f"{column} = ?")
+                params.append(value)
+    if min_rating is not None:
+        where.append("imdb_rating >= ?")
+        params.append(float(min_rating))
+    where_sql = (" WHERE " + " AND ".join(where)) if where else ""
+
+    direction = "DESC" if descending else "ASC"
+    order_sql = f" ORDER BY {order_by} {direction}"
+    if order_by != key_column:
+        order_sql += f", {key_column} {direction}"  # unique tie-breaker keeps pages stable
+
+    sql = f"SELECT * FROM {table}{where_sql}{order_sql}"
+    page_params = list(params)
+    if limit is not None:
+        sql += " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+        page_params += [int(offset), int(limit)]
+    return FilterQuery(sql, page_params, f"SELECT COUNT(*) FROM {table}{where_sql}", params)
+
+
+def fetch_filtered_movies(conn, **filters) -> Tuple[pd.DataFrame, int]:
+    """Run build_filter_query(**filters) on `conn`; returns (page, total matches)."""
+    query = build_filter_query(**filters)
+    cur = conn.cursor()
+    cur.execute(query.sql, query.params)
+    columns = [c[0] for c in cur.description]
+    page = pd.DataFrame.from_records([tuple(r) for r in cur.fetchall()], columns=columns)
+    if filters.get("limit") is None:
+        return page, len(page)
+    total = cur.execute(query.count_sql, query.count_params).fetchone()[0]
+    return page, int(total)
+
+
+def fetch_filter_options(conn, table: str = "dbo.movies") -> Tuple[List[str], List[str]]:
+    """Distinct genres and languages for the selectboxes."""
+    if not _IDENT_RE.match(table):
+        raise ValueError("Invalid table name.")
+    cur = conn.cursor()
+    genres = [r[0] for r in cur.execute(f"SELECT DISTINCT genre FROM {table} WHERE genre IS NOT NULL ORDER BY genre").fetchall()]
+    languages = [r[0] for r in cur.execute(f"SELECT DISTINCT language FROM {table} WHERE language IS NOT NULL ORDER BY language").fetchall()]
+    return genres, languages
+
+
+# ==========================
+# In-memory store
+# ==========================
+class MovieFilterStore:
+    """Catalog frame plus the facet bitmaps needed to answer filter calls without scanning it.
+
+    apply() patches single movies in place: the facet bitmaps re-index just those rows, and their
+    new values are kept next to the loaded frame (`_rows`, by slot) until enough have piled up
+    that reloading from the live rows is cheaper. All methods take one lock, so one store can be
+    shared by every session of the process and patched from a feed thread.
+    """
+
+    def __init__(self, catalog, key_column: str = "movie_id", version=None):
+        """`catalog` is a CatalogStore or a movies DataFrame (encoded into one)."""
+        self._lock = threading.Lock()
+        self.key_column = key_column
+        self.version = version
+        self._load(catalog)
+
+    def _load(self, catalog):
+        self.store = catalog if isinstance(catalog, CatalogStore) else CatalogStore.from_frame(catalog)
+        self.df = self.store.frame()
+        self.facets = FacetIndex(self.store)
+        self._slot_of = {key: slot for slot, key in enumerate(self.df[self.key_column].tolist())}
+        self._rows: Dict[int, Dict] = {}   # slot -> row, for slots changed or added since the load
+        self._patched = np.zeros(max(1024, len(self.df)), dtype=bool)
+        self._size = len(self.df)  # slots handed out, deleted ones included
+        self._dead = 0
+        self._sort_keys = {}  # column -> per-slot sort value (float, or object for text)
+        for name in SORT_COLUMNS:
+            if name in self.df:
+                column = self.df[name]
+                if pd.api.types.is_numeric_dtype(column):
+                    # float32 ratings stay float32, so a patched 9.95 ties with a loaded one
+                    values = column.to_numpy(dtype=column.dtype if column.dtype.kind == "f" else float,
+                                             na_value=np.nan)
+                else:
+                    values = column.to_numpy(dtype=object)
+                keys = np.full(len(self._patched), np.nan, dtype=values.dtype)
+                keys[:len(values)] = values
+                self._sort_keys[name] = keys
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def _page(self, rows: np.ndarray) -> pd.DataFrame:
+        """The rows at these slots, in this order (patched slots come from `_rows`)."""
+        patched = self._patched[rows]
+        if not patched.any():
+            return self.df.iloc[rows].reset_index(drop=True)
+        new = pd.DataFrame([self._rows[slot] for slot in rows[patched].tolist()], columns=self.df.columns,
+                           index=np.flatnonzero(patched))
+        for name, dtype in self.df.dtypes.items():
+            if pd.api.types.is_numeric_dtype(dtype):  # keep Int16 / float32 columns typed in the page
+                new[name] = pd.to_numeric(new[name], errors="coerce").astype(dtype)
+        if patched.all():
+            return new.reset_index(drop=True)
+        old = self.df.iloc[rows[~patched]].set_axis(np.flatnonzero(~patched))
+        return pd.concat([old, new]).sort_index().reset_index(drop=True)
+
+    def _set_slot(self, slot: int, row: Dict):
+        if slot == len(self._patched):
+            self._patched = np.concatenate([self._patched, np.zeros(slot, dtype=bool)])
+            for name, keys in self._sort_keys.items():
+                self._sort_keys[name] = np.concatenate([keys, np.full(slot, np.nan, dtype=keys.dtype)])
+        self._rows[slot] = row
+        self._patched[slot] = True
+        for name, keys in self._sort_keys.items():
+            value = row[name]
+            missing = value is None or (not isinstance(value, str) and pd.isna(value))
+            keys[slot] = np.nan if missing else (float(value) if keys.dtype.kind == "f" else value)
+
+    def apply(self, changes: Dict[object, Optional[Dict]], version=None):
+        """Patch several movies at once: key -> its new row (column -> value), or None when it was deleted."""
+        with self._lock:
+            rows = {}
+            for key, row in changes.items():
+                slot = self._slot_of.get(key)
+                if row is None:
+                    if slot is not None:
+                        del self._slot_of[key]
+                        self._rows.pop(slot, None)
+                        self._dead += 1
+                        rows[slot] = None
+                    continue
+                if slot is None:
+                    slot = self._slot_of[key] = self._size  # new movies take the next slot
+                    self._size += 1
+                row = {name: row.get(name) for name in self.df.columns}
+                row[self.key_column] = key
+                self._set_slot(slot, row)
+                rows[slot] = row
+            self.facets.set_rows(rows)
+            if self._dead + len(self._rows) > max(COMPACT_AFTER, len(self._slot_of)):
+                # reload from the live rows: the frame and bitmaps are dense again and `_rows` is empty
+                self._load(self._page(self.facets.rows(self.facets.everything)))
+            if version is not None:
+                self.version = version
+
+    def rebuild(self, catalog, version=None):
+        with self._lock:
+            self._load(catalog)
+            self.version = version
+
+    def _bitmap(self, genre: str = ALL, language: str = ALL, min_rating: float = None) -> np.ndarray:
+        # a genre value such as "Action, Drama" needs every one of its tokens
+        genres = genre_tokens(genre) if genre and genre != ALL else ()
+        languages = [language] if language and language != ALL else ()
+        return self.facets.intersect(self.facets.all_of("genre", genres), self.facets.any_of("language", languages),
+                                     self.facets.rating_at_least(min_rating))
+
+    def facet_counts(self, facet: str, genre: str = ALL, language: str = ALL,
+                     min_rating: float = None) -> Dict[str, int]:
+        """Every value of `facet` ("genre" / "language"), alphabetical, with its matching movies under the
+        other widgets' values: the widget options and their counts come from the same bitmaps."""
+        with self._lock:
+            base = self._bitmap(ALL if facet == "genre" else genre, ALL if facet == "language" else language,
+                                min_rating)
+            counts = self.facets.counts(facet, within=base)
+            return {value: counts[value] for value in self.facets.values(facet)}
+
+    def filter(self, genre: str = ALL, language: str = ALL, min_rating: float = None,
+               order_by: str = None, descending: bool = False, limit: int = None,
+               offset: int = 0) -> Tuple[pd.DataFrame, int]:
+        """(page, total matches) for the widget values (genre tokens / language match case-insensitively)."""
+        if order_by and order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {order_by!r}.")
+        with self._lock:
+            rows = self.facets.rows(self._bitmap(genre, language, min_rating))  # catalog order unless sorted
+
+            if order_by:
+                keys = self._sort_keys[order_by][rows]
+                if keys.dtype.kind == "f":
+                    missing = np.isnan(keys)
+                else:
+                    codes, _ = pd.factorize(keys, sort=True)  # text -> rank, missing -> -1
+                    keys, missing = codes.astype(float), codes < 0
+                # missing values last either way; ties keep catalog order
+                order = np.lexsort((np.arange(len(rows)), -keys if descending else keys, missing))
+                rows = rows[order]
+            total = len(rows)
+            if limit is not None:
+                rows = rows[int(offset):int(offset) + int(limit)]
+            return self._page(rows), total
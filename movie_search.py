@@ -0,0 +1,246 @@
+"""
+In-process ranked search over title, genre, director and language.
+
+Scoring is BM25F: a term's frequency in each field is length-normalized
+against that field's average length, weighted by the field boost and summed,
+then saturated once, so "nolan" in a director ranks above "nolan" buried in
+a long title and a query like "nolan sci-fi" rewards movies matching both.
+Since that score does not depend on the query, every (term, movie) impact is
+computed at build time and quantized to one byte.
+
+Index layout (one set of flat arrays for the whole vocabulary):
+
+  * each term's postings are sorted by impact, highest first, and cut into
+    blocks of BLOCK_SIZE movies
+  * inside a block the movie slots are ascending, gap-encoded and stored as
+    varints (1 byte for most gaps), next to one impact byte per posting
+  * every block records its highest impact
+
+A query is evaluated block by block, always taking the unread block with
+the highest impact bound. Once no movie outside the current top
+(page + 1) * page_size can catch up with the bound of everything still
+unread (and the same holds at the start of the requested page), the
+remaining blocks are skipped; the candidates are then rescored exactly, so
+pages are identical to those of an exhaustive evaluation.
+
+MovieSearch is immutable: rebuild it when the catalog changes (the apps
+hold it in a SharedModel, which does that in the background).
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+
+from catalog_store import CatalogStore
+
+FIELD_BOOSTS = {"title": 3.0, "director": 2.0, "genre": 1.5, "language": 0.5}
+K1 = 1.2
+B = 0.75
+BLOCK_SIZE = 256
+PAGE_SIZE = 20
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text) -> List[str]:
+    return _WORD_RE.findall(str(text).casefold())
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """LEB128 varints (7 bits per byte, high bit = more bytes follow) for non-negative integers."""
+    values = np.asarray(values, dtype=np.uint64)
+    widths = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28, 35):
+        widths += values >= (1 << shift)
+    ends = np.cumsum(widths)
+    out = np.zeros(int(ends[-1]) if len(values) else 0, dtype=np.uint8)
+    starts = ends - widths
+    for k in range(int(widths.max()) if len(values) else 0):
+        has = widths > k
+        byte = (values[has] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (widths[has] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[has] + k] = (byte | more).astype(np.uint8)
+    return out
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    return np.add.reduceat((data & 0x7F).astype(np.int64) << (7 * position), starts)
+
+
+class SearchPage(NamedTuple):
+    rows: List[int]          # positions in MovieSearch.df, best first
+    scores: List[float]
+    page: int
+    has_more: bool
+
+
+class MovieSearch:
+    def __init__(self, catalog, boosts: Dict[str, float] = None, block_size: int = BLOCK_SIZE):
+        """`catalog` is a CatalogStore or a movies DataFrame; results are rows of self.df."""
+        store = catalog if isinstance(catalog, CatalogStore) else CatalogStore.from_frame(catalog)
+        self.store = store
+        self.df = store.frame()
+        self.boosts = {f: w for f, w in (boosts or FIELD_BOOSTS).items() if f in store}
+        n = self.n = len(store)
+
+        # per field: each row's text code, each distinct text's tokens and the row lengths
+        self._codes, self._tokens, self._lengths, self._avg = {}, {}, {}, {}
+        for field in self.boosts:
+            if isinstance(store.column(field), pd.Categorical):
+                texts, codes = store.categories(field), store.codes(field)
+            else:
+                codes, texts = pd.factorize(pd.Series(store.values(field), dtype=object).fillna(""))
+            tokens = [tokenize(t) for t in texts]
+            self._codes[field], self._tokens[field] = codes, tokens
+            lengths = np.fromiter(map(len, tokens), dtype=np.int32, count=len(tokens))[codes]
+            self._lengths[field] = lengths
+            self._avg[field] = max(float(lengths.mean()) if n else 0.0, 1.0)
+
+        # (term, slot) -> weighted, length-normalized tf summed over fields in boost order
+        self.vocabulary: Dict[str, int] = {}
+        term_parts, slot_parts, weight_parts = [], [], []
+        for field, boost in self.boosts.items():
+            flat_terms, flat_tfs, sizes = [], [], []
+            for tokens in self._tokens[field]:
+                counts = Counter(tokens)
+                flat_terms.extend(self.vocabulary.setdefault(t, len(self.vocabulary)) for t in counts)
+                flat_tfs.extend(counts.values())
+                sizes.append(len(counts))
+            sizes = np.array(sizes, dtype=np.int64)
+            offsets = np.concatenate(([0], np.cumsum(sizes)))
+            all_terms = np.array(flat_terms, dtype=np.int64)
+            all_tfs = np.array(flat_tfs, dtype=float)
+            codes = self._codes[field]
+            counts = sizes[codes]
+            slots = np.repeat(np.arange(n, dtype=np.int64), counts)
+            within = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            picks = np.repeat(offsets[codes], counts) + within
+            norm = 1 - B + B * self._lengths[field] / self._avg[field]
+            term_parts.append(all_terms[picks])
+            slot_parts.append(slots)
+            weight_parts.append(boost * all_tfs[picks] / norm[slots])
+        terms = np.concatenate(term_parts) if term_parts else np.empty(0, dtype=np.int64)
+        slots = np.concatenate(slot_parts) if slot_parts else np.empty(0, dtype=np.int64)
+        pair_codes, pairs = pd.factorize(terms * max(n, 1) + slots)
+        tf = np.bincount(pair_codes, weights=np.concatenate(weight_parts) if weight_parts else None,
+                         minlength=len(pairs))
+        terms, slots = pairs // max(n, 1), pairs % max(n, 1)
+
+        doc_freq = np.bincount(terms, minlength=len(self.vocabulary))
+        self.idf = np.log(1 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+        impacts = self.idf[terms] * tf * (K1 + 1) / (tf + K1)
+        self.scale = float(impacts.max()) / 255 if len(impacts) else 1.0
+        quantized = np.maximum(1, np.rint(impacts / self.scale)).astype(np.uint8)
+
+        # impact order inside each term, cut into blocks, slots ascending inside each block
+        order = np.lexsort((slots, -quantized.astype(np.int16), terms))
+        terms, slots, quantized = terms[order], slots[order], quantized[order]
+        term_postings = np.diff(np.searchsorted(terms, np.arange(len(self.vocabulary) + 1)))
+        term_blocks = -(-term_postings // block_size)
+        self._term_blocks = np.concatenate(([0], np.cumsum(term_blocks)))  # term t owns blocks [t], [t + 1])
+        rank = np.arange(len(terms)) - np.repeat(np.cumsum(term_postings) - term_postings, term_postings)
+        block_of = np.repeat(self._term_blocks[:-1], term_postings) + rank // block_size
+        order = np.lexsort((slots, block_of))
+        slots, quantized = slots[order], quantized[order]
+        block_start = np.searchsorted(block_of[order], np.arange(int(self._term_blocks[-1]) + 1))
+        gaps = slots - np.concatenate(([0], slots[:-1]))
+        gaps[block_start[:-1]] = slots[block_start[:-1]]  # every block restarts from 0, so it decodes alone
+        varints = encode_varints(gaps)
+
+        self._postings = varints                                 # all blocks back to back
+        self._impacts = quantized                                # one byte per posting, same order
+        self._block_postings = block_start
+        self._block_bytes = np.concatenate(([0], np.flatnonzero(varints < 0x80) + 1))[block_start]
+        self._block_max = (np.maximum.reduceat(quantized, block_start[:-1]) if len(block_start) > 1
+                           else np.empty(0, dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def memory_bytes(self) -> int:
+        return (self._postings.nbytes + self._impacts.nbytes + self._block_bytes.nbytes
+                + self._block_postings.nbytes + self._block_max.nbytes + self.idf.nbytes)
+
+    def _block(self, b: int):
+        gaps = decode_varints(self._postings[self._block_bytes[b]:self._block_bytes[b + 1]])
+        return np.cumsum(gaps), self._impacts[self._block_postings[b]:self._block_postings[b + 1]]
+
+    def _impact(self, term: str, slot: int) -> int:
+        """Quantized impact of `term` for one movie, recomputed from its fields (same formula as the build)."""
+        tf = 0.0
+        for field, boost in self.boosts.items():
+            count = self._tokens[field][self._codes[field][slot]].count(term)
+            if count:
+                tf += boost * count / (1 - B + B * self._lengths[field][slot] / self._avg[field])
+        if not tf:
+            return 0
+        impact = self.idf[self.vocabulary[term]] * tf * (K1 + 1) / (tf + K1)
+        return max(1, int(np.rint(impact / self.scale)))
+
+    def search(self, query: str, page: int = 0, page_size: int = PAGE_SIZE) -> SearchPage:
+        """One page of matches, best first (ties by catalog position)."""
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.vocabulary]
+        if not terms or page < 0:
+            return SearchPage([], [], page, False)
+        start, want = page * page_size, (page + 1) * page_size
+        ids = [self.vocabulary[t] for t in terms]
+        cursor = {t: int(self._term_blocks[t]) for t in ids}
+        end = {t: int(self._term_blocks[t + 1]) for t in ids}
+        scores = np.zeros(self.n, dtype=np.int32)
+        seen = np.zeros(self.n, dtype=bool)
+        candidates: List[np.ndarray] = []
+        read, next_check = 0, 1
+        while True:
+            bounds = {t: int(self._block_max[cursor[t]]) if cursor[t] < end[t] else 0 for t in ids}
+            remaining = sum(bounds.values())
+            if remaining == 0:
+                break
+            if read == next_check:
+                # checking costs a pass over the candidates, so only after 1, 2, 4, 8, ... blocks
+                if self._settled(scores, candidates, start, want, remaining):
+                    break
+                next_check *= 2
+            t = max(bounds, key=bounds.get)
+            slots, impacts = self._block(cursor[t])
+            scores[slots] += impacts
+            fresh = slots[~seen[slots]]
+            seen[fresh] = True
+            candidates.append(fresh)
+            cursor[t] += 1
+            read += 1
+
+        candidates = np.concatenate(candidates)
+        top = candidates[np.lexsort((candidates, -scores[candidates]))[:want + 1]]
+        # skipped blocks cannot change which movies these are, only their scores: complete those
+        shown = top[:want]
+        exact = np.array([sum(self._impact(t, int(s)) for t in terms) for s in shown], dtype=np.int64)
+        order = np.lexsort((shown, -exact))[start:]
+        has_more = len(top) > want or remaining > 0
+        return SearchPage(shown[order].tolist(), (exact[order] * self.scale).round(3).tolist(), page, has_more)
+
+    @staticmethod
+    def _settled(scores: np.ndarray, candidates: Sequence[np.ndarray], start: int, want: int,
+                 remaining: int) -> bool:
+        """True when no movie can cross the page boundaries any more, whatever the unread blocks add.
+
+        A movie gains at most `remaining` from them, so the top `want` (and the top `start`) are
+        final once the score gap at that position is larger than `remaining`.
+        """
+        count = sum(map(len, candidates))
+        if count <= want:
+            return False
+        found = scores[np.concatenate(candidates)]
+        ordered = -np.sort(-np.partition(found, count - want - 1)[count - want - 1:])
+        for line in (start, want):
+            if line and ordered[line - 1] - ordered[line] <= remaining:
+                return False
+        return True
@@ -0,0 +1,396 @@
+"""
+Precomputed top-K neighbor table for the recommendation pages.
+
+Offline job: vectorizes every movie with the same genre + director TF-IDF the
+apps use for recommendations, keeps the K most similar movies per title and
+writes them to dbo.movie_neighbors (clustered on movie_id, rank). The pages
+then read a movie's neighbors with one index seek instead of pulling the
+whole catalog and vectorizing inside the request.
+
+Single edits do not need the full job: update_neighbors(cnxn, [movie_id])
+recomputes the edited movies' lists and patches only the other lists the
+edit can affect (see its docstring). The apps hand edited ids to a
+NeighborRefresher, which runs those patches in a background thread so a
+save never waits for the TF-IDF fit. Run the full job periodically anyway:
+patched scores use the current IDF weights while untouched ones keep those of
+their last computation.
+
+How to run (re-run after catalog changes):
+  python neighbors.py                          # dbo.movies keyed by movie_id (alter.py / bro.py / one.py)
+  python neighbors.py --table movies --id-column id   # last.py schema
+  python neighbors.py --update 12 57           # patch after edits to movies 12 and 57
+"""
+
+import argparse
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyodbc
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from similarity import top_n_indices
+
+SERVER = "localhost"
+DATABASE = "MovieDb"
+DRIVER = "{ODBC Driver 17 for SQL Server}"
+
+DEFAULT_K = 20
+NEIGHBOR_COLUMNS = frozenset({"genre", "director"})  # the text build_tfidf vectorizes
+INSERT_BATCH = 10000
+IN_BATCH = 1000  # ids per IN (...) list; SQL Server allows 2100 parameters
+
+NEIGHBORS_DDL = """
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[movie_neighbors]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE dbo.movie_neighbors (
+        movie_id INT NOT NULL,
+        rank SMALLINT NOT NULL,
+        neighbor_id INT NOT NULL,
+        score REAL NOT NULL,
+        CONSTRAINT PK_movie_neighbors PRIMARY KEY CLUSTERED (movie_id, rank)
+    );
+END
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = N'IX_movie_neighbors_neighbor'
+               AND object_id = OBJECT_ID(N'dbo.movie_neighbors'))
+    CREATE NONCLUSTERED INDEX IX_movie_neighbors_neighbor ON dbo.movie_neighbors (neighbor_id);
+"""
+
+NeighborRow = Tuple[int, int, int, float]
+
+SCORE_EPSILON = 1e-6  # stored scores are REAL
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+
+def _check_ident(name: str) -> str:
+    # table / column names are interpolated into SQL, so only plain identifiers are allowed
+    if not _IDENT_RE.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+
+# ==========================
+# Computation
+# ==========================
+def build_tfidf(df: pd.DataFrame):
+    """Genre + director TF-IDF, identical to the apps' get_recommendations."""
+    combined = df['genre'].fillna('') + " " + df['director'].fillna('')
+    vec = TfidfVectorizer(stop_words='english')
+    return vec.fit_transform(combined)
+
+
+def compute_neighbors(df: pd.DataFrame, k: int = DEFAULT_K, id_column: str = "movie_id",
+                      block_size: int = 1024) -> List[NeighborRow]:
+    """Return (movie_id, rank, neighbor_id, score) rows, rank starting at 1.
+
+    Similarities are computed one block of query rows at a time, so memory is
+    bounded by block_size x N scores rather than the full N x N matrix.
+    """
+    if df.empty:
+        return []
+    df = df.reset_index(drop=True)
+    ids = df[id_column].to_numpy()
+    tfidf = build_tfidf(df)
+    rows: List[NeighborRow] = []
+    for start in range(0, len(df), block_size):
+        block = (tfidf[start:start + block_size] @ tfidf.T).toarray()
+        for offset, scores in enumerate(block):
+            i = start + offset
+            for rank, j in enumerate(top_n_indices(scores, k, exclude=i), start=1):
+                rows.append((int(ids[i]), rank, int(ids[j]), float(scores[j])))
+    return rows
+
+
+def plan_neighbor_update(df: pd.DataFrame, changed: Iterable[int], thresholds: Dict[int, Tuple[float, int]],
+                         load_lists: Callable[[List[int]], Dict[int, List[Tuple[int, float]]]],
+                         k: int = DEFAULT_K, id_column: str = "movie_id"
+                         ) -> Tuple[Dict[int, List[Tuple[int, float]]], Dict[str, int]]:
+    """New neighbor lists after edits to the `changed` ids (inserted, updated or deleted).
+
+    `thresholds` maps every movie that has a stored list to (lowest score, list
+    length); `load_lists(ids)` returns the stored [(neighbor_id, score)] lists,
+    best first, for the ids asked for. Returns ({movie_id: new list}, counts);
+    an id mapped to [] loses its list.
+
+      * the changed movies' own lists are recomputed (one N x |changed| product)
+      * a list that references a changed movie, or that a changed movie now
+        beats the last entry of, is loaded and merged in place
+      * it is recomputed in full only when a changed movie in it scored lower
+        or was deleted, because a movie outside the stored top-K may then
+        belong in the freed slot
+    """
+    changed = {int(c) for c in changed}
+    df = df.reset_index(drop=True)
+    ids = df[id_column].to_numpy()
+    pos = {int(m): i for i, m in enumerate(ids)}
+    present = [c for c in sorted(changed) if c in pos]
+    result: Dict[int, List[Tuple[int, float]]] = {c: [] for c in changed if c not in pos and c in thresholds}
+    counts = {"changed": len(changed), "merged": 0, "recomputed": 0}
+    if df.empty:
+        return result, counts
+    tfidf = build_tfidf(df)
+    k = min(k, len(df) - 1)
+
+    def full_row(i: int) -> List[Tuple[int, float]]:
+        scores = (tfidf @ tfidf[i].T).toarray().ravel()
+        return [(int(ids[j]), float(scores[j])) for j in top_n_indices(scores, k, exclude=i)]
+
+    # column j: every movie's similarity to the j-th changed movie
+    sims = (tfidf @ tfidf[[pos[c] for c in present]].T).toarray() if present else np.zeros((len(df), 0))
+    for j, c in enumerate(present):
+        result[c] = [(int(ids[x]), float(sims[x, j])) for x in top_n_indices(sims[:, j], k, exclude=pos[c])]
+
+    def floor(movie_id: int) -> float:
+        lowest, length = thresholds[movie_id]
+        return lowest if length >= k else -np.inf
+
+    candidates = [m for m in thresholds
+                  if m not in changed and m in pos and (sims[pos[m]] > floor(m) + SCORE_EPSILON).any()]
+    stored = load_lists(candidates)  # plus every list that references a changed movie
+    for movie_id, current in stored.items():
+        if movie_id in changed or movie_id not in pos:
+            continue
+        i = pos[movie_id]
+        new_scores = {c: float(sims[i, j]) for j, c in enumerate(present)}
+        listed = {n: score for n, score in current if n in changed}
+        if any(new_scores.get(n, -np.inf) < score - SCORE_EPSILON for n, score in listed.items()):
+            result[movie_id] = full_row(i)
+            counts["recomputed"] += 1
+            continue
+        threshold = floor(movie_id)
+        merged = [(n, score) for n, score in current if n not in changed]
+        merged += [(c, score) for c, score in new_scores.items() if c in listed or score > threshold + SCORE_EPSILON]
+        merged.sort(key=lambda item: (-item[1], pos.get(item[0], len(ids))))
+        result[movie_id] = merged[:k]
+        counts["merged"] += 1
+    return result, counts
+
+
+# ==========================
+# DB access
+# ==========================
+def ensure_neighbors_table(cnxn):
+    cursor = cnxn.cursor()
+    cursor.execute(NEIGHBORS_DDL)
+    cnxn.commit()
+
+
+def write_neighbors(cnxn, rows: List[NeighborRow]):
+    """Replace the whole neighbor table in one transaction."""
+    cursor = cnxn.cursor()
+    try:
+        cursor.execute("DELETE FROM dbo.movie_neighbors")
+        cursor.fast_executemany = True
+        for start in range(0, len(rows), INSERT_BATCH):
+            cursor.executemany(
+                "INSERT INTO dbo.movie_neighbors (movie_id, rank, neighbor_id, score) VALUES (?, ?, ?, ?)",
+                rows[start:start + INSERT_BATCH],
+            )
+        cnxn.commit()
+    except Exception:
+        cnxn.rollback()
+        raise
+
+
+def fetch_neighbors(cnxn, movie_id: int, topn: int = 5, table: str = "dbo.movies",
+                    id_column: str = "movie_id") -> pd.DataFrame:
+    """Neighbor movies of `movie_id`, best first (empty frame if none were precomputed).
+
+    Also empty while the offline job has never run: the table check and the read are one batch
+    (deferred name resolution lets it compile without dbo.movie_neighbors), so callers fall back
+    to live scoring instead of failing.
+    """
+    table, id_column = _check_ident(table), _check_ident(id_column)
+    cursor = cnxn.cursor()
+    cursor.execute(f"""
+        IF OBJECT_ID(N'dbo.movie_neighbors', N'U') IS NOT NULL
+        SELECT TOP (?) m.*, n.score
+        FROM dbo.movie_neighbors n
+        JOIN {table} m ON m.{id_column} = n.neighbor_id
+        WHERE n.movie_id = ?
+        ORDER BY n.rank
+    """, (int(topn), int(movie_id)))
+    if cursor.description is None:  # no neighbor table yet: no result set
+        return pd.DataFrame()
+    columns = [c[0] for c in cursor.description]
+    return pd.DataFrame.from_records([tuple(r) for r in cursor.fetchall()], columns=columns)
+
+
+def find_movie_id_by_title(cnxn, title_partial: str, table: str = "dbo.movies",
+                           id_column: str = "movie_id"):
+    """First movie (lowest id) whose title contains `title_partial`, or None."""
+    table, id_column = _check_ident(table), _check_ident(id_column)
+    # escape LIKE wildcards so the user's text is matched literally
+    pattern = "%" + re.sub(r"([\[%_])", r"[\1]", title_partial.strip()) + "%"
+    cursor = cnxn.cursor()
+    row = cursor.execute(
+        f"SELECT TOP 1 {id_column} FROM {table} WHERE title LIKE ? ORDER BY {id_column}", (pattern,)
+    ).fetchone()
+    return int(row[0]) if row else None
+
+
+def _fetch_lists(cursor, movie_ids: List[int]) -> Dict[int, List[Tuple[int, float]]]:
+    lists: Dict[int, List[Tuple[int, float]]] = {}
+    for start in range(0, len(movie_ids), IN_BATCH):
+        batch = movie_ids[start:start + IN_BATCH]
+        cursor.execute(
+            "SELECT movie_id, neighbor_id, score FROM dbo.movie_neighbors "
+            f"WHERE movie_id IN ({', '.join('?' * len(batch))}) ORDER BY movie_id, rank",
+            batch,
+        )
+        for movie_id, neighbor_id, score in cursor.fetchall():
+            lists.setdefault(movie_id, []).append((neighbor_id, score))
+    return lists
+
+
+def update_neighbors(cnxn, movie_ids: Iterable[int], k: int = DEFAULT_K, table: str = "dbo.movies",
+                     id_column: str = "movie_id") -> Dict[str, int]:
+    """Patch dbo.movie_neighbors after edits to `movie_ids`, in one transaction.
+
+    Costs one catalog read, one TF-IDF fit and N x |movie_ids| similarities
+    instead of the full N x N job, and rewrites only the lists that change.
+    Does nothing until the table has been built by the full job.
+    """
+    table, id_column = _check_ident(table), _check_ident(id_column)
+    changed = sorted({int(m) for m in movie_ids})
+    counts = {"changed": len(changed), "merged": 0, "recomputed": 0}
+    cursor = cnxn.cursor()
+    if not changed or cursor.execute("SELECT OBJECT_ID(N'dbo.movie_neighbors', N'U')").fetchone()[0] is None:
+        return counts
+    ensure_neighbors_table(cnxn)  # adds the neighbor_id index to tables built before it existed
+    df = pd.read_sql(f"SELECT {id_column}, genre, director FROM {table}", cnxn)
+    thresholds = {
+        movie_id: (lowest, length) for movie_id, lowest, length in cursor.execute(
+            "SELECT movie_id, MIN(score), COUNT(*) FROM dbo.movie_neighbors GROUP BY movie_id"
+        ).fetchall()
+    }
+    referencing = [
+        r[0] for r in cursor.execute(
+            "SELECT DISTINCT movie_id FROM dbo.movie_neighbors "
+            f"WHERE neighbor_id IN ({', '.join('?' * len(changed))})", changed
+        ).fetchall()
+    ] if len(changed) <= IN_BATCH else list(thresholds)
+
+    def load_lists(candidates: List[int]) -> Dict[int, List[Tuple[int, float]]]:
+        return _fetch_lists(cursor, sorted(set(candidates) | set(referencing)))
+
+    lists, counts = plan_neighbor_update(df, changed, thresholds, load_lists, k=k, id_column=id_column)
+    rows = [(movie_id, rank, neighbor_id, score)
+            for movie_id, neighbors in lists.items()
+            for rank, (neighbor_id, score) in enumerate(neighbors, start=1)]
+    try:
+        cursor.fast_executemany = True
+        if lists:
+            cursor.executemany("DELETE FROM dbo.movie_neighbors WHERE movie_id = ?", [(m,) for m in lists])
+        for start in range(0, len(rows), INSERT_BATCH):
+            cursor.executemany(
+                "INSERT INTO dbo.movie_neighbors (movie_id, rank, neighbor_id, score) VALUES (?, ?, ?, ?)",
+                rows[start:start + INSERT_BATCH],
+            )
+        cnxn.commit()
+    except Exception:
+        cnxn.rollback()
+        raise
+    return counts
+
+
+class NeighborRefresher:
+    """Runs update_neighbors() off the request path.
+
+    submit() only records the ids; a daemon thread waits `delay` seconds after the first one (so a
+    burst of edits becomes one patch) and then patches them all in one update_neighbors() call.
+    A failed patch is logged and only leaves the lists stale until the next full job.
+    """
+
+    def __init__(self, connect: Callable, delay: float = 1.0, k: int = DEFAULT_K, table: str = "dbo.movies",
+                 id_column: str = "movie_id"):
+        self._connect = connect
+        self.delay = delay
+        self.k, self.table, self.id_column = k, _check_ident(table), _check_ident(id_column)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stats = {"batches": 0, "patched": 0, "errors": 0, "last_error": None}
+        self._thread = threading.Thread(target=self._run, name="neighbor-refresher", daemon=True)
+        self._thread.start()
+
+    def submit(self, movie_ids: Iterable[int]):
+        ids = {int(m) for m in movie_ids}
+        if not ids:
+            return
+        with self._lock:
+            self._pending |= ids
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.delay)
+            with self._lock:
+                ids, self._pending = sorted(self._pending), set()
+                self._wake.clear()
+            if ids:
+                self._patch(ids)
+
+    def _patch(self, ids: List[int]):
+        try:
+            cnxn = self._connect()
+            try:
+                update_neighbors(cnxn, ids, k=self.k, table=self.table, id_column=self.id_column)
+            finally:
+                cnxn.close()
+            self._stats["batches"] += 1
+            self._stats["patched"] += len(ids)
+        except Exception as e:
+            print(f"neighbor update failed: {e}")
+            self._stats["errors"] += 1
+            self._stats["last_error"] = str(e)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+
+def rebuild_neighbors(cnxn, k: int = DEFAULT_K, table: str = "dbo.movies", id_column: str = "movie_id") -> int:
+    table, id_column = _check_ident(table), _check_ident(id_column)
+    df = pd.read_sql(f"SELECT {id_column}, genre, director FROM {table}", cnxn)
+    rows = compute_neighbors(df, k=k, id_column=id_column)
+    ensure_neighbors_table(cnxn)
+    write_neighbors(cnxn, rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute top-K movie neighbors into dbo.movie_neighbors")
+    parser.add_argument("--server", default=SERVER)
+    parser.add_argument("--database", default=DATABASE)
+    parser.add_argument("--driver", default=DRIVER)
+    parser.add_argument("--table", default="dbo.movies")
+    parser.add_argument("--id-column", default="movie_id")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="neighbors kept per movie")
+    parser.add_argument("--update", type=int, nargs="+", metavar="ID",
+                        help="only patch the lists affected by edits to these ids")
+    args = parser.parse_args()
+
+    cnxn = pyodbc.connect(
+        f"DRIVER={args.driver};SERVER={args.server};DATABASE={args.database};Trusted_Connection=yes;",
+        autocommit=False,
+    )
+    try:
+        started = time.time()
+        if args.update:
+            counts = update_neighbors(cnxn, args.update, k=args.k, table=args.table, id_column=args.id_column)
+            print(f"Patched neighbor lists in {time.time() - started:.1f}s: {counts}")
+            return
+        count = rebuild_neighbors(cnxn, k=args.k, table=args.table, id_column=args.id_column)
+        print(f"Wrote {count} neighbor rows in {time.time() - started:.1f}s")
+    finally:
+        cnxn.close()
+
+
+if __name__ == "__main__":
+    main()
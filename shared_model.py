@@ -0,0 +1,111 @@
+"""
+Process-wide recommendation model with background rebuilds.
+
+One SharedModel lives in each server process (the apps create it through
+st.cache_resource), so every session reads the same fitted TF-IDF matrix
+instead of fitting its own.
+
+Readers call get(), which is a plain attribute read: the current model is an
+immutable snapshot and a rebuild replaces the reference in one assignment,
+so a reader sees either the old or the new model, never a mix, and never
+waits for a rebuild. mark_stale() (hooked to catalog.invalidate and the
+apps' write paths) only flags the model; the worker thread waits until no
+further edit has arrived for `debounce` seconds and then rebuilds once, so a
+burst of edits costs a single fit. An optional `is_current(model)` check is
+polled every `poll_interval` seconds to catch edits made by other processes.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Generic, NamedTuple, Optional, TypeVar
+
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+T = TypeVar("T")
+
+
+class TfidfModel(NamedTuple):
+    """A fitted TF-IDF matrix together with the catalog rows it was fitted on (row i <-> df.iloc[i])."""
+    df: pd.DataFrame
+    vectorizer: TfidfVectorizer
+    matrix: sparse.csr_matrix
+    version: object = None
+
+
+def fit_tfidf(df: pd.DataFrame, text: pd.Series, version=None) -> Optional[TfidfModel]:
+    """Fit on `text` (one document per row of `df`); None when the catalog is empty."""
+    if df.empty:
+        return None
+    vectorizer = TfidfVectorizer(stop_words="english")
+    matrix = vectorizer.fit_transform(text)
+    return TfidfModel(df.reset_index(drop=True), vectorizer, matrix, version)
+
+
+class SharedModel(Generic[T]):
+    def __init__(self, build: Callable[[], T], name: str = "model", debounce: float = 2.0,
+                 initial: T = None, is_current: Callable[[T], bool] = None, poll_interval: float = 30.0):
+        self._build = build
+        self.name = name
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._is_current = is_current
+        self._model: Optional[T] = initial
+        self._first_build = threading.Lock()
+        self._dirty = threading.Event()
+        self._last_mark = 0.0
+        self._stats = {"builds": 0, "failures": 0, "marks": 0, "last_build_seconds": None, "built_at": None}
+        self._thread = threading.Thread(target=self._run, name=f"{name}-rebuild", daemon=True)
+        self._thread.start()
+
+    def get(self) -> Optional[T]:
+        """Current snapshot; only the very first call in a process builds synchronously."""
+        model = self._model
+        if model is None:
+            with self._first_build:
+                if self._model is None:
+                    self._rebuild()
+                model = self._model
+        return model
+
+    def mark_stale(self):
+        """Schedule a rebuild; calls within `debounce` seconds of each other share one rebuild."""
+        self._stats["marks"] += 1
+        self._last_mark = time.monotonic()
+        self._dirty.set()
+
+    def _rebuild(self):
+        started = time.time()
+        try:
+            model = self._build()
+        except Exception as e:
+            self._stats["failures"] += 1
+            print(f"{self.name}: rebuild failed, keeping the previous model: {e}")
+            return
+        self._model = model  # single reference swap: readers see old or new, never a mix
+        self._stats["builds"] += 1
+        self._stats["last_build_seconds"] = round(time.time() - started, 3)
+        self._stats["built_at"] = started
+
+    def _run(self):
+        while True:
+            if not self._dirty.wait(self.poll_interval):
+                model = self._model
+                try:
+                    if self._is_current is not None and model is not None and not self._is_current(model):
+                        self.mark_stale()
+                except Exception as e:
+                    print(f"{self.name}: staleness check failed: {e}")
+                continue
+            # coalesce: wait for a quiet period with no new edits
+            while True:
+                quiet = self._last_mark + self.debounce - time.monotonic()
+                if quiet <= 0:
+                    break
+                time.sleep(quiet)
+            self._dirty.clear()  # edits arriving during the build set it again -> one more rebuild
+            self._rebuild()
+
+    def stats(self) -> Dict:
+        return dict(self._stats, pending=self._dirty.is_set())
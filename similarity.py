@@ -0,0 +1,43 @@
+"""
+Shared similarity helpers for the TF-IDF recommenders.
+
+Only the query row is ever computed (a sparse vector x matrix product), so
+memory stays proportional to the TF-IDF non-zeros plus one score per movie
+instead of a dense N x N cosine matrix.
+"""
+
+import numpy as np
+
+
+def similarity_row(tfidf_matrix, idx: int) -> np.ndarray:
+    """Cosine scores of row `idx` against every row (TF-IDF rows are L2-normalised)."""
+    return np.asarray((tfidf_matrix @ tfidf_matrix[idx].T).todense()).ravel()
+
+
+def top_n_indices(scores: np.ndarray, n: int, exclude=None) -> np.ndarray:
+    """Positions of the `n` highest scores, best first, ties broken by position.
+
+    Uses a partial selection (np.partition) so the cost is O(N) rather than a
+    full sort of every candidate.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if exclude is not None:
+        scores = scores.copy()
+        scores[exclude] = -np.inf
+        n = min(n, len(scores) - np.size(exclude))
+    n = min(n, len(scores))
+    if n <= 0:
+        return np.array([], dtype=int)
+    cut = len(scores) - n
+    kth = np.partition(scores, cut)[cut]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: n - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
+def most_similar(tfidf_matrix, idx: int, top_n: int = 5):
+    """Return (positions, scores) of the `top_n` rows most similar to row `idx`, excluding itself."""
+    scores = similarity_row(tfidf_matrix, idx)
+    positions = top_n_indices(scores, top_n, exclude=idx)
+    return positions, scores[positions]
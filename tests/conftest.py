@@ -0,0 +1,58 @@
+import os
+import sys
+
+# the modules live at the repository root (no package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class RecordingConnection:
+    """Stand-in for a DB-API connection: records statements, answers queries from `results`.
+
+    `results` is a list of row lists handed out, in order, to the execute() calls that fetch.
+    """
+
+    def __init__(self, results=None, fail_on=None):
+        self.results = list(results or [])
+        self.fail_on = fail_on       # substring of a statement that raises
+        self.statements = []         # (sql, params) for execute, (sql, [rows]) for executemany
+        self.commits = self.rollbacks = self.closes = 0
+        self.autocommit = False
+        self.fast_executemany = False
+        self.description = None
+        self._rows = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self._record(sql, params)
+        self._rows = self.results.pop(0) if self.results else []
+        return self
+
+    def executemany(self, sql, rows):
+        self._record(sql, list(rows))
+
+    def _record(self, sql, params):
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"failed: {self.fail_on}")
+        self.statements.append((" ".join(sql.split()), params))
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closes += 1
@@ -0,0 +1,60 @@
+import datetime as dt
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from catalog_browser import fetch_keyset_page, keyset_predicate  # noqa: E402
+from conftest import RecordingConnection  # noqa: E402
+
+
+def test_predicate_on_the_key_only():
+    assert keyset_predicate("movie_id", "movie_id", False, (10, 10, None)) == ("movie_id > ?", [10])
+
+
+def test_predicate_breaks_ties_on_the_key():
+    sql, params = keyset_predicate("imdb_rating", "movie_id", True, (7.5, 42, None))
+    assert sql == "(imdb_rating < ? OR (imdb_rating = ? AND movie_id < ?) OR imdb_rating IS NULL)"
+    assert params == [7.5, 7.5, 42]
+
+
+def test_predicate_after_a_null_sort_value():
+    assert keyset_predicate("imdb_rating", "movie_id", False, (None, 5, None)) == (
+        "((imdb_rating IS NULL AND movie_id > ?) OR imdb_rating IS NOT NULL)", [5])
+    assert keyset_predicate("imdb_rating", "movie_id", True, (None, 5, None)) == (
+        "(imdb_rating IS NULL AND movie_id < ?)", [5])
+
+
+def test_datetime_cursors_cast_back_to_the_column_type():
+    sql, _ = keyset_predicate("added_at", "id", False, (dt.datetime(2024, 1, 1), 3, "DATETIME"))
+    assert sql == "(added_at > CAST(? AS DATETIME) OR (added_at = CAST(? AS DATETIME) AND id > ?))"
+
+
+def test_page_and_next_cursor():
+    cnxn = RecordingConnection(results=[[(1, "Alien", 8.5), (2, "Heat", 8.3), (3, "Up", 8.3)]])
+    page, cursor = fetch_keyset_page(cnxn, "movies", "movie_id", ["movie_id", "title"], "imdb_rating",
+                                     descending=True, page_size=2)
+    assert page["title"].tolist() == ["Alien", "Heat"]
+    assert cursor == (8.3, 2, None)
+    sql, params = cnxn.statements[0]
+    assert sql.endswith("ORDER BY imdb_rating DESC, movie_id DESC") and params == [3]
+
+
+def test_a_datetime_cursor_remembers_the_column_type():
+    added = [dt.datetime(2024, 1, 1, 10, 0, 0, 3000), dt.datetime(2024, 1, 2)]
+    cnxn = RecordingConnection(results=[[(1, added[0]), (2, added[1])], [("datetime",)]])
+    _, cursor = fetch_keyset_page(cnxn, "movies", "movie_id", ["movie_id"], "created_at", page_size=1)
+    assert cursor == (added[0], 1, "DATETIME")
+    assert type(cursor[0]) is dt.datetime  # not a pandas Timestamp
+    assert cnxn.statements[1][1] == ("movies", "created_at")
+
+
+def test_last_page_has_no_cursor():
+    cnxn = RecordingConnection(results=[[(1, "Alien")]])
+    _, cursor = fetch_keyset_page(cnxn, "movies", "movie_id", ["movie_id", "title"], page_size=2)
+    assert cursor is None
+
+
+def test_identifiers_are_checked():
+    with pytest.raises(ValueError):
+        fetch_keyset_page(RecordingConnection(), "movies; DROP TABLE users", "movie_id", ["title"])
@@ -0,0 +1,64 @@
+import threading
+
+from catalog_cache import CatalogCache
+
+
+def test_a_hit_does_not_reload():
+    cache, calls = CatalogCache(), []
+    assert cache.get("movies", lambda: calls.append(1) or "rows") == "rows"
+    assert cache.get("movies", lambda: calls.append(1) or "other") == "rows"
+    assert (len(calls), cache.hits, cache.misses) == (1, 1, 1)
+
+
+def test_expired_entries_reload():
+    cache = CatalogCache(ttl=0)
+    cache.get("movies", lambda: "old")
+    assert cache.get("movies", lambda: "new") == "new"
+
+
+def test_invalidate_drops_every_entry():
+    cache = CatalogCache()
+    cache.get("movies", lambda: "old")
+    cache.invalidate()
+    assert cache.get("movies", lambda: "new") == "new"
+
+
+def test_subscribers_see_the_new_generation():
+    cache, heard = CatalogCache(), []
+    cache.subscribe(lambda: heard.append(cache.generation))
+    cache.invalidate()
+    cache.invalidate()
+    assert heard == [1, 2]
+
+
+def test_a_load_overlapping_a_write_is_not_cached():
+    cache = CatalogCache()
+
+    def load_during_write():
+        cache.invalidate()  # a write lands while the rows are being read
+        return "stale"
+
+    assert cache.get("movies", load_during_write) == "stale"  # the caller still gets its rows
+    assert cache.get("movies", lambda: "fresh") == "fresh"
+
+
+def test_one_loader_per_key():
+    cache, calls, started = CatalogCache(), [], threading.Event()
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "rows"
+
+    first = threading.Thread(target=cache.get, args=("movies", slow))
+    first.start()
+    started.wait(5)
+    second_result = []
+    second = threading.Thread(target=lambda: second_result.append(cache.get("movies", slow)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert calls == [1] and second_result == ["rows"]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from catalog_store import CatalogStore
+
+
+def movies():
+    return pd.DataFrame({
+        "movie_id": [10, 11, 12, 13],
+        "title": ["Alien", "Heat", "Up", "Tenet"],
+        "release_year": [1979, None, 2009, 2020],
+        "genre": ["Sci-Fi", "Crime", None, "Sci-Fi"],
+        "director": ["Scott", "Mann", "Docter", "Nolan"],
+        "imdb_rating": [8.5, 8.3, None, 7.3],
+        "duration_minutes": [117, 170, 96, None],
+    })
+
+
+def test_frame_round_trip():
+    df = movies()
+    frame = CatalogStore.from_frame(df).frame()
+    assert list(frame.columns) == list(df.columns)
+    assert frame["title"].tolist() == df["title"].tolist()
+    assert frame["genre"].astype(str).tolist() == ["Sci-Fi", "Crime", "", "Sci-Fi"]  # missing text is ""
+    assert frame["release_year"].tolist() == [1979, pd.NA, 2009, 2020]
+    assert frame["duration_minutes"].isna().tolist() == [False, False, False, True]
+    assert np.allclose(frame["imdb_rating"].astype(float), df["imdb_rating"].astype(float), equal_nan=True)
+
+
+def test_compact_columns():
+    store = CatalogStore.from_frame(movies())
+    assert store.values("movie_id").dtype == np.int32
+    assert store.values("release_year").dtype == np.int16
+    assert store.values("imdb_rating").dtype == np.float32
+    assert store.codes("genre").dtype == np.int8
+    assert store.categories("genre")[store.codes("genre")].tolist() == ["Sci-Fi", "Crime", "", "Sci-Fi"]
+    assert store.missing("release_year").tolist() == [False, True, False, False]
+    assert store.missing("imdb_rating").tolist() == [False, False, True, False]
+
+
+def test_frame_is_a_view_over_the_store():
+    store = CatalogStore.from_frame(movies())
+    assert store.frame() is store.frame()
+    assert np.shares_memory(store.frame()["movie_id"].to_numpy(), store.values("movie_id"))
+
+
+def test_categorical_input_reuses_its_codes():
+    df = movies().astype({"genre": "category"})
+    store = CatalogStore.from_frame(df)
+    assert store.categories("genre")[store.codes("genre")].tolist() == ["Sci-Fi", "Crime", "", "Sci-Fi"]
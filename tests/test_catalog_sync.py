@@ -0,0 +1,53 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from catalog_sync import _normalize_row, fetch_fingerprints, fingerprint, plan_sync  # noqa: E402
+from conftest import RecordingConnection  # noqa: E402
+
+DUMP = """movie_id,title,release_year,genre,director,imdb_rating,language,duration_minutes
+1,Alien,1979,Sci-Fi,Ridley Scott,8.5,English,117
+2,Heat,1995,Crime,Michael Mann,8.4,English,170
+3,Up,2009,Animation,Pete Docter,8.3,English,96
+5,Tenet,2020,Sci-Fi,Christopher Nolan,7.3,English,150
+5,Tenet again,2020,Sci-Fi,Christopher Nolan,7.3,English,150
+x,Broken,2020,Sci-Fi,Someone,7.0,English,100
+"""
+
+DB_ROWS = {
+    1: ("Alien", 1979, "Sci-Fi", "Ridley Scott", Decimal("8.5"), "English", 117),
+    2: ("Heat", 1995, "Crime", "Michael Mann", Decimal("8.3"), "English", 170),
+    3: ("Up", 2009, "Animation", "Pete Docter", Decimal("8.3"), "English", 96),
+    4: ("Gone", 2000, "Drama", "Someone", None, "English", 90),
+}
+
+
+def current():
+    return fetch_fingerprints(RecordingConnection(results=[[(movie_id,) + row for movie_id, row in DB_ROWS.items()]]))
+
+
+def test_blank_text_and_decimal_ratings_fingerprint_alike():
+    assert fingerprint(_normalize_row(("Up", 2009, "", "Pete Docter", Decimal("8.3"), " ", 96))) == \
+        fingerprint(_normalize_row(("Up", 2009, None, "Pete Docter", 8.3, None, 96)))
+
+
+def test_plan_keeps_only_the_delta():
+    plan = plan_sync(io.StringIO(DUMP), current())
+    assert sorted(plan.upserts) == [2, 5]  # Heat's rating changed, Tenet is new
+    assert (plan.inserted, plan.updated, plan.unchanged) == (1, 1, 2)
+    assert plan.deletes == [4]
+    assert plan.upserts[2][4] == 8.4
+    assert [s["reason"] for s in plan.rejected_samples] == ["duplicate movie_id",
+                                                            "movie_id is not a positive whole number"]
+
+
+def test_keep_missing_never_deletes():
+    assert plan_sync(io.StringIO(DUMP), current(), keep_missing=True).deletes == []
+
+
+def test_a_dump_without_ids_is_refused():
+    with pytest.raises(ValueError):
+        plan_sync(io.StringIO("title,genre\nAlien,Sci-Fi\n"), current())
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from change_feed import ChangeFeed
+
+
+def version(n):
+    return n.to_bytes(8, "big")
+
+
+class ChangeLog:
+    """dbo.movies_changes in memory: (row_version, movie_id, operation) rows plus MIN_ACTIVE_ROWVERSION()."""
+
+    def __init__(self):
+        self.rows = []
+        self.min_active = 1
+        self.feed_thread_polled = threading.Event()
+
+    def write(self, movie_id, operation, committed=True):
+        n = max([int.from_bytes(v, "big") for v, _, _ in self.rows] + [self.min_active - 1]) + 1
+        self.rows.append((version(n), movie_id, operation))
+        if committed:
+            self.commit()
+
+    def commit(self):
+        self.min_active = max(int.from_bytes(v, "big") for v, _, _ in self.rows) + 1
+
+    def connect(self):
+        if threading.current_thread().name == "movies-change-feed":
+            self.feed_thread_polled.set()
+        return LogConnection(self)
+
+
+class LogConnection:
+    autocommit = True
+
+    def __init__(self, log):
+        self.log = log
+        self._rows = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        if "MIN_ACTIVE_ROWVERSION()" in sql and "FROM" not in sql:
+            self._rows = [(version(self.log.min_active),)]
+        else:
+            low, high = params
+            self._rows = [(m, op) for v, m, op in self.log.rows if low <= v < high]
+        return self
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+def started_feed(log):
+    feed = ChangeFeed(log.connect, poll_interval=60)
+    assert log.feed_thread_polled.wait(5)
+    with feed._poll_lock:  # the thread's first poll (which sets the start position) is over
+        pass
+    return feed
+
+
+def test_history_is_not_replayed():
+    log = ChangeLog()
+    log.write(1, "I")
+    feed = started_feed(log)
+    assert feed.poll() == {}
+
+
+def test_changes_are_published_once_with_the_last_operation():
+    log = ChangeLog()
+    feed = started_feed(log)
+    heard = []
+    feed.subscribe(heard.append)
+    log.write(7, "I")
+    log.write(7, "U")
+    log.write(8, "D")
+    assert feed.catch_up()
+    assert heard == [{7: "U", 8: "D"}]
+    assert not feed.catch_up()
+    assert heard == [{7: "U", 8: "D"}]
+
+
+def test_an_open_transaction_is_picked_up_after_it_commits():
+    log = ChangeLog()
+    feed = started_feed(log)
+    log.write(1, "U", committed=False)   # older version, its transaction still open
+    log.write(2, "U", committed=False)   # newer version; MIN_ACTIVE_ROWVERSION() stays at the open one
+    assert feed.poll() == {}
+    log.commit()
+    assert feed.poll() == {1: "U", 2: "U"}
+
+
+def test_catch_up_reports_errors_instead_of_raising():
+    log = ChangeLog()
+    feed = started_feed(log)
+    feed._connect = lambda: (_ for _ in ()).throw(RuntimeError("no log table"))
+    assert feed.catch_up() is False
+    assert feed.stats()["last_error"] == "no log table"
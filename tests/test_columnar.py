@@ -0,0 +1,40 @@
+import datetime as dt
+from decimal import Decimal
+
+import numpy as np
+
+from columnar import MOVIE_SCHEMA, fetch_frame
+from conftest import RecordingConnection
+
+ROWS = [
+    (1, "Alien", 1979, "Sci-Fi", "Ridley Scott", Decimal("8.5"), "English", 117, dt.datetime(2024, 1, 1)),
+    (2, "Heat", None, "Crime", "Michael Mann", None, "English", None, None),
+    (3, "Up", 2009, None, "Pete Docter", Decimal("8.3"), "English", 96, dt.datetime(2024, 1, 2)),
+    (4, "Tenet", 2020, "Sci-Fi", "Christopher Nolan", Decimal("7.3"), "English", 150, dt.datetime(2024, 1, 3)),
+]
+
+
+def test_typed_columns_across_blocks():
+    df = fetch_frame(RecordingConnection(results=[ROWS]), "SELECT ...", block_size=3)
+    assert list(df.columns) == list(MOVIE_SCHEMA)
+    assert df["movie_id"].dtype == np.int32
+    assert df["release_year"].dtype == "Int16" and df["release_year"].isna().tolist() == [False, True, False, False]
+    assert df["imdb_rating"].dtype == np.float32 and np.isnan(df["imdb_rating"][1])
+    # categories are shared across blocks; NULL becomes ""
+    assert df["genre"].astype(str).tolist() == ["Sci-Fi", "Crime", "", "Sci-Fi"]
+    assert list(df["genre"].cat.categories) == ["Sci-Fi", "Crime", ""]
+    assert df["created_at"].isna().tolist() == [False, True, False, False]
+
+
+def test_empty_result_keeps_the_schema():
+    df = fetch_frame(RecordingConnection(), "SELECT ...")
+    assert len(df) == 0 and list(df.columns) == list(MOVIE_SCHEMA)
+    assert df["movie_id"].dtype == np.int32
+
+
+def test_params_are_passed_through():
+    cnxn = RecordingConnection(results=[[(1, "Alien")]])
+    df = fetch_frame(cnxn, "SELECT movie_id, title FROM movies WHERE genre = ?", ("Sci-Fi",),
+                     schema={"movie_id": "int32", "title": "string"})
+    assert df.to_dict("records") == [{"movie_id": 1, "title": "Alien"}]
+    assert cnxn.statements == [("SELECT movie_id, title FROM movies WHERE genre = ?", ("Sci-Fi",))]
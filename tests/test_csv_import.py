@@ -0,0 +1,86 @@
+import io
+
+import pandas as pd
+import pytest
+
+from conftest import RecordingConnection
+from csv_import import import_movies_csv, movie_rows, read_chunks, validate_chunk
+
+HEADER_CSV = """Title,Genre,release_year,imdb_rating,director,language,duration_minutes
+Alien,Sci-Fi,1979,8.5,Ridley Scott,English,117
+,Drama,2001,7.0,Nobody,English,100
+Heat,Crime,19x5,8.3,Michael Mann,English,170
+Up,  ,2009,11,Pete Docter,English,96
+Tenet,Sci-Fi,2020,,Christopher Nolan,English,150
+"""
+
+EXPORT_CSV = """1,Alien,1979,Sci-Fi,Ridley Scott,8.5,English,117,2024-01-01 10:00:00
+2,Heat,1995,Crime,Michael Mann,8.3,English,170,2024-01-01 10:00:00
+"""
+
+
+def imported(source, **kwargs):
+    connections = []
+
+    def connect():
+        connections.append(RecordingConnection())
+        return connections[-1]
+
+    report = import_movies_csv(source, connect, **kwargs)
+    return report, [row for c in connections for _, batch in c.statements for row in batch], connections
+
+
+def test_headerless_export_layout_and_binary_files_stay_open():
+    source = io.BytesIO(EXPORT_CSV.encode("utf-8"))
+    _, rows, _ = imported(source)
+    assert [row[0] for row in rows] == ["Alien", "Heat"]
+    assert rows[1][3] == "Michael Mann"
+    assert not source.closed
+
+
+def test_unknown_layout_is_refused():
+    with pytest.raises(ValueError):
+        imported(io.StringIO("a,b\n1,2\n"))
+
+
+def test_chunks_are_indexed_by_file_line():
+    chunk = next(read_chunks(io.StringIO(HEADER_CSV)))
+    assert chunk.loc[2, "title"] == "Alien"
+    assert "genre" in chunk.columns  # header names are lower-cased
+
+
+def test_validation_reasons_and_coercion():
+    chunk = pd.DataFrame({
+        "title": ["Alien", "", "Heat", "Up", "Tenet"],
+        "release_year": ["1979", "2001", "19x5", "2009", "2020"],
+        "imdb_rating": ["8.5", "7.0", "8.3", "11", ""],
+        "genre": ["Sci-Fi", "Drama", "Crime", "  ", "Sci-Fi"],
+    }, index=[2, 3, 4, 5, 6])
+    clean, reasons = validate_chunk(chunk)
+    assert reasons.to_dict() == {
+        3: "title is required",
+        4: "release_year is not a number",
+        5: "imdb_rating outside 0.0..10.0",
+    }
+    assert clean.index.tolist() == [2, 6]
+    assert clean.loc[6, "imdb_rating"] != clean.loc[6, "imdb_rating"]  # blank -> NaN
+    assert clean["director"].isna().all()  # missing columns are empty
+
+
+def test_import_inserts_each_chunk_in_its_own_transaction():
+    seen = []
+    report, rows, connections = imported(io.StringIO(HEADER_CSV), chunk_size=2,
+                                         progress=lambda *args: seen.append(args[:3]))
+    assert (report.rows_read, report.inserted, report.rejected) == (5, 2, 3)
+    assert [line["line"] for line in report.rejected_samples] == [3, 4, 5]
+    assert seen == [(2, 1, 1), (4, 1, 3), (5, 2, 3)]
+    assert rows == [("Alien", 1979, "Sci-Fi", "Ridley Scott", 8.5, "English", 117),
+                    ("Tenet", 2020, "Sci-Fi", "Christopher Nolan", None, "English", 150)]
+    assert all(c.commits == 1 and c.closes == 1 for c in connections)
+
+
+
+def test_empty_text_cells_become_none():
+    chunk = next(read_chunks(io.StringIO("title,genre,director,language\nUp,,Pete Docter,\n")))
+    clean, _ = validate_chunk(chunk)
+    assert movie_rows(clean) == [("Up", None, None, "Pete Docter", None, None, None)]
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from conftest import RecordingConnection  # noqa: E402
+from db_pool import ConnectionPool, PoolTimeoutError  # noqa: E402
+
+
+class RecordingPool(ConnectionPool):
+    def _connect(self):
+        return RecordingConnection()
+
+
+def test_close_returns_the_connection_rolled_back():
+    pool = RecordingPool("dsn", max_size=2)
+    first = pool.acquire()
+    raw = first._cnxn
+    first.close()
+    assert raw.rollbacks == 1 and raw.closes == 0
+    second = pool.acquire()
+    assert second._cnxn is raw
+    assert pool.stats()["created"] == 1
+    second.close()
+
+
+def test_checkout_times_out_when_every_connection_is_in_use():
+    pool = RecordingPool("dsn", max_size=1)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(timeout=0.05)
+    held.close()
+    with pool.acquire(timeout=0.05):
+        assert pool.stats()["in_use"] == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_a_failed_connect_frees_its_slot():
+    class Broken(ConnectionPool):
+        def _connect(self):
+            raise RuntimeError("server down")
+
+    pool = Broken("dsn", max_size=1)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pool.acquire(timeout=0.05)
+    assert pool.stats()["open"] == 0
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from facet_index import FacetIndex, genre_tokens
+from movie_filters import ALL, MovieFilterStore
+
+RATINGS = [None, 0.0, 0.9, 1.0, 4.9, 5.0, 5.05, 5.1, 7.3, 9.9, 9.95, 10.0, 10.0, 2.5]
+
+
+@pytest.fixture
+def movies():
+    n = len(RATINGS)
+    genres = ["Drama", "Action, Drama", "comedy", "Sci-Fi/Action", None, "Drama", "Comedy", "Horror",
+              "Action", "Drama", "Sci-Fi", "Action, Comedy", "Drama", "Romance, Drama"]
+    languages = ["English", "english", "French", None, "Korean", "English", "French", "English", "Korean",
+                 "English", "French", "English", "Korean", "English"]
+    return pd.DataFrame({
+        "movie_id": np.arange(1, n + 1),
+        "title": [f"Movie {i}" for i in range(n)],
+        "genre": genres,
+        "language": languages,
+        "imdb_rating": RATINGS,
+        "release_year": 2000 + np.arange(n),
+        "duration_minutes": 90 + np.arange(n),
+    })
+
+
+def test_genre_tokens_split_on_commas_and_slashes():
+    assert genre_tokens("Sci-Fi/Action, Drama ") == ["Sci-Fi", "Action", "Drama"]
+    assert genre_tokens("") == []
+
+
+@pytest.mark.parametrize("threshold", [-1.0, 0.0, 0.95, 1.0, 4.9, 5.0, 5.05, 5.06, 9.9, 9.95, 10.0, 11.0])
+def test_rating_cut_matches_a_scan(movies, threshold):
+    index = FacetIndex(movies)
+    ratings = movies["imdb_rating"].astype("float32").to_numpy()
+    expected = np.flatnonzero(ratings >= np.float32(threshold))  # NaN never qualifies
+    assert index.rows(index.rating_at_least(threshold)).tolist() == expected.tolist()
+
+
+def test_no_threshold_means_no_restriction(movies):
+    index = FacetIndex(movies)
+    assert index.rating_at_least(None) is None
+    assert index.count(index.match()) == len(movies)
+
+
+def test_values_are_case_insensitive_and_shown_with_the_first_spelling(movies):
+    index = FacetIndex(movies)
+    assert index.values("genre") == ["Action", "comedy", "Drama", "Horror", "Romance", "Sci-Fi"]
+    assert index.values("language") == ["English", "French", "Korean"]
+    assert index.rows(index.any_of("genre", ["COMEDY"])).tolist() == [2, 6, 11]
+
+
+def test_counts_within_a_selection(movies):
+    index = FacetIndex(movies)
+    english = index.any_of("language", ["English"])
+    counts = index.counts("genre", within=english)
+    frame = movies[movies["language"].str.casefold() == "english"]
+    for value, count in counts.items():
+        assert count == sum(value.casefold() in [g.casefold() for g in genre_tokens(v)]
+                            for v in frame["genre"].dropna())
+
+
+def test_filter_store_options_and_counts_share_one_snapshot(movies):
+    store = MovieFilterStore(movies)
+    counts = store.facet_counts("genre", language="English", min_rating=5.0)
+    assert list(counts) == store.facets.values("genre")
+    for genre, count in counts.items():
+        _, total = store.filter(genre=genre, language="English", min_rating=5.0)
+        assert total == count
+
+
+def test_filter_sorts_and_pages(movies):
+    store = MovieFilterStore(movies)
+    page, total = store.filter(genre="Drama", min_rating=1.0, order_by="imdb_rating", descending=True,
+                               limit=2, offset=1)
+    drama = movies[movies["genre"].fillna("").str.contains("Drama") & (movies["imdb_rating"] >= 1.0)]
+    assert total == len(drama)
+    assert page["movie_id"].tolist() == drama.sort_values("imdb_rating", ascending=False)["movie_id"].tolist()[1:3]
+    with pytest.raises(ValueError):
+        store.filter(order_by="password_hash")
+    assert store.filter(genre=ALL, language=ALL)[1] == len(movies)
+
+
+def test_set_rows_grows_the_bitmaps_and_keeps_the_rating_cut_exact(movies):
+    index = FacetIndex(movies)
+    new = {slot: {"genre": "Drama", "language": "Hindi", "imdb_rating": slot / 5} for slot in range(14, 40)}
+    index.set_rows({**new, 0: None, 3: {"genre": "Drama", "imdb_rating": 9.9}})
+    ratings = np.concatenate([movies["imdb_rating"].astype("float32").to_numpy(),
+                              np.float32([slot / 5 for slot in new])])
+    ratings[[0, 3]] = [np.nan, 9.9]
+    for threshold in (0.0, 5.0, 5.05, 7.3, 9.9, 10.0):
+        assert index.rows(index.rating_at_least(threshold)).tolist() == \
+            np.flatnonzero(ratings >= np.float32(threshold)).tolist()
+    assert index.count(index.any_of("language", ["hindi"])) == 26
+    assert index.count(index.everything) == 39
+
+
+def test_patched_store_matches_a_fresh_build(movies):
+    store = MovieFilterStore(movies)
+    edited = movies.set_index("movie_id")
+    changes = {
+        2: dict(edited.loc[2], genre="Western", language="Spanish", imdb_rating=6.0),  # update
+        7: None, 14: None,                                                              # deletes
+        15: dict(edited.loc[3], title="New", genre="Drama, Western", imdb_rating=9.95),  # insert
+        16: dict(edited.loc[3], title="Unrated", genre="horror", imdb_rating=None),
+    }
+    store.apply(changes)
+    for key, row in changes.items():
+        if row is None:
+            edited = edited.drop(key)
+        else:
+            edited.loc[key] = row
+    fresh = MovieFilterStore(edited.reset_index())
+
+    assert len(store) == len(fresh)
+    assert store.facets.values("language") == fresh.facets.values("language")
+    assert store.facets.values("genre") == fresh.facets.values("genre")
+    assert "Romance" not in store.facets.values("genre")  # its only movie was deleted
+    for facet in ("genre", "language"):
+        assert store.facet_counts(facet, min_rating=5.0) == fresh.facet_counts(facet, min_rating=5.0)
+    for threshold in (None, 0.0, 5.05, 6.0, 9.95, 10.0):
+        for order_by in ("imdb_rating", "title"):
+            page, total = store.filter(min_rating=threshold, order_by=order_by, descending=True)
+            expected, expected_total = fresh.filter(min_rating=threshold, order_by=order_by, descending=True)
+            assert total == expected_total
+            assert page["movie_id"].tolist() == expected["movie_id"].tolist()
+    page, _ = store.filter(genre="western", order_by="movie_id")
+    assert page["title"].tolist() == ["Movie 1", "New"]
+    assert page["imdb_rating"].dtype == fresh.df["imdb_rating"].dtype  # patched rows keep the column types
+
+
+def test_store_reloads_once_enough_rows_are_patched(movies, monkeypatch):
+    monkeypatch.setattr("movie_filters.COMPACT_AFTER", 3)
+    store = MovieFilterStore(movies, version=1)
+    store.apply({key: None for key in range(1, 11)}, version=2)
+    assert (len(store.df), len(store), store.version) == (4, 4, 2)
+    assert store.filter(order_by="movie_id")[0]["movie_id"].tolist() == [11, 12, 13, 14]
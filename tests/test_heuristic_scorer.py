@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from heuristic_scorer import HeuristicScorer, split_genres
+
+
+def catalog(n=400, seed=11):
+    rng = np.random.default_rng(seed)
+    genres = ["Action", "Drama", "Comedy, Drama", "Sci-Fi/Action", "Horror", None]
+    directors = ["Nolan", "nolan ", "Scott", "Mann", None, ""]
+    return pd.DataFrame({
+        "movie_id": np.arange(1, n + 1),
+        "title": [f"Movie {i}" for i in range(n)],
+        "release_year": rng.choice([1970, 1985, 1999, 2003, 2010, 2020, None], size=n),
+        "genre": rng.choice(genres, size=n),
+        "director": rng.choice(directors, size=n),
+        "imdb_rating": rng.choice([5.5, 6.1, 7.3, 8.0, 8.8, None], size=n),
+        "language": "English",
+    })
+
+
+def test_split_genres():
+    assert split_genres("Sci-Fi/Action, drama") == ["sci-fi", "action", "drama"]
+
+
+@pytest.mark.parametrize("limit", [1, 8, 30])
+def test_partial_selection_matches_a_full_sort(limit):
+    scorer = HeuristicScorer(catalog())
+    positions = np.arange(len(scorer.df))
+    for base in range(0, len(scorer.df), 7):
+        others = positions[positions != base]
+        scores = scorer.score(base, others)
+        expected = others[np.lexsort((others, -scorer.ratings[others], -scores))][:limit]
+        assert scorer.recommend(base, limit).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("limit", [1, 8, 30])
+def test_candidates_give_the_same_top_as_the_full_catalog(limit):
+    scorer = HeuristicScorer(catalog())
+    everything = np.arange(len(scorer.df))
+    for base in range(0, len(scorer.df), 7):
+        assert scorer.recommend(base, limit).tolist() == scorer.recommend(base, limit, positions=everything).tolist()
+
+
+def test_score_terms():
+    df = pd.DataFrame({
+        "movie_id": [1, 2, 3],
+        "title": ["A", "B", "C"],
+        "release_year": [2000, 2004, 2030],
+        "genre": ["Action, Drama", "drama", "Horror"],
+        "director": ["Nolan", " NOLAN", "Mann"],
+        "imdb_rating": [7.0, 8.0, None],
+        "language": ["English"] * 3,
+    })
+    scores = HeuristicScorer(df).score(0)
+    # same director + half the genres + rating + released within 5 years
+    assert scores[1] == pytest.approx(3.0 + 1.0 + 0.8 + 0.2)
+    assert scores[2] == 0.0
+    assert HeuristicScorer(df).recommend(0, limit=5).tolist() == [1, 2]
@@ -0,0 +1,66 @@
+import threading
+
+from conftest import RecordingConnection
+from history_writer import INSERT_SQL, HistoryWriter
+
+
+class Recorder:
+    def __init__(self, gate=None):
+        self.connections = []
+        self.gate = gate
+
+    def __call__(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        cnxn = RecordingConnection()
+        self.connections.append(cnxn)
+        return cnxn
+
+    def rows(self):
+        return [row for c in self.connections for _, rows in c.statements for row in rows]
+
+
+def test_insert_leaves_search_time_to_the_server_default():
+    assert "search_time" not in INSERT_SQL
+
+
+def test_flush_writes_everything_submitted_before_it():
+    connect = Recorder()
+    writer = HistoryWriter(connect, flush_interval=60)
+    for i in range(5):
+        assert writer.submit(1, f"Movie {i}")
+    assert writer.flush(timeout=5)
+    assert connect.rows() == [(1, f"Movie {i}") for i in range(5)]
+    assert writer.stats()["queued"] == 0
+    writer.close()
+
+
+def test_flush_waits_for_a_batch_already_being_written():
+    gate = threading.Event()
+    connect = Recorder(gate)
+    writer = HistoryWriter(connect, batch_size=1, flush_interval=60)
+    writer.submit(1, "Alien")  # the writer takes it and blocks in connect()
+    assert not writer.flush(timeout=0.2)
+    gate.set()
+    assert writer.flush(timeout=5)
+    assert connect.rows() == [(1, "Alien")]
+    writer.close()
+
+
+def test_a_full_queue_drops_instead_of_blocking():
+    gate = threading.Event()
+    writer = HistoryWriter(Recorder(gate), max_queue=1, batch_size=1, flush_interval=60, put_timeout=0.01)
+    results = [writer.submit(1, f"Movie {i}") for i in range(4)]
+    assert not all(results)
+    assert writer.stats()["dropped"] == results.count(False)
+    gate.set()
+    writer.close()
+
+
+def test_close_drains_the_queue():
+    connect = Recorder()
+    writer = HistoryWriter(connect, batch_size=100, flush_interval=60)
+    writer.submit(2, "Heat")
+    writer.close()
+    assert connect.rows() == [(2, "Heat")]
+    assert writer.stats()["written"] == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from conftest import RecordingConnection
+from migrations import LAST_MIGRATIONS, MOVIEDB_MIGRATIONS, run_migrations
+
+MIGRATIONS = [
+    (2, "indexes", ["CREATE INDEX ix_b ON t (b)"]),
+    (1, "base tables", ["CREATE TABLE t (a INT)", "CREATE TABLE u (a INT)"]),
+    (3, "more indexes", ["CREATE INDEX ix_c ON t (c)"]),
+]
+
+
+class SchemaConnection(RecordingConnection):
+    """Keeps the recorded schema version like dbo.schema_version would."""
+
+    def __init__(self, version=0, **kwargs):
+        super().__init__(**kwargs)
+        self.version = version
+        self.autocommit = True
+
+    def execute(self, sql, params=()):
+        super().execute(sql, params)
+        if "MAX(version)" in sql:
+            self._rows = [(self.version,)]
+        elif sql.startswith("INSERT INTO dbo.schema_version"):
+            self.version = params[1]
+        return self
+
+
+def applied(cnxn):
+    return [sql for sql, _ in cnxn.statements if sql.startswith(("CREATE", "INSERT"))]
+
+
+def test_only_newer_migrations_run_in_order():
+    cnxn = SchemaConnection(version=1)
+    assert run_migrations(cnxn, "test-newer", MIGRATIONS) == 3
+    assert applied(cnxn) == [
+        "CREATE INDEX ix_b ON t (b)", "INSERT INTO dbo.schema_version (app, version, description) VALUES (?, ?, ?)",
+        "CREATE INDEX ix_c ON t (c)", "INSERT INTO dbo.schema_version (app, version, description) VALUES (?, ?, ?)",
+    ]
+    assert cnxn.autocommit is True
+
+
+def test_the_second_call_in_a_process_sends_nothing():
+    run_migrations(SchemaConnection(), "test-once", MIGRATIONS)
+    cnxn = SchemaConnection()
+    assert run_migrations(cnxn, "test-once", MIGRATIONS) == 3
+    assert cnxn.statements == []
+
+
+def test_a_failed_migration_is_rolled_back_and_retried_next_time():
+    cnxn = SchemaConnection(fail_on="ix_c")
+    with pytest.raises(RuntimeError):
+        run_migrations(cnxn, "test-failure", MIGRATIONS)
+    assert cnxn.version == 2 and cnxn.rollbacks == 1
+    assert cnxn.autocommit is True
+    retry = SchemaConnection(version=2)
+    assert run_migrations(retry, "test-failure", MIGRATIONS) == 3
+    assert applied(retry)[0] == "CREATE INDEX ix_c ON t (c)"
+
+
+@pytest.mark.parametrize("migrations", [MOVIEDB_MIGRATIONS, LAST_MIGRATIONS])
+def test_versions_are_unique_and_increasing(migrations):
+    versions = [version for version, _, _ in migrations]
+    assert versions == sorted(set(versions))
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import RecordingConnection
+from movie_diff import MovieDiff, apply_movie_diff, diff_movie_frames
+
+
+@pytest.fixture
+def grid():
+    return pd.DataFrame({
+        "movie_id": [1, 2, 3],
+        "title": ["Alien", "Heat", "Up"],
+        "release_year": [1979, 1995, 2009],
+        "genre": ["Sci-Fi", "Crime", None],
+        "director": ["Ridley Scott", "Michael Mann", "Pete Docter"],
+        "imdb_rating": [8.5, 8.3, np.nan],
+        "language": ["English", "English", "English"],
+        "duration_minutes": [117, 170, 96],
+    })
+
+
+def test_unchanged_grid_gives_an_empty_diff(grid):
+    diff = diff_movie_frames(grid, grid.copy())
+    assert diff.is_empty()
+
+
+def test_only_changed_cells_are_reported(grid):
+    edited = grid.copy()
+    edited.loc[0, "genre"] = "Horror"
+    edited.loc[2, "imdb_rating"] = 8.3  # missing -> value
+    diff = diff_movie_frames(grid, edited)
+    assert diff.updates == [(1, {"genre": "Horror"}), (3, {"imdb_rating": 8.3})]
+    assert diff.inserts == [] and diff.deletes == []
+    assert diff.summary() == "0 insert(s), 2 updated row(s) (2 cell(s)), 0 delete(s)"
+
+
+def test_nullable_cells_can_be_filled_in_and_cleared(grid):
+    grid = grid.astype({"release_year": "Int16", "duration_minutes": "Int16"})
+    grid.loc[2, "release_year"] = pd.NA
+    edited = grid.copy()
+    edited.loc[2, "release_year"] = 2009  # <NA> -> value
+    edited.loc[0, "duration_minutes"] = pd.NA  # value -> <NA>
+    diff = diff_movie_frames(grid, edited)
+    assert diff.updates == [(1, {"duration_minutes": None}), (3, {"release_year": 2009})]
+    assert diff_movie_frames(grid, grid.copy()).is_empty()
+
+
+def test_new_rows_and_removed_rows(grid):
+    edited = pd.concat([grid.drop(index=1), pd.DataFrame([{"movie_id": None, "title": "Tenet", "release_year": 2020}])],
+                       ignore_index=True)
+    diff = diff_movie_frames(grid, edited)
+    assert diff.deletes == [2]
+    assert diff.inserts[0]["title"] == "Tenet"
+    assert diff.inserts[0]["genre"] is None  # NaN -> None for pyodbc
+    assert isinstance(diff.inserts[0]["release_year"], (int, float))
+
+
+def test_updates_are_grouped_by_changed_columns_in_one_transaction():
+    diff = MovieDiff(
+        inserts=[{"title": "Tenet", "genre": "Sci-Fi"}],
+        updates=[(1, {"genre": "Horror"}), (2, {"genre": "Drama"}), (3, {"title": "Up!", "genre": "Family"})],
+        deletes=[4],
+    )
+    cnxn = RecordingConnection()
+    counts = apply_movie_diff(cnxn, diff)
+    assert counts == {"inserted": 1, "updated": 3, "deleted": 1}
+    assert cnxn.statements == [
+        ("DELETE FROM dbo.movies WHERE movie_id = ?", [(4,)]),
+        ("UPDATE dbo.movies SET genre = ? WHERE movie_id = ?", [("Horror", 1), ("Drama", 2)]),
+        ("UPDATE dbo.movies SET genre = ?, title = ? WHERE movie_id = ?", [("Family", "Up!", 3)]),
+        ("INSERT INTO dbo.movies (title, genre) VALUES (?, ?)", [("Tenet", "Sci-Fi")]),
+    ]
+    assert (cnxn.commits, cnxn.rollbacks) == (1, 0)
+
+
+def test_a_failure_rolls_everything_back():
+    cnxn = RecordingConnection(fail_on="INSERT")
+    with pytest.raises(RuntimeError):
+        apply_movie_diff(cnxn, MovieDiff([{"title": "Tenet"}], [(1, {"genre": "Horror"})], []))
+    assert (cnxn.commits, cnxn.rollbacks) == (0, 1)
+
+
+def test_columns_outside_the_grid_are_refused():
+    cnxn = RecordingConnection()
+    with pytest.raises(ValueError):
+        apply_movie_diff(cnxn, MovieDiff([], [(1, {"password_hash": "x"})], []))
+    with pytest.raises(ValueError):
+        apply_movie_diff(cnxn, MovieDiff([], [], [1]), table="movies; DROP TABLE users")
+    assert cnxn.rollbacks == 1
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from conftest import RecordingConnection
+from movie_filters import ALL, MovieFilterStore, build_filter_query, fetch_filter_options, fetch_filtered_movies
+
+
+def movies():
+    return pd.DataFrame({
+        "movie_id": [1, 2, 3, 4, 5],
+        "title": ["Alien", "Heat", "Up", "Tenet", "Amélie"],
+        "genre": ["Sci-Fi", "Crime, Drama", "Animation", "Sci-Fi", "Comedy"],
+        "language": ["English", "English", "English", "English", "French"],
+        "imdb_rating": [8.5, 8.3, 8.3, 7.3, None],
+        "release_year": [1979, 1995, 2009, 2020, 2001],
+        "duration_minutes": [117, 170, 96, 150, 122],
+    })
+
+
+def test_query_with_every_filter():
+    query = build_filter_query(genre="Sci-Fi", language="English", min_rating=7, order_by="imdb_rating",
+                               descending=True, limit=25, offset=50)
+    assert query.sql == ("SELECT * FROM dbo.movies WHERE genre = ? AND language = ? AND imdb_rating >= ?"
+                         " ORDER BY imdb_rating DESC, movie_id DESC OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+    assert query.params == ["Sci-Fi", "English", 7.0, 50, 25]
+    assert query.count_sql == ("SELECT COUNT(*) FROM dbo.movies WHERE genre = ? AND language = ?"
+                               " AND imdb_rating >= ?")
+    assert query.count_params == ["Sci-Fi", "English", 7.0]
+
+
+def test_query_without_filters_orders_by_the_key():
+    query = build_filter_query(genre=ALL, language=ALL)
+    assert (query.sql, query.params) == ("SELECT * FROM dbo.movies ORDER BY movie_id ASC", [])
+
+
+def test_contains_matches_like_wildcards_literally():
+    query = build_filter_query(genre="100%_[x]", contains=True)
+    assert "genre LIKE ?" in query.sql
+    assert query.params == ["%100[%][_][[]x]%"]
+
+
+def test_query_rejects_unknown_sort_columns_and_bad_names():
+    with pytest.raises(ValueError):
+        build_filter_query(order_by="password_hash")
+    with pytest.raises(ValueError):
+        build_filter_query(table="movies; DROP TABLE users")
+
+
+def test_fetch_returns_the_page_and_the_total():
+    cnxn = RecordingConnection(results=[[(2, "Heat")], [(7,)]])
+    cnxn.description = [("movie_id",), ("title",)]
+    page, total = fetch_filtered_movies(cnxn, genre="Crime", limit=1, offset=1)
+    assert page.to_dict("records") == [{"movie_id": 2, "title": "Heat"}]
+    assert total == 7
+    assert [params for _, params in cnxn.statements] == [["Crime", 1, 1], ["Crime"]]
+
+
+def test_options_are_the_distinct_values():
+    cnxn = RecordingConnection(results=[[("Crime",), ("Sci-Fi",)], [("English",)]])
+    assert fetch_filter_options(cnxn, table="movies") == (["Crime", "Sci-Fi"], ["English"])
+    assert cnxn.statements[0][0] == "SELECT DISTINCT genre FROM movies WHERE genre IS NOT NULL ORDER BY genre"
+
+
+def test_store_matches_values_as_substrings():
+    store = MovieFilterStore(movies())
+    page, total = store.filter(genre="drama")
+    assert (page["title"].tolist(), total) == (["Heat"], 1)
+    page, total = store.filter(language="english", min_rating=8.3)
+    assert page["title"].tolist() == ["Alien", "Heat", "Up"]
+
+
+def test_store_sorts_and_pages():
+    store = MovieFilterStore(movies())
+    page, total = store.filter(order_by="release_year", limit=2, offset=1)
+    assert (page["title"].tolist(), total) == (["Heat", "Amélie"], 5)
+
+
+def test_missing_ratings_sort_last_and_ties_keep_catalog_order():
+    store = MovieFilterStore(movies())
+    page, _ = store.filter(order_by="imdb_rating", descending=True)
+    assert page["title"].tolist() == ["Alien", "Heat", "Up", "Tenet", "Amélie"]
+    page, _ = store.filter(order_by="imdb_rating")
+    assert page["title"].tolist() == ["Tenet", "Heat", "Up", "Alien", "Amélie"]
+    page, _ = store.filter(order_by="title", descending=True, limit=2)
+    assert page["title"].tolist() == ["Up", "Tenet"]
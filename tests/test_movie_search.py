@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from movie_search import MovieSearch, decode_varints, encode_varints, tokenize
+
+WORDS = ["star", "dark", "night", "love", "war", "city", "dream", "river", "ghost", "king"]
+GENRES = ["Drama", "Sci-Fi", "Action, Drama", "Comedy", "Horror", "Romance, Drama"]
+DIRECTORS = ["Christopher Nolan", "Greta Gerwig", "Denis Villeneuve", "Bong Joon-ho", "Star Kingsley"]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    rng = np.random.default_rng(7)
+    n = 3000
+    return pd.DataFrame({
+        "movie_id": np.arange(1, n + 1),
+        "title": [" ".join(rng.choice(WORDS, size=rng.integers(1, 5))) for _ in range(n)],
+        "genre": rng.choice(GENRES, size=n),
+        "director": rng.choice(DIRECTORS, size=n),
+        "language": rng.choice(["English", "Korean", "French"], size=n),
+    })
+
+
+def exhaustive(search: MovieSearch, query: str):
+    """Every matching row ranked by its exact score, ties by position."""
+    terms = [t for t in dict.fromkeys(tokenize(query)) if t in search.vocabulary]
+    scores = np.array([sum(search._impact(t, slot) for t in terms) for slot in range(len(search))])
+    rows = np.flatnonzero(scores)
+    return rows[np.lexsort((rows, -scores[rows]))].tolist()
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 2 ** 21, 2 ** 35 + 5], dtype=np.int64)
+    encoded = encode_varints(values)
+    assert encoded.nbytes < values.nbytes
+    assert decode_varints(encoded).tolist() == values.tolist()
+
+
+@pytest.mark.parametrize("query", ["star", "nolan drama", "dark night king", "korean ghost", "war"])
+def test_pages_match_an_exhaustive_ranking(catalog, query):
+    # small blocks, so most of them are skipped once the page is settled
+    search = MovieSearch(catalog, block_size=16)
+    expected = exhaustive(search, query)
+    for page in range(3):
+        result = search.search(query, page=page, page_size=10)
+        assert result.rows == expected[page * 10:(page + 1) * 10]
+        assert result.has_more == (len(expected) > (page + 1) * 10)
+
+
+def test_director_match_outranks_a_title_mention(catalog):
+    search = MovieSearch(catalog)
+    top = search.df.iloc[search.search("nolan", page_size=5).rows]
+    assert (top["director"] == "Christopher Nolan").all()
+
+
+def test_unknown_terms_return_an_empty_page(catalog):
+    page = MovieSearch(catalog).search("zzz qqq")
+    assert page.rows == [] and not page.has_more
@@ -0,0 +1,98 @@
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from conftest import RecordingConnection  # noqa: E402
+from neighbors import NeighborRefresher, compute_neighbors, fetch_neighbors, plan_neighbor_update  # noqa: E402
+
+
+def movies():
+    return pd.DataFrame({
+        "movie_id": [1, 2, 3, 4, 5, 6],
+        "genre": ["Sci-Fi", "Sci-Fi", "Crime", "Crime", "Drama", "Sci-Fi Crime"],
+        "director": ["Scott", "Cameron", "Mann", "Scorsese", "Nolan", "Nolan"],
+    })
+
+
+def test_blocks_do_not_change_the_lists():
+    assert compute_neighbors(movies(), k=3, block_size=2) == compute_neighbors(movies(), k=3)
+
+
+def test_lists_are_ranked_and_skip_the_movie_itself():
+    rows = compute_neighbors(movies(), k=2)
+    assert len(rows) == 12
+    for movie_id, rank, neighbor, score in rows:
+        assert neighbor != movie_id and rank in (1, 2)
+    first = [(neighbor, round(score, 6)) for movie_id, _, neighbor, score in rows if movie_id == 1]
+    assert first[0][0] == 2 and first[0][1] >= first[1][1]
+
+
+def test_fetch_without_the_neighbor_table_returns_nothing():
+    cnxn = RecordingConnection()  # the guarded batch produces no result set
+    assert fetch_neighbors(cnxn, 1).empty
+    sql, params = cnxn.statements[0]
+    assert sql.startswith("IF OBJECT_ID(N'dbo.movie_neighbors', N'U') IS NOT NULL SELECT TOP (?)")
+    assert params == (5, 1)
+
+
+def test_fetch_returns_the_ranked_neighbors():
+    cnxn = RecordingConnection(results=[[(2, "Heat", 0.9), (3, "Up", 0.5)]])
+    cnxn.description = [("movie_id",), ("title",), ("score",)]
+    assert fetch_neighbors(cnxn, 1, topn=2)["title"].tolist() == ["Heat", "Up"]
+
+
+def stored(df, k):
+    """The stored lists and thresholds of a full compute_neighbors run."""
+    lists = {}
+    for movie_id, _, neighbor, score in compute_neighbors(df, k=k):
+        lists.setdefault(movie_id, []).append((neighbor, score))
+    thresholds = {m: (min(s for _, s in rows), len(rows)) for m, rows in lists.items()}
+    return lists, thresholds
+
+
+def swap_genres(df):
+    # 3 and 5 trade genres: the document frequencies, hence the IDF weights, stay the same
+    genres = df.set_index("movie_id")["genre"]
+    return df.assign(genre=df["movie_id"].map({**genres, 3: genres[5], 5: genres[3]}))
+
+
+@pytest.mark.parametrize("edit, changed", [
+    (swap_genres, {3, 5}),
+    (lambda df: df[df["movie_id"] != 3], {3}),
+    (lambda df: pd.concat([df, pd.DataFrame({"movie_id": [7], "genre": ["Crime"], "director": ["Mann"]})]), {7}),
+])
+def test_a_patch_equals_a_full_recompute(edit, changed):
+    k = 3
+    before = movies()
+    after = edit(before).reset_index(drop=True)
+    lists, thresholds = stored(before, k)
+    patched, _ = plan_neighbor_update(after, changed, thresholds,
+                                      lambda ids: {m: lists[m] for m in lists if m in ids or
+                                                   any(n in changed for n, _ in lists[m])}, k=k)
+    merged = {m: rows for m, rows in {**lists, **patched}.items() if rows}
+    expected, _ = stored(after, k)
+    # a delete or insert moves the IDF weights a little, so the scores may differ: compare the ids
+    for movie_id, rows in patched.items():
+        assert [n for n, _ in rows] == [n for n, _ in expected.get(movie_id, [])]
+    assert set(merged) == set(expected)
+
+
+def test_refresher_batches_a_burst_of_edits(monkeypatch):
+    calls = []
+    monkeypatch.setattr("neighbors.update_neighbors", lambda cnxn, ids, **kw: calls.append(list(ids)))
+
+    class Connection:
+        def close(self):
+            pass
+
+    refresher = NeighborRefresher(Connection, delay=0.1)
+    refresher.submit([3])
+    refresher.submit([1, 3])
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls == [[1, 3]]
+    assert refresher.stats()["patched"] == 2
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pandas as pd
+
+from shared_model import SharedModel, fit_tfidf
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_fit_tfidf():
+    assert fit_tfidf(pd.DataFrame(), pd.Series(dtype=str)) is None
+    df = pd.DataFrame({"genre": ["Drama", "Crime"]}, index=[5, 9])
+    model = fit_tfidf(df, df["genre"], version=3)
+    assert model.matrix.shape[0] == 2 and model.version == 3
+    assert model.df.index.tolist() == [0, 1]
+
+
+def test_first_get_builds_synchronously():
+    model = SharedModel(lambda: "v1", poll_interval=60)
+    assert model.get() == "v1"
+    assert model.stats()["builds"] == 1
+
+
+def test_a_burst_of_marks_costs_one_rebuild():
+    builds = []
+    model = SharedModel(lambda: builds.append(1) or len(builds), debounce=0.1, poll_interval=60)
+    assert model.get() == 1
+    for _ in range(5):
+        model.mark_stale()
+    assert wait_for(lambda: model.get() == 2)
+    time.sleep(0.3)
+    assert len(builds) == 2
+
+
+def test_a_failed_rebuild_keeps_the_previous_model():
+    versions = iter(["v1"])
+    model = SharedModel(lambda: next(versions), debounce=0, poll_interval=60)
+    assert model.get() == "v1"
+    model.mark_stale()
+    assert wait_for(lambda: model.stats()["failures"] == 1)
+    assert model.get() == "v1"
+
+
+def test_is_current_is_polled():
+    current = threading.Event()
+    model = SharedModel(lambda: "built", debounce=0, poll_interval=0.05, is_current=lambda m: current.is_set())
+    model.get()
+    assert wait_for(lambda: model.stats()["builds"] >= 2)
+    current.set()
+    time.sleep(0.2)
+    builds = model.stats()["builds"]
+    time.sleep(0.2)
+    assert model.stats()["builds"] == builds
@@ -0,0 +1,29 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from similarity import most_similar, similarity_row, top_n_indices
+
+
+def full_sort(scores, n, exclude=None):
+    order = [i for i in np.lexsort((np.arange(len(scores)), -scores)) if i != exclude]
+    return order[:n]
+
+
+def test_top_n_matches_a_full_sort_with_ties():
+    rng = np.random.default_rng(3)
+    scores = rng.integers(0, 5, size=200).astype(float)  # many ties
+    for n in (1, 5, 50, 200, 500):
+        assert top_n_indices(scores, n).tolist() == full_sort(scores, n)
+        assert top_n_indices(scores, n, exclude=7).tolist() == full_sort(scores, n, exclude=7)
+
+
+def test_empty_and_single_row():
+    assert top_n_indices(np.array([]), 5).tolist() == []
+    assert top_n_indices(np.array([1.0]), 5, exclude=0).tolist() == []
+
+
+def test_most_similar_excludes_the_movie_itself():
+    matrix = TfidfVectorizer().fit_transform(["Sci-Fi Scott", "Sci-Fi Scott", "Crime Mann", "Sci-Fi Crime Mann"])
+    positions, scores = most_similar(matrix, 0, top_n=2)
+    assert positions.tolist() == [1, 3]
+    assert scores[0] == np.max(similarity_row(matrix, 0)[1:])
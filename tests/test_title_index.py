@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit")
+
+import title_index  # noqa: E402
+from title_index import TitleIndex, normalize_title, title_picker  # noqa: E402
+
+
+@pytest.fixture
+def index():
+    return TitleIndex(pd.DataFrame({
+        "movie_id": [1, 2, 3, 4, 5],
+        "title": ["The Dark Knight", "Dark City", "Knight and Day", None, "the dark knight rises"],
+    }))
+
+
+def test_normalize_title():
+    assert normalize_title("  The Dark-Knight! ") == "the dark knight"
+
+
+def test_whole_title_prefixes_come_before_later_words(index):
+    assert index.search("dark") == [1, 0, 4]
+    assert index.search("Knight") == [2, 0, 4]
+
+
+def test_limit_and_empty_queries(index):
+    assert index.search("the", limit=1) == [0]
+    assert index.search("  ") == []
+    assert index.search("zzz") == []
+
+
+def test_titles_by_key(index):
+    assert index.title_of(3) == "Knight and Day"
+    assert index.title_of(4) == ""
+    assert index.title_of(99) is None
+    assert index.label(2) == "2 - Dark City"
+    assert index.label(99) == "99"
+
+
+def test_picker_options_are_movie_keys(index, monkeypatch):
+    shown = {}
+
+    def selectbox(label, options, format_func, **kwargs):
+        shown["options"] = options
+        shown["labels"] = [format_func(o) for o in options]
+        return options[0]
+
+    monkeypatch.setattr(title_index, "st", SimpleNamespace(text_input=lambda *a, **k: "dark", selectbox=selectbox))
+    assert title_picker(index, "Movie", key="t") == 2
+    assert shown == {"options": [2, 1, 5], "labels": ["2 - Dark City", "1 - The Dark Knight",
+                                                      "5 - the dark knight rises"]}
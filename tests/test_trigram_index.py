@@ -0,0 +1,66 @@
+from trigram_index import TrigramIndex, trigrams
+
+TITLES = [(1, "Interstellar"), (2, "Inception"), (3, "The Dark Knight"), (4, "Titanic"), (5, "The Prestige")]
+
+
+def keys(hits):
+    return [key for key, _ in hits]
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams("Up") == {"  u", " up", "up "}
+    assert trigrams("a b") == trigrams("B A")
+
+
+def test_misspelled_title_is_found_first():
+    index = TrigramIndex(TITLES)
+    hits = index.search("Intersteller")
+    assert keys(hits)[0] == 1
+    assert 0.5 <= hits[0][1] < 1.0
+
+
+def test_partial_title_scores_full_coverage():
+    index = TrigramIndex(TITLES)
+    assert index.search("dark knight")[0] == (3, 1.0)
+
+
+def test_no_shared_grams_returns_nothing():
+    assert TrigramIndex(TITLES).search("zzzz") == []
+    assert TrigramIndex(TITLES).search("") == []
+
+
+def test_apply_updates_and_deletes_in_place():
+    index = TrigramIndex(TITLES)
+    index.apply({4: None, 2: "Memento", 6: "Tenet"}, version=7)
+    assert len(index) == 5
+    assert index.version == 7
+    assert 4 not in keys(index.search("Titanic"))
+    assert keys(index.search("Inception")) == []
+    assert keys(index.search("Memento")) == [2]
+    assert keys(index.search("Tenet")) == [6]
+
+
+def test_compaction_keeps_only_live_titles():
+    index = TrigramIndex((i, f"Movie number {i}") for i in range(3000))
+    for i in range(2000):
+        index.remove(i)
+    # dead slots outnumbered live ones, so the postings were rebuilt from the live titles
+    assert index._dead < 1000
+    assert len(index) == 1000
+    assert keys(index.search("Movie number 2500", limit=1)) == [2500]
+    assert keys(index.search("Movie number 1500", limit=1)) != [1500]
+    index.add(1500, "Movie number 1500")
+    assert keys(index.search("Movie number 1500", limit=1)) == [1500]
+
+
+def test_ties_are_broken_by_similarity_then_slot():
+    index = TrigramIndex([(1, "Alien Resurrection"), (2, "Alien"), (3, "Aliens")])
+    # both contain every gram of "Alien"; the shorter title is the closer one. "Aliens" lacks "en ".
+    assert keys(index.search("Alien")) == [2, 1, 3]
+
+
+def test_best_row_skips_matches_missing_from_the_frame():
+    index = TrigramIndex(TITLES)
+    row_of = {5: 0, 3: 1, 1: 2}  # a frame without Inception / Titanic
+    assert index.best_row("Intersteller", row_of) == 2
+    assert index.best_row("Titanic", row_of) is None
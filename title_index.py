@@ -0,0 +1,117 @@
+"""
+Prefix index over movie titles and the search-as-you-type picker built on it.
+
+TitleIndex normalizes every title once (case-folded, punctuation dropped) and
+keeps two sorted term lists: the whole titles, and each title from its second
+word on ("dark knight", "knight" for "The Dark Knight"), so a query matches
+titles that start with it first and titles with a word starting with it
+after that. A lookup is a binary search (bisect) to the first term >= query
+followed by a scan that stops after `limit` distinct titles, i.e.
+O(log N + limit) whatever the size of the catalog.
+
+title_picker() renders a text box and a selectbox holding only the current
+matches, so the page never ships the whole title list to the browser.
+Streamlit sends the box's value when the user pauses (Enter / leaving the
+box) and abandons a rerun that is still running when a newer value arrives,
+so stale keystrokes are never searched.
+
+Build one index per catalog version (e.g. through catalog.get next to the
+CatalogStore it is built from) and share it between sessions.
+"""
+
+import re
+from bisect import bisect_left
+from typing import List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from catalog_store import CatalogStore
+
+PICKER_LIMIT = 20
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_title(title) -> str:
+    return " ".join(_WORD_RE.findall(str(title).casefold()))
+
+
+class TitleIndex:
+    def __init__(self, catalog, key_column: str = "movie_id", title_column: str = "title"):
+        """`catalog` is a CatalogStore or a movies DataFrame; search() returns row positions in it."""
+        if isinstance(catalog, CatalogStore):
+            titles, keys = catalog.values(title_column), catalog.values(key_column)
+        else:
+            titles, keys = catalog[title_column].to_numpy(), catalog[key_column].to_numpy()
+        self.titles = ["" if pd.isna(t) else str(t) for t in titles]
+        self.keys = keys.tolist()  # plain Python values, ready for SQL parameters
+        self.key_column = key_column
+        self.title_column = title_column
+        self._row_of_key = {k: row for row, k in enumerate(self.keys)}
+
+        whole, whole_rows, words, word_rows = [], [], [], []
+        for row, title in enumerate(self.titles):
+            norm = normalize_title(title)
+            if not norm:
+                continue
+            whole.append(norm)
+            whole_rows.append(row)
+            start = norm.find(" ")
+            while start >= 0:
+                words.append(norm[start + 1:])
+                word_rows.append(row)
+                start = norm.find(" ", start + 1)
+        self._terms, self._rows = [], []
+        for terms, rows in ((whole, whole_rows), (words, word_rows)):
+            # sorting positions is much cheaper than sorting (term, row) tuples; stable, so ties keep row order
+            order = sorted(range(len(terms)), key=terms.__getitem__)
+            self._terms.append([terms[i] for i in order])
+            self._rows.append([rows[i] for i in order])
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def search(self, query: str, limit: int = PICKER_LIMIT) -> List[int]:
+        """Rows whose title starts with `query`, then rows with a later word starting with it (alphabetical)."""
+        prefix = normalize_title(query)
+        if not prefix:
+            return []
+        found, seen = [], set()
+        for terms, rows in zip(self._terms, self._rows):
+            for i in range(bisect_left(terms, prefix), len(terms)):
+                if not terms[i].startswith(prefix):
+                    break
+                row = rows[i]
+                if row not in seen:
+                    seen.add(row)
+                    found.append(row)
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def title_of(self, key) -> Optional[str]:
+        row = self._row_of_key.get(key)
+        return None if row is None else self.titles[row]
+
+    def label(self, key) -> str:
+        title = self.title_of(key)
+        if title is None or self.key_column == self.title_column:
+            return str(key)
+        return f"{key} - {title}"
+
+
+def title_picker(index: TitleIndex, label: str, key: str, limit: int = PICKER_LIMIT) -> Optional[object]:
+    """Search box plus a selectbox of the best `limit` matches; returns the chosen key, or None."""
+    query = st.text_input(label, key=f"{key}_query", placeholder=f"Type to search {len(index)} titles")
+    if not query.strip():
+        return None
+    rows = index.search(query, limit)
+    if not rows:
+        st.caption("No title matches that.")
+        return None
+    # options are movie keys, not row positions: a selection kept in the session still names the
+    # same movie after the index is rebuilt for a new catalog version
+    keys = list(dict.fromkeys(index.keys[row] for row in rows))
+    return st.selectbox(f"{label} (matches)", keys, format_func=index.label, key=f"{key}_choice",
+                        label_visibility="collapsed")
@@ -0,0 +1,175 @@
+"""
+Typo-tolerant title search over a trigram inverted index.
+
+Every title is split into words and each word, padded as "  word ", into
+its 3-character grams (the pg_trgm scheme), so "Interstellar" and the
+misspelled "Intersteller" share 10 of the query's 13 grams. The index maps
+each gram to the slots of the titles containing it (an append-only int32
+array per gram). A search:
+
+  1. looks up the query's grams and concatenates their posting arrays
+     (only titles sharing at least one gram are ever touched)
+  2. counts shared grams per candidate title with one np.unique
+  3. scores all candidates at once: the share of the query's grams the title
+     has (so a partial title still matches a long one), ties broken by the
+     overall trigram similarity |shared| / |query U title| and then by slot
+
+add() / remove() / apply() change single titles in place: an insert appends
+to the postings of its grams, a delete only clears the slot's live flag, and
+the postings are compacted once dead slots outnumber live ones. All methods
+take one lock, so one index can be shared by every session of the process.
+"""
+
+import re
+import threading
+from array import array
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+SIMILARITY_THRESHOLD = 0.5   # share of the query's grams a title must have
+SEARCH_LIMIT = 10
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=200_000)
+def _word_trigrams(word: str) -> Tuple[str, ...]:
+    padded = f"  {word} "
+    return tuple(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(text) -> Set[str]:
+    # titles reuse a small vocabulary, so the per-word grams are cached
+    return set().union(*map(_word_trigrams, _WORD_RE.findall(str(text).casefold())))
+
+
+class TrigramIndex:
+    def __init__(self, titles: Iterable[Tuple[Hashable, str]] = (), version=None):
+        """`titles` yields (key, title) pairs, e.g. zip(movie_ids, titles)."""
+        self._lock = threading.Lock()
+        self.version = version
+        self._reset()
+        self._load(titles)
+
+    def _reset(self):
+        self._postings: Dict[str, array] = {}
+        self._slot_of: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+        self._titles: List[Optional[str]] = []
+        self._sizes = np.zeros(1024, dtype=np.int32)   # distinct grams per slot
+        self._alive = np.zeros(1024, dtype=bool)
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def _load(self, titles: Iterable[Tuple[Hashable, str]]):
+        """Bulk load into an empty index: postings are grouped with one sort instead of per-gram appends."""
+        gram_lists, keys, texts = [], [], []
+        for key, title in titles:
+            if key in self._slot_of:
+                continue  # first occurrence wins, as with a primary key
+            self._slot_of[key] = len(keys)
+            keys.append(key)
+            texts.append(str(title))
+            gram_lists.append(list(trigrams(title)))
+        sizes = np.fromiter(map(len, gram_lists), dtype=np.int32, count=len(gram_lists))
+        codes, uniques = pd.factorize(pd.Series([g for grams in gram_lists for g in grams], dtype=object))
+        slots = np.repeat(np.arange(len(keys), dtype=np.int32), sizes)
+        order = np.argsort(codes, kind="stable")  # stable: slots stay ascending within a gram
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        for gram, posting in zip(uniques, np.split(slots[order], bounds)):
+            self._postings[gram] = array("i", posting.tobytes())
+        self._keys, self._titles = keys, texts
+        capacity = max(1024, len(keys))
+        self._sizes = np.zeros(capacity, dtype=np.int32)
+        self._sizes[:len(keys)] = sizes
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(keys)] = True
+
+    def _add(self, key, title):
+        if key in self._slot_of:
+            self._remove(key)
+        slot = len(self._keys)
+        if slot == len(self._sizes):
+            self._sizes = np.concatenate([self._sizes, np.zeros(slot, dtype=np.int32)])
+            self._alive = np.concatenate([self._alive, np.zeros(slot, dtype=bool)])
+        grams = trigrams(title)
+        for gram in grams:
+            self._postings.setdefault(gram, array("i")).append(slot)
+        self._slot_of[key] = slot
+        self._keys.append(key)
+        self._titles.append(str(title))
+        self._sizes[slot] = len(grams)
+        self._alive[slot] = True
+
+    def _remove(self, key):
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        self._titles[slot] = None
+        self._dead += 1
+        if self._dead > 1000 and self._dead > len(self._slot_of):
+            self._compact()
+
+    def _compact(self):
+        live = [(k, t) for k, t in zip(self._keys, self._titles) if t is not None]
+        self._reset()
+        self._load(live)
+
+    def add(self, key, title):
+        """Insert a title, or replace the title stored under `key`."""
+        with self._lock:
+            self._add(key, title)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def apply(self, changes: Dict[Hashable, Optional[str]], version=None):
+        """Patch several titles at once: key -> new title, or None when the movie was deleted."""
+        with self._lock:
+            for key, title in changes.items():
+                if title is None:
+                    self._remove(key)
+                else:
+                    self._add(key, title)
+            if version is not None:
+                self.version = version
+
+    def rebuild(self, titles: Iterable[Tuple[Hashable, str]], version=None):
+        with self._lock:
+            self._reset()
+            self._load(titles)
+            self.version = version
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT,
+               threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[Hashable, float]]:
+        """Best (key, score) pairs, best first; score is the share of the query's grams found in the title."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        with self._lock:
+            postings = [np.array(self._postings[g], dtype=np.int32) for g in grams if g in self._postings]
+            if not postings:
+                return []
+            # counts over the candidate slots only: the cost follows the postings, not the catalog size
+            slots, shared = np.unique(np.concatenate(postings), return_counts=True)
+            coverage = shared / len(grams)
+            keep = (coverage >= threshold) & self._alive[slots]
+            slots, shared, coverage = slots[keep], shared[keep], coverage[keep]
+            similarity = shared / (len(grams) + self._sizes[slots] - shared)
+            best = np.lexsort((slots, -similarity, -coverage))[:limit]
+            return [(self._keys[slots[i]], float(coverage[i])) for i in best]
+
+    def best_row(self, query: str, row_of: Mapping[Hashable, int]) -> Optional[int]:
+        """Row of the best match present in `row_of` (key -> row of a frame, built once with the frame)."""
+        for key, _ in self.search(query):
+            row = row_of.get(key)
+            if row is not None:
+                return row
+        return None
@@ -1,9 +1,17 @@
+import threading
 import streamlit as st
 import pandas as pd
-import pyodbc
+from db_pool import get_pool
+from catalog_cache import catalog
+from catalog_store import CatalogStore
+from change_feed import ChangeFeed
+from migrations import MOVIEDB_MIGRATIONS, run_migrations
+from catalog_browser import render_catalog_browser
+from movie_filters import ALL, SORT_COLUMNS, MovieFilterStore, fetch_filter_options, fetch_filtered_movies
 from werkzeug.security import generate_password_hash, check_password_hash
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from similarity import most_similar
+from shared_model import SharedModel, fit_tfidf
+from title_index import TitleIndex, title_picker
 
 # ===========================================
 # DATABASE CONNECTION
@@ -12,16 +20,116 @@ def get_connection():
     server = 'localhost'  # Change if needed
     database = 'MovieDb'
     driver = '{ODBC Driver 17 for SQL Server}'
-    return pyodbc.connect(f"DRIVER={driver};SERVER={server};DATABASE={database};Trusted_Connection=yes;")
+    # pooled: conn.close() hands the connection back instead of disconnecting
+    return get_pool(f"DRIVER={driver};SERVER={server};DATABASE={database};Trusted_Connection=yes;").acquire()
 
 # ===========================================
 # FETCH MOVIES
 # ===========================================
+def movies_store():
+    """Full movies table as a CatalogStore, served from the shared catalog cache."""
+    def load():
+        conn = get_connection()
+        df = pd.read_sql("SELECT * FROM movies", conn)
+        conn.close()
+        return CatalogStore.from_frame(df)
+    return catalog.get("worked.movies", load)
+
+def title_index():
+    """Prefix index over the cached catalog's titles (rebuilt with it)."""
+    return catalog.get("worked.titles", lambda: TitleIndex(movies_store()))
+
 def fetch_movies():
+    """Full movies table as views over the cached CatalogStore."""
+    # shallow copy so callers can add columns without touching the cached frame
+    return movies_store().frame().copy(deep=False)
+
+@st.cache_resource
+def change_feed():
+    """Polls dbo.movies_changes once per server process; any catalog change drops the cached
+    catalog here (and, through catalog.subscribe, marks the shared model stale)."""
+    feed = ChangeFeed(get_connection)
+    feed.subscribe(lambda changes: catalog.invalidate())
+    return feed
+
+@st.cache_resource
+def bootstrap():
+    """Schema migrations (the change feed reads migration 3's log) + the change consumer, once per
+    server process; a failure raises, so it is not cached and the next rerun retries."""
     conn = get_connection()
-    df = pd.read_sql("SELECT * FROM movies", conn)
-    conn.close()
-    return df
+    try:
+        run_migrations(conn, "moviedb", MOVIEDB_MIGRATIONS)
+    finally:
+        conn.close()
+    change_feed()
+
+def fetch_movie_rows(movie_ids):
+    """movie_id -> its row (column -> value) for the given ids; None for ids no longer in movies."""
+    ids = list(movie_ids)
+    rows = dict.fromkeys(ids)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(ids), 1000):
+            batch = ids[start:start + 1000]
+            cursor.execute(f"SELECT * FROM movies WHERE movie_id IN ({', '.join('?' * len(batch))})", batch)
+            columns = [c[0] for c in cursor.description]
+            for values in cursor.fetchall():
+                row = dict(zip(columns, values))
+                rows[row["movie_id"]] = row
+    finally:
+        conn.close()
+    return rows
+
+@st.cache_resource
+def movie_filter_store():
+    """Facet bitmaps for the Filter Movies page: loaded once, then patched movie by movie from the change feed."""
+    lock, pending, loaded = threading.Lock(), {}, []
+
+    def on_change(changes):
+        with lock:
+            if loaded and loaded[0] is None:
+                return  # this load failed; the next call subscribes again
+        rows = fetch_movie_rows(changes)
+        with lock:
+            if not loaded:
+                pending.update(rows)  # replayed once the load below is done
+                return
+        if loaded[0] is not None:
+            loaded[0].apply(rows)
+
+    # subscribe before loading: a change committed during the load is replayed, not lost
+    change_feed().subscribe(on_change)
+    conn = get_connection()
+    try:
+        store = MovieFilterStore(pd.read_sql("SELECT * FROM movies", conn))
+    except Exception:
+        with lock:
+            loaded.append(None)
+        raise
+    finally:
+        conn.close()
+    with lock:
+        store.apply(pending)
+        loaded.append(store)
+    return store
+
+# ===========================================
+# SHARED RECOMMENDATION MODEL
+# ===========================================
+def build_recommender():
+    generation = catalog.generation  # read first: a write during the load only costs a rebuild
+    store = movies_store()
+    df = store.frame()
+    return fit_tfidf(df, df['genre'].astype(str) + " " + df['director'].astype(str), version=generation)
+
+@st.cache_resource
+def recommender():
+    """One TF-IDF model per server process, rebuilt in the background when the catalog changes."""
+    model = SharedModel(build_recommender, name="worked.tfidf",
+                        is_current=lambda m: m.version == catalog.generation)
+    catalog.subscribe(model.mark_stale)
+    return model
 
 # ===========================================
 # USER AUTH FUNCTIONS (WITHOUT ROLE)
@@ -53,6 +161,12 @@ def authenticate_user(username, password):
 # ===========================================
 st.set_page_config(page_title="Movie Recommendation System", layout="wide")
 st.title("🎬 Movie Recommendation System (Python + SQL + Streamlit)")
+try:
+    bootstrap()
+    feed_running = True
+except Exception as e:
+    feed_running = False  # the cached catalog only refreshes on its TTL until this succeeds
+    st.sidebar.warning(f"Startup checks failed, retrying on next action ({e})")
 
 # ===========================================
 # SESSION STATE
@@ -111,24 +225,59 @@ if st.session_state.logged_in:
     # -----------------------------
     elif choice == "Home":
         st.header("📌 All Movies")
-        df = fetch_movies()
-        st.dataframe(df, use_container_width=True)
+        # keyset pages straight from SQL Server instead of the whole table
+        render_catalog_browser(
+            get_connection, "movies", "movie_id",
+            columns=["movie_id", "title", "release_year", "genre", "director", "imdb_rating", "language", "duration_minutes"],
+            sort_columns=["movie_id", "title", "release_year", "imdb_rating"],
+            state_key="home_browser",
+        )
 
     # -----------------------------
     # FILTER MOVIES
     # -----------------------------
     elif choice == "Filter Movies":
         st.header("🔍 Filter Movies")
-        df = fetch_movies()
-        genre = st.selectbox("Genre", ["All"] + df["genre"].dropna().unique().tolist())
-        language = st.selectbox("Language", ["All"] + df["language"].dropna().unique().tolist())
-        rating = st.slider("Minimum Rating", 1.0, 10.0, 5.0)
-
-        filtered_df = df[
-            ((df["genre"] == genre) | (genre == "All")) &
-            ((df["language"] == language) | (language == "All")) &
-            (df["imdb_rating"] >= rating)
-        ]
+        state = st.session_state
+        if feed_running:
+            store = movie_filter_store()
+            # options and their counts under the other widgets' current values, from one set of bitmaps
+            genre_counts = store.facet_counts("genre", language=state.get("filter_language", ALL),
+                                              min_rating=state.get("filter_rating", 5.0))
+            language_counts = store.facet_counts("language", genre=state.get("filter_genre", ALL),
+                                                 min_rating=state.get("filter_rating", 5.0))
+        else:
+            # no change feed to keep the snapshot current: ask SQL Server (options without counts)
+            conn = get_connection()
+            try:
+                genres, languages = fetch_filter_options(conn, table="movies")
+            finally:
+                conn.close()
+            genre_counts, language_counts = dict.fromkeys(genres), dict.fromkeys(languages)
+        genre = st.selectbox("Genre", [ALL] + list(genre_counts), key="filter_genre",
+                             format_func=lambda g: g if genre_counts.get(g) is None else f"{g} ({genre_counts[g]})")
+        language = st.selectbox("Language", [ALL] + list(language_counts), key="filter_language",
+                                format_func=lambda l: l if language_counts.get(l) is None else f"{l} ({language_counts[l]})")
+        rating = st.slider("Minimum Rating", 1.0, 10.0, 5.0, key="filter_rating")
+        col1, col2, col3, col4 = st.columns(4)
+        sort_by = col1.selectbox("Sort by", list(SORT_COLUMNS))
+        descending = col2.selectbox("Order", ["Descending", "Ascending"]) == "Descending"
+        page_size = col3.selectbox("Rows per page", [25, 50, 100, 500])
+        page = col4.number_input("Page", min_value=1, value=1, step=1)
+
+        filters = dict(genre=genre, language=language, min_rating=rating, order_by=sort_by,
+                       descending=descending, limit=page_size, offset=(int(page) - 1) * page_size)
+        if feed_running:
+            # facet bitmaps kept current by the change feed: only the matching rows are sorted and paged
+            filtered_df, total = store.filter(**filters)
+        else:
+            # WHERE / ORDER BY / OFFSET run in SQL Server, only the requested page is fetched
+            conn = get_connection()
+            try:
+                filtered_df, total = fetch_filtered_movies(conn, table="movies", **filters)
+            finally:
+                conn.close()
+        st.write(f"{total} matching movie(s)")
         st.dataframe(filtered_df, use_container_width=True)
 
     # -----------------------------
@@ -136,19 +285,21 @@ if st.session_state.logged_in:
     # -----------------------------
     elif choice == "Recommendations":
         st.header("🤖 Movie Recommendations")
-        df = fetch_movies()
-        df['combined'] = df['genre'] + " " + df['director']
-
-        vec = TfidfVectorizer(stop_words='english')
-        tfidf = vec.fit_transform(df['combined'])
-        cos_sim = linear_kernel(tfidf, tfidf)
-
-        movie_list = df['title'].tolist()
-        movie = st.selectbox("Select a Movie", movie_list)
-        idx = df[df['title'] == movie].index[0]
-        sim_scores = list(enumerate(cos_sim[idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1:6]
-        movie_indices = [i[0] for i in sim_scores]
+        model = recommender().get()
+        if model is None:
+            st.info("No movies to recommend from.")
+            st.stop()
+        df = model.df
+
+        movie_id = title_picker(title_index(), "Search for a movie", key="worked_rec")
+        if movie_id is None:
+            st.stop()
+        rows = df.index[df['movie_id'] == movie_id]
+        if len(rows) == 0:
+            st.info("This movie is not in the recommendation model yet; try again in a moment.")
+            st.stop()
+        idx = rows[0]
+        movie_indices, _ = most_similar(model.matrix, idx, top_n=5)
 
         st.success("Recommended Movies")
         st.dataframe(df.iloc[movie_indices][['title', 'genre', 'imdb_rating']])